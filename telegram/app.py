@@ -2,21 +2,41 @@
 import logging
 import asyncio
 import re
+import time
+import socket
+import threading
+import importlib
 
-from flask import Flask, request, redirect, jsonify, Response
+from flask import Flask, request, redirect, jsonify, Response, stream_with_context
 from flask_cors import CORS
-import stripe
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
 from dotenv import load_dotenv
-from telethon.sync import TelegramClient
-from telethon.tl.functions.channels import GetParticipantsRequest
-from telethon.tl.types import ChannelParticipantsAdmins
-from telegram import Bot
 from datetime import datetime, timedelta
 
 load_dotenv()
 
+from config.database import get_db, lazy_db, initialize_firebase, server_timestamp, LazyClient
+from cache_metrics import cache_metrics
+
+# Services importés au premier accès (ou par warmup()): ils chargent redis,
+# redis.asyncio et le SDK Firestore, ~350 ms inutiles pour /health
+LAZY_SERVICES = {
+    'redis_cache': 'redis_cache',
+    'firebase_service': 'services.FirebaseService',
+    'member_index_service': 'services.MemberIndexService',
+    'export_service': 'services.ExportService',
+    'stats_service': 'services.StatsService',
+}
+
+def lazy_service(name):
+    """Proxy vers le singleton `name` de son module, importé au premier accès"""
+    return LazyClient(lambda: getattr(importlib.import_module(LAZY_SERVICES[name]), name))
+
+redis_cache = lazy_service('redis_cache')
+firebase_service = lazy_service('firebase_service')
+member_index_service = lazy_service('member_index_service')
+export_service = lazy_service('export_service')
+stats_service = lazy_service('stats_service')
+
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:3000', 'http://localhost:5001', 'https://makerhub.pro', 'https://api.makerhub.pro'])
 
@@ -27,14 +47,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Configuration Stripe
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-
-# Initialisation Firebase
-if not firebase_admin._apps:
-    cred = credentials.Certificate("firebase-service-account.json")
-    firebase_admin.initialize_app(cred)
-db = firestore.client()
+# Firestore créé au premier accès (FIRESTORE_BACKEND=memory pour travailler sans identifiants)
+db = lazy_db
 
 # Configuration Telegram
 api_id = int(os.getenv("TELEGRAM_API_ID"))
@@ -64,12 +78,64 @@ def home():
         "status": "operational"
     })
 
+# ========================================
+# CLIENTS À CHARGEMENT DIFFÉRÉ
+# ========================================
+# stripe, telethon et python-telegram-bot sont importés au premier usage
+# (ou par warmup()) pour ne pas peser sur le démarrage
+
+def get_stripe():
+    """Module stripe configuré"""
+    import stripe
+    if not stripe.api_key:
+        stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
+    return stripe
+
+def telegram_client():
+    """TelegramClient de la session userbot"""
+    from telethon.sync import TelegramClient
+    return TelegramClient("userbot_session", api_id, api_hash)
+
+def telegram_bot():
+    """Bot python-telegram-bot"""
+    from telegram import Bot
+    return Bot(token=bot_token)
+
+def warmup():
+    """Initialise les clients lourds hors du chemin de la première requête"""
+    started = time.perf_counter()
+    try:
+        for module in LAZY_SERVICES.values():
+            importlib.import_module(module)
+        get_db()
+        redis_cache.connect()
+        get_stripe()
+        import telethon.sync  # noqa: F401
+        import telegram  # noqa: F401
+        logger.info(f"🔥 Warmup done in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except Exception as e:
+        logger.error(f"❌ Warmup error: {e}")
+
+def start_warmup_after_bind(port, host="127.0.0.1", timeout=30):
+    """Lance warmup() dans un thread dès que le serveur accepte les connexions"""
+    def run():
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection((host, port), timeout=0.5).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        warmup()
+    
+    threading.Thread(target=run, name="warmup", daemon=True).start()
+
 # ========================================
 # FONCTIONS TELEGRAM
 # ========================================
 
 async def get_telegram_channel_id(link):
-    async with TelegramClient("userbot_session", api_id, api_hash) as client:
+    async with telegram_client() as client:
         try:
             entity = await client.get_entity(link)
             return entity.id
@@ -81,8 +147,11 @@ def fetch_telegram_channel_id(link):
     return asyncio.run(get_telegram_channel_id(link))
 
 def check_bot_is_admin(channel_link):
+    from telethon.tl.functions.channels import GetParticipantsRequest
+    from telethon.tl.types import ChannelParticipantsAdmins
+    
     async def check_admin():
-        async with TelegramClient("userbot_session", api_id, api_hash) as client:
+        async with telegram_client() as client:
             try:
                 await client.start()
                 entity = await client.get_entity(channel_link)
@@ -177,10 +246,11 @@ def api_save_telegram_connection():
             "channelLink": channel_link,
             "channelName": channel_name,
             "botVerified": bot_verified,
-            "connectedAt": firestore.SERVER_TIMESTAMP,
+            "connectedAt": server_timestamp(),
             "status": "active",
             "botUsername": bot_username
         })
+        firebase_service.cache.invalidate("telegram_connections", page_id)
         
         logger.info(f"✅ Telegram connection saved for page {page_id}")
         
@@ -206,7 +276,7 @@ def api_create_invite_link():
             return jsonify({"error": "channel_id required"}), 400
         
         async def create_link():
-            bot = Bot(token=bot_token)
+            bot = telegram_bot()
             expire_date = datetime.now() + timedelta(hours=expire_hours)
             
             invite_link = await bot.create_chat_invite_link(
@@ -260,7 +330,7 @@ def api_add_member():
         channel_id = conn_data.get("channelId") or conn_data.get("channel_id")
         
         async def send_invite():
-            bot = Bot(token=bot_token)
+            bot = telegram_bot()
             expire_date = datetime.now() + timedelta(hours=24)
             
             invite_link = await bot.create_chat_invite_link(
@@ -283,14 +353,14 @@ def api_add_member():
         
         invite_link = asyncio.run(send_invite())
         
-        db.collection("telegram_members").add({
+        member_index_service.create_member({
             "pageId": page_id,
             "channelId": channel_id,
             "telegramUserId": telegram_user_id,
             "email": email,
             "status": "invited",
             "inviteLink": invite_link.invite_link,
-            "invitedAt": firestore.SERVER_TIMESTAMP
+            "invitedAt": server_timestamp()
         })
         
         return jsonify({
@@ -320,7 +390,7 @@ def api_remove_member():
         channel_id = conn_data.get("channelId") or conn_data.get("channel_id")
         
         async def kick_member():
-            async with TelegramClient("userbot_session", api_id, api_hash) as client:
+            async with telegram_client() as client:
                 await client.start()
                 entity = await client.get_entity(int(channel_id))
                 await client.kick_participant(entity, int(telegram_user_id))
@@ -329,7 +399,7 @@ def api_remove_member():
         
         members_query = db.collection("telegram_members").where("pageId", "==", page_id).where("telegramUserId", "==", telegram_user_id).get()
         for doc in members_query:
-            doc.reference.update({"status": "removed", "removedAt": firestore.SERVER_TIMESTAMP})
+            doc.reference.update({"status": "removed", "removedAt": server_timestamp()})
         
         return jsonify({"success": True, "message": "Member removed"}), 200
         
@@ -337,6 +407,126 @@ def api_remove_member():
         logger.error(f"remove_member error: {e}")
         return jsonify({"error": str(e)}), 500
 
+# ========================================
+# ROUTES STATS
+# ========================================
+
+@app.route("/api/stats/<scope>/<target_id>", methods=["GET"])
+def api_stats(scope, target_id):
+    """
+    Agrégats de ventes d'un créateur ou d'une page (scope: creator|page, ?month=YYYY-MM)
+    
+    Réservé au créateur: ID token Firebase requis, son uid doit être le créateur
+    ou le propriétaire (creatorId) de la page
+    """
+    if scope not in ("creator", "page"):
+        return jsonify({"error": "scope must be creator or page"}), 400
+    
+    month = request.args.get("month")
+    if month and not re.fullmatch(r"\d{4}-\d{2}", month):
+        return jsonify({"error": "month must be YYYY-MM"}), 400
+    
+    uid = authenticated_uid()
+    if uid is None:
+        return jsonify({"error": "Authorization: Bearer <ID_TOKEN> required"}), 401
+    
+    try:
+        if scope == "creator":
+            owner_id = target_id
+        else:
+            page_data = firebase_service.get_landing_page(target_id) or {}
+            owner_id = page_data.get("creatorId") or page_data.get("userId")
+        if owner_id != uid:
+            logger.warning(f"⚠️ Stats refused: {uid} requested {scope} {target_id}")
+            return jsonify({"error": "Forbidden"}), 403
+        
+        stats = stats_service.get_stats(scope, target_id, month)
+        if stats is None:
+            return jsonify({"error": "No stats"}), 404
+        return jsonify({"success": True, "stats": stats}), 200
+    except Exception as e:
+        logger.error(f"stats error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/cache/stats", methods=["GET"])
+def api_cache_stats():
+    """Hit ratios du cache de documents et de chaque fonction @cache_result, état de Redis"""
+    from redis_cache import get_cache_result_stats
+    return jsonify({
+        "redis": redis_cache.health(),
+        "documents": firebase_service.get_cache_stats(),
+        "functions": get_cache_result_stats()
+    }), 200
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Métriques du cache (Prometheus, ou JSON avec ?format=json)"""
+    if request.args.get("format") == "json":
+        return jsonify(cache_metrics.snapshot()), 200
+    from redis_cache import render_metrics
+    return Response(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ========================================
+# ROUTES EXPORT
+# ========================================
+
+def authenticated_uid():
+    """UID Firebase du header Authorization: Bearer <ID_TOKEN>, None si absent ou invalide"""
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None
+    token = header[len("Bearer "):].strip()
+    if not token:
+        return None
+    
+    try:
+        import firebase_admin
+        from firebase_admin import auth
+        try:
+            firebase_admin.get_app()
+        except ValueError:
+            initialize_firebase()
+        return auth.verify_id_token(token)["uid"]
+    except Exception as e:
+        logger.warning(f"Invalid ID token: {e}")
+        return None
+
+@app.route("/api/export/<dataset>", methods=["GET"])
+def api_export(dataset):
+    """
+    Export en flux (chunked) des ventes ou emails d'un créateur - ?creator_id=&format=csv|ndjson&page_token=
+    
+    Réservé au créateur lui-même: ID token Firebase requis, son uid doit être creator_id
+    """
+    uid = authenticated_uid()
+    if uid is None:
+        return jsonify({"error": "Authorization: Bearer <ID_TOKEN> required"}), 401
+    
+    creator_id = request.args.get("creator_id", uid)
+    fmt = request.args.get("format", "csv")
+    page_token = request.args.get("page_token")
+    
+    if creator_id != uid:
+        logger.warning(f"⚠️ Export refused: {uid} requested creator {creator_id}")
+        return jsonify({"error": "Forbidden"}), 403
+    
+    try:
+        export_service.validate(dataset, fmt, page_token)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    from services.ExportService import FORMATS
+    filename = f"{dataset}-{creator_id}.{fmt}"
+    return Response(
+        stream_with_context(export_service.stream(dataset, creator_id, fmt, page_token)),
+        mimetype=FORMATS[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 # ========================================
 # ROUTE CHECKOUT LANDING PAGES V1
 # ========================================
@@ -344,6 +534,7 @@ def api_remove_member():
 @app.route("/checkout/<page_id>")
 def checkout_landing_page(page_id):
     """Checkout pour les landing pages MAKERHUB V1"""
+    stripe = get_stripe()
     try:
         plan_id = request.args.get('plan')
         telegram_user_id = request.args.get('telegram_user_id', '')
@@ -525,6 +716,7 @@ def checkout_landing_page(page_id):
 
 @app.route('/webhook', methods=['POST'])
 def stripe_webhook():
+    stripe = get_stripe()
     payload = request.data
     sig_header = request.headers.get('stripe-signature')
     endpoint_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
@@ -555,9 +747,10 @@ def stripe_webhook():
         
         # Sauvegarder avec camelCase
         db.collection('sales').add({
-            'createdAt': firestore.SERVER_TIMESTAMP,
+            'createdAt': server_timestamp(),
             'email': customer_email,
             'amount': amount_total,
+            'currency': session.get('currency'),
             'pageId': page_id,
             'creatorId': creator_id,
             'stripeSessionId': session.get('id'),
@@ -570,17 +763,25 @@ def stripe_webhook():
         
         logger.info(f"✅ Sale recorded in Firebase (sales)")
         
+        try:
+            stats_service.record_sale(event['id'], creator_id, page_id,
+                                      session.get('amount_total', 0), session.get('currency'), event.get('created'))
+        except Exception as e:
+            logger.error(f"❌ Stats update error: {e}")
+        
         # Collecter l'email
         if customer_email:
             customer_details = session.get('customer_details', {})
-            db.collection('collected_emails').add({
+            firebase_service.upsert_collected_email({
                 'email': customer_email,
                 'customerName': customer_details.get('name', ''),
                 'creatorId': creator_id,
                 'landingPageId': page_id,
                 'source': 'Stripe Checkout',
-                'createdAt': firestore.SERVER_TIMESTAMP
-            })
+                'stripeCustomerId': customer_id,
+                'stripeSessionId': session.get('id'),
+                'currency': session.get('currency')
+            }, amount=amount_total, event_id=event['id'])
             logger.info(f"✅ Email collected: {customer_email}")
     
     # ========================================
@@ -599,10 +800,10 @@ def stripe_webhook():
         logger.info(f"❌ Subscription cancelled: {subscription_id}, Raison: {cancellation_reason}")
         
         # Trouver le membre
-        members = db.collection('telegram_members').where('stripeSubscriptionId', '==', subscription_id).get()
+        members = member_index_service.find_by_subscription(subscription_id)
         
         if not members:
-            members = db.collection('telegram_members').where('stripeCustomerId', '==', customer_id).get()
+            members = member_index_service.find_by_customer(customer_id)
         
         for member_doc in members:
             member_data = member_doc.to_dict()  # ✅ CORRIGÉ
@@ -615,7 +816,7 @@ def stripe_webhook():
             if channel_id and telegram_user_id:
                 try:
                     async def kick_member():
-                        async with TelegramClient("userbot_session", api_id, api_hash) as client:
+                        async with telegram_client() as client:
                             await client.kick_participant(int(channel_id), int(telegram_user_id))
                     
                     asyncio.run(kick_member())
@@ -625,14 +826,19 @@ def stripe_webhook():
             
             member_doc.reference.update({
                 'status': 'removed',
-                'removedAt': firestore.SERVER_TIMESTAMP,
+                'removedAt': server_timestamp(),
                 'removalReason': cancellation_reason
             })
         
         # Mettre à jour la vente
         sales = db.collection('sales').where('stripeSubscriptionId', '==', subscription_id).get()
         for sale_doc in sales:
-            sale_doc.reference.update({'status': 'cancelled'})
+            sale_doc.reference.update({'status': 'cancelled', 'cancelledAt': server_timestamp()})
+        
+        try:
+            stats_service.record_churn(event['id'], metadata.get('creator_id'), page_id, event.get('created'))
+        except Exception as e:
+            logger.error(f"❌ Stats update error: {e}")
     
     # ========================================
     # PAIEMENT ÉCHOUÉ
@@ -646,17 +852,17 @@ def stripe_webhook():
         
         logger.warning(f"⚠️ Payment failed (attempt {attempt_count}): {customer_email}, Sub: {subscription_id}")
         
-        members = db.collection('telegram_members').where('stripeSubscriptionId', '==', subscription_id).get()
+        members = member_index_service.find_by_subscription(subscription_id)
         
         for member_doc in members:
             update_data = {
                 'status': 'payment_failed',
-                'paymentFailedAt': firestore.SERVER_TIMESTAMP,
+                'paymentFailedAt': server_timestamp(),
                 'failedAttemptCount': attempt_count
             }
             
             if attempt_count == 1:
-                update_data['gracePeriodStart'] = firestore.SERVER_TIMESTAMP
+                update_data['gracePeriodStart'] = server_timestamp()
             
             member_doc.reference.update(update_data)
         
@@ -674,14 +880,29 @@ def stripe_webhook():
         if subscription_id:
             logger.info(f"✅ Renewal successful: {customer_email}, {amount}€")
             
-            members = db.collection('telegram_members').where('stripeSubscriptionId', '==', subscription_id).get()
+            members = member_index_service.find_by_subscription(subscription_id)
             for member_doc in members:
                 member_doc.reference.update({
                     'status': 'active',
-                    'lastPaymentAt': firestore.SERVER_TIMESTAMP,
+                    'lastPaymentAt': server_timestamp(),
                     'failedAttemptCount': 0,
                     'gracePeriodStart': None
                 })
+            
+            # La première facture est déjà comptée par checkout.session.completed
+            if invoice.get('billing_reason') != 'subscription_create':
+                sub_metadata = (invoice.get('subscription_details') or {}).get('metadata') or {}
+                creator_id = sub_metadata.get('creator_id')
+                page_id = sub_metadata.get('page_id')
+                if not (creator_id or page_id) and members:
+                    member_data = members[0].to_dict()
+                    creator_id, page_id = member_data.get('creatorId'), member_data.get('pageId')
+                
+                try:
+                    stats_service.record_renewal(event['id'], creator_id, page_id,
+                                                 invoice.get('amount_paid', 0), invoice.get('currency'), event.get('created'))
+                except Exception as e:
+                    logger.error(f"❌ Stats update error: {e}")
     
     return Response(status=200)
 
@@ -692,6 +913,7 @@ def stripe_webhook():
 @app.route("/success")
 def success_page():
     """Page de succès après paiement - Génère et affiche le lien Telegram"""
+    stripe = get_stripe()
     session_id = request.args.get('session_id')
     page_id = request.args.get('page_id')
     lang = request.args.get('lang', 'en')
@@ -843,7 +1065,7 @@ def success_page():
                 logger.info(f"✅ Payment verified for session {session_id}, page_id: {page_id}, email: {customer_email}, lang: {lang}")
                 
                 # Vérifier si un lien existe déjà
-                existing = db.collection("telegram_members").where("stripeSessionId", "==", session_id).limit(1).get()
+                existing = member_index_service.find_by_session(session_id)
                 
                 if existing:
                     member_data = existing[0].to_dict()  # ✅ CORRIGÉ
@@ -854,16 +1076,20 @@ def success_page():
                     channel_id = None
                     creator_id = None
                     
-                    # Chercher la landing page
-                    page_doc = db.collection("landingPages").document(page_id).get()
+                    # Landing page + connexion Telegram en un seul aller-retour
+                    docs = firebase_service.get_many([
+                        ("landingPages", page_id),
+                        ("telegram_connections", page_id)
+                    ])
+                    page_data = docs.get(f"landingPages/{page_id}")
+                    conn_data = docs.get(f"telegram_connections/{page_id}")
                     
-                    if not page_doc.exists:
+                    if not page_data:
                         pages_query = db.collection('landingPages').where('slug', '==', page_id).limit(1).get()
                         if pages_query:
-                            page_doc = pages_query[0]
+                            page_data = pages_query[0].to_dict()
                     
-                    if page_doc.exists:
-                        page_data = page_doc.to_dict()  # ✅ CORRIGÉ
+                    if page_data:
                         creator_id = page_data.get('creatorId')
                         telegram_data = page_data.get('telegram', {})
                         
@@ -874,9 +1100,7 @@ def success_page():
                         logger.info(f"📄 Page found, telegram data: {telegram_data}")
                         
                         # Récupérer le channel_id
-                        conn_doc = db.collection("telegram_connections").document(page_id).get()
-                        if conn_doc.exists:
-                            conn_data = conn_doc.to_dict()  # ✅ CORRIGÉ
+                        if conn_data:
                             channel_id = conn_data.get("channelId") or conn_data.get("channel_id")
                             logger.info(f"📱 Channel ID from telegram_connections: {channel_id}")
                         
@@ -890,7 +1114,7 @@ def success_page():
                             if channel_link:
                                 try:
                                     async def get_channel():
-                                        async with TelegramClient("userbot_session", api_id, api_hash) as client:
+                                        async with telegram_client() as client:
                                             entity = await client.get_entity(channel_link)
                                             return entity.id
                                     
@@ -909,7 +1133,7 @@ def success_page():
                     if channel_id:
                         try:
                             async def create_link():
-                                bot = Bot(token=bot_token)
+                                bot = telegram_bot()
                                 link = await bot.create_chat_invite_link(
                                     chat_id=channel_id,
                                     member_limit=1
@@ -923,7 +1147,7 @@ def success_page():
                             subscription_id = session.subscription if hasattr(session, 'subscription') else None
                             customer_id = session.customer if hasattr(session, 'customer') else None
                             
-                            db.collection("telegram_members").add({
+                            member_index_service.create_member({
                                 "pageId": page_id,
                                 "channelId": channel_id,
                                 "email": customer_email,
@@ -933,17 +1157,17 @@ def success_page():
                                 "stripeSessionId": session_id,
                                 "stripeSubscriptionId": subscription_id,
                                 "stripeCustomerId": customer_id,
-                                "invitedAt": firestore.SERVER_TIMESTAMP
+                                "invitedAt": server_timestamp()
                             })
                             
                             if customer_email:
-                                db.collection("collected_emails").add({
+                                # L'achat est compté par le webhook: on garantit seulement le document
+                                firebase_service.upsert_collected_email({
                                     "email": customer_email,
                                     "creatorId": creator_id,
                                     "landingPageId": page_id,
-                                    "source": "Stripe Checkout",
-                                    "createdAt": firestore.SERVER_TIMESTAMP
-                                })
+                                    "source": "Stripe Checkout"
+                                }, count_purchase=False)
                                 logger.info(f"📧 Email collected: {customer_email}")
                                 
                         except Exception as e:
@@ -1133,8 +1357,20 @@ if __name__ == "__main__":
     print("   GET /success (affiche lien Telegram)")
     print("   GET /cancel")
     print("=" * 60)
+    print("📊 Routes Stats:")
+    print("   GET /api/stats/<creator|page>/<id>?month=YYYY-MM")
+    print("📤 Routes Export:")
+    print("   GET /api/export/<emails|sales>")
+    print("=" * 60)
+    
+    debug = os.getenv('FLASK_DEBUG', 'true').lower() != 'false'
+    
+    # Avec le reloader (debug), seul le processus enfant servant les requêtes fait le warmup
+    reloader_parent = debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+    if os.getenv('WARMUP_ON_START', 'true').lower() != 'false' and not reloader_parent:
+        start_warmup_after_bind(PORT)
     
-    app.run(host='0.0.0.0', port=PORT, debug=True)
+    app.run(host='0.0.0.0', port=PORT, debug=debug)
 
 
 
@@ -0,0 +1,134 @@
+# telegram/benchmarks/bench_batch_reads.py
+"""
+Benchmark: lectures séquentielles vs FirebaseService.get_many
+
+Compare le nombre d'allers-retours Firestore et la latence des parcours
+success_page (page + connexion Telegram) et checkout (users + creators).
+
+Usage (depuis telegram/):
+    python -m benchmarks.bench_batch_reads <page_id> [creator_id] [--runs N]
+
+Sans identifiants Firebase, sur le Firestore en mémoire avec latence simulée:
+    python -m benchmarks.bench_batch_reads page_demo creator_demo \
+        --fixtures benchmarks/fixtures/checkout.json --latency-ms 20
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class RoundTripCounter:
+    """Compte les appels réseau (get de document et get_all) d'un client Firestore"""
+    
+    def __init__(self, client):
+        self.client = client
+        self.round_trips = 0
+    
+    def wrap(self):
+        counter = self
+        original_document = self.client.document
+        original_collection = self.client.collection
+        original_get_all = self.client.get_all
+        
+        def count_ref(ref):
+            original_get = ref.get
+            
+            def get(*args, **kwargs):
+                counter.round_trips += 1
+                return original_get(*args, **kwargs)
+            ref.get = get
+            return ref
+        
+        class CountingCollection:
+            def __init__(self, collection):
+                self._collection = collection
+            
+            def document(self, *args, **kwargs):
+                return count_ref(self._collection.document(*args, **kwargs))
+            
+            def __getattr__(self, name):
+                return getattr(self._collection, name)
+        
+        def get_all(*args, **kwargs):
+            counter.round_trips += 1
+            return original_get_all(*args, **kwargs)
+        
+        self.client.document = lambda *a, **k: count_ref(original_document(*a, **k))
+        self.client.collection = lambda *a, **k: CountingCollection(original_collection(*a, **k))
+        self.client.get_all = get_all
+        return self.client
+
+
+def sequential_success_page(service, page_id):
+    page = service._fetch_document('landingPages', page_id)
+    conn = service._fetch_document('telegram_connections', page_id)
+    return page, conn
+
+
+def batched_success_page(service, page_id):
+    docs = service.get_many([('landingPages', page_id), ('telegram_connections', page_id)])
+    return docs.get(f'landingPages/{page_id}'), docs.get(f'telegram_connections/{page_id}')
+
+
+def sequential_creator(service, creator_id):
+    return service._fetch_document('users', creator_id) or service._fetch_document('creators', creator_id)
+
+
+def batched_creator(service, creator_id):
+    docs = service.get_many([('users', creator_id), ('creators', creator_id)])
+    return docs.get(f'users/{creator_id}') or docs.get(f'creators/{creator_id}')
+
+
+def measure(label, func, service, counter, arg, runs):
+    """Exécute func `runs` fois et affiche allers-retours et latence"""
+    counter.round_trips = 0
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(service, arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    print(f"{label:<32} {counter.round_trips / runs:>6.1f} RPC/appel   "
+          f"p50 {statistics.median(timings):>8.2f} ms   "
+          f"max {max(timings):>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('page_id')
+    parser.add_argument('creator_id', nargs='?')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--fixtures', help="Fichier JSON: utilise le Firestore en mémoire")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Latence simulée par RPC (mémoire)")
+    args = parser.parse_args()
+    
+    if args.fixtures:
+        os.environ['FIRESTORE_BACKEND'] = 'memory'
+        os.environ['FIRESTORE_FIXTURES'] = args.fixtures
+        os.environ['FIRESTORE_MEMORY_LATENCY_MS'] = str(args.latency_ms)
+    
+    # Import après la sélection du backend (lu à l'import de config.database)
+    from services.FirebaseService import FirebaseService
+    
+    service = FirebaseService()
+    service.cache.enabled = False
+    counter = RoundTripCounter(service.db)
+    service._db = counter.wrap()
+    
+    print("=" * 80)
+    measure("success_page séquentiel", sequential_success_page, service, counter, args.page_id, args.runs)
+    measure("success_page get_many", batched_success_page, service, counter, args.page_id, args.runs)
+    
+    if args.creator_id:
+        measure("checkout créateur séquentiel", sequential_creator, service, counter, args.creator_id, args.runs)
+        measure("checkout créateur get_many", batched_creator, service, counter, args.creator_id, args.runs)
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
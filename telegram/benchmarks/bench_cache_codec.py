@@ -0,0 +1,113 @@
+# telegram/benchmarks/bench_cache_codec.py
+"""
+Benchmark: format des valeurs du cache Redis
+
+Compare l'encodage legacy (json.dumps / pickle, décodage par essais successifs)
+et ValueCodec (en-tête d'un octet, JSON ou msgpack, compression zlib/zstd):
+coût d'encodage, de décodage et taille par clé.
+
+Avec --redis, la mémoire occupée par clé est aussi mesurée (MEMORY USAGE) sur
+des clés temporaires bench:codec:*, supprimées à la fin.
+
+Usage (depuis telegram/):
+    python -m benchmarks.bench_cache_codec [--number 2000] [--threshold 1024] [--redis]
+"""
+
+import os
+import sys
+import json
+import pickle
+import timeit
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis_cache as cache_module
+from redis_cache import ValueCodec, redis_cache
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'checkout.json')
+
+
+def sample_values():
+    """Valeurs représentatives: page, petit dict, liste de documents, texte, objet"""
+    with open(FIXTURES, encoding='utf-8') as f:
+        fixtures = json.load(f)
+    page = next(iter(fixtures['landingPages'].values()))
+    documents = [dict(page, id=f"page_{i}", views=i) for i in range(200)]
+    return {
+        'landing_page': page,
+        'small_dict': {'allowed': True, 'remaining': 42, 'window': 60},
+        'documents_x200': documents,
+        'text_4k': 'Rejoignez la communauté MAKERHUB. ' * 120,
+        'pickled_object': {'createdAt': datetime(2024, 1, 1), 'tags': {'a', 'b'}},
+    }
+
+
+def legacy_encode(value):
+    if isinstance(value, (dict, list, str, int, float, bool)):
+        try:
+            return json.dumps(value).encode('utf-8')
+        except TypeError:
+            pass
+    return pickle.dumps(value)
+
+
+def legacy_decode(value):
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError, UnicodeDecodeError):
+        return pickle.loads(value)
+
+
+def codecs(threshold):
+    variants = {'legacy': (legacy_encode, legacy_decode)}
+    serializers = ['json'] + (['msgpack'] if cache_module.msgpack else [])
+    compressions = ['none', 'zlib'] + (['zstd'] if cache_module.zstandard else [])
+    for serializer in serializers:
+        for compression in compressions:
+            codec = ValueCodec(serializer, compression, threshold=threshold)
+            variants[f"{serializer}+{compression}"] = (codec.encode, codec.decode)
+    return variants
+
+
+def memory_usage(encoded):
+    """Octets occupés dans Redis par une clé contenant la valeur encodée"""
+    key = 'bench:codec:value'
+    redis_cache.client.set(key, encoded)
+    try:
+        return redis_cache.client.memory_usage(key, samples=0)
+    finally:
+        redis_cache.client.delete(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000, help="Itérations par mesure")
+    parser.add_argument('--threshold', type=int, default=1024, help="Seuil de compression (octets)")
+    parser.add_argument('--redis', action='store_true', help="Mesurer MEMORY USAGE sur le Redis configuré")
+    args = parser.parse_args()
+    
+    if args.redis and not redis_cache.is_connected:
+        print("❌ Redis non disponible")
+        sys.exit(1)
+    
+    print("=" * 96)
+    print(f"{'valeur':<16} {'format':<16} {'encode µs':>11} {'decode µs':>11} {'octets':>10} "
+          f"{'redis octets':>14}")
+    
+    for name, value in sample_values().items():
+        print("-" * 96)
+        for label, (encode, decode) in codecs(args.threshold).items():
+            encoded = encode(value)
+            encode_us = timeit.timeit(lambda: encode(value), number=args.number) / args.number * 1e6
+            decode_us = timeit.timeit(lambda: decode(encoded), number=args.number) / args.number * 1e6
+            redis_bytes = memory_usage(encoded) if args.redis else '-'
+            print(f"{name:<16} {label:<16} {encode_us:>11.1f} {decode_us:>11.1f} {len(encoded):>10} "
+                  f"{redis_bytes:>14}")
+    
+    print("=" * 96)
+
+
+if __name__ == '__main__':
+    main()
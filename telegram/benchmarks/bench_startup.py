@@ -0,0 +1,112 @@
+# telegram/benchmarks/bench_startup.py
+"""
+Benchmark: démarrage à froid du service Flask (app.py)
+
+Mesure dans des processus neufs:
+  - le coût d'import par module (python -X importtime), modules les plus lents
+  - le temps jusqu'à la première requête (lancement du processus -> réponse /health)
+
+Le code de sortie vaut 1 si la médiane du temps jusqu'à la première requête
+dépasse --target-ms.
+
+Usage (depuis telegram/):
+    python -m benchmarks.bench_startup [--runs 5] [--top 15] [--target-ms 1500] [--memory]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+TELEGRAM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+# Importe l'app et sert une requête /health via le client de test Flask
+FIRST_REQUEST_SCRIPT = (
+    "import app as service\n"
+    "response = service.app.test_client().get('/health')\n"
+    "assert response.status_code == 200, response.status_code\n"
+)
+
+
+def run_env(memory):
+    env = dict(os.environ)
+    env.setdefault('TELEGRAM_API_ID', '0')
+    env.setdefault('TELEGRAM_API_HASH', 'benchmark')
+    if memory:
+        env['FIRESTORE_BACKEND'] = 'memory'
+    return env
+
+
+def import_profile(env):
+    """Retourne [(cumulé µs, self µs, profondeur, module)] pour `import app`"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=TELEGRAM_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import app failed:\n{result.stderr[-2000:]}")
+    
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((int(cumulative_us), int(self_us), len(indent) // 2, module))
+    return rows
+
+
+def time_to_first_request(env):
+    """Millisecondes entre le lancement du processus et la réponse à /health"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_REQUEST_SCRIPT],
+        cwd=TELEGRAM_DIR, env=env, capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"first request failed:\n{result.stderr[-2000:]}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Nombre de modules affichés")
+    parser.add_argument('--target-ms', type=float, default=1500, help="Objectif de temps jusqu'à la première requête")
+    parser.add_argument('--memory', action='store_true', help="FIRESTORE_BACKEND=memory (sans identifiants)")
+    args = parser.parse_args()
+    
+    env = run_env(args.memory)
+    
+    rows = import_profile(env)
+    total_us = next((cumulative for cumulative, _, depth, module in rows if module == 'app'), 0)
+    top_level = sorted((row for row in rows if row[2] == 1), reverse=True)[:args.top]
+    
+    print("=" * 80)
+    print(f"import app: {total_us / 1000:.1f} ms")
+    print("-" * 80)
+    print(f"{'module':<50} {'cumulé ms':>12} {'self ms':>12}")
+    for cumulative, self_us, _, module in top_level:
+        print(f"{module:<50} {cumulative / 1000:>12.1f} {self_us / 1000:>12.1f}")
+    
+    timings = [time_to_first_request(env) for _ in range(args.runs)]
+    p50 = statistics.median(timings)
+    
+    print("-" * 80)
+    print(f"Première requête /health: p50 {p50:.0f} ms   max {max(timings):.0f} ms   "
+          f"objectif {args.target_ms:.0f} ms")
+    print("=" * 80)
+    
+    if p50 > args.target_ms:
+        print("❌ Objectif de démarrage dépassé")
+        sys.exit(1)
+    print("✅ Objectif de démarrage respecté")
+
+
+if __name__ == '__main__':
+    main()
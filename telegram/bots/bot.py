@@ -5,12 +5,10 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes
 import stripe
 
-# Firestore
-import firebase_admin
-from firebase_admin import credentials, firestore
-
 # Chargement .env
 load_dotenv()
+
+from services.FirebaseService import firebase_service
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 DOMAIN = os.getenv("DOMAIN")
@@ -19,17 +17,10 @@ stripe.api_key = STRIPE_SECRET_KEY
 
 logging.basicConfig(level=logging.INFO)
 
-# Init Firebase Admin
-if not firebase_admin._apps:
-    cred = credentials.Certificate("firebase-service-account.json")
-    firebase_admin.initialize_app(cred)
-db = firestore.client()
-
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    creators = db.collection("creators").stream()
+    creators = await firebase_service.list_creators_async()
     keyboard = []
-    for creator in creators:
-        data = creator.to_dict()
+    for data in creators:
         brand = data.get("creator_name", "Sans nom")  # Correction ici
         creator_id = data.get("stripe_account_id")
         price_id = data.get("price_id")
@@ -8,8 +8,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from telethon import TelegramClient, events
 from telethon.tl.types import Channel, Chat
-from firebase_admin import firestore
-from config.database import db, COLLECTIONS
+from telethon.utils import get_peer_id
+from services.FirebaseService import firebase_service
 
 # Configuration du logging
 logging.basicConfig(
@@ -18,6 +18,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Intervalle (secondes) d'écriture des compteurs de statistiques accumulés
+STATS_FLUSH_INTERVAL = float(os.getenv('TRANSLATOR_STATS_FLUSH_INTERVAL', 30))
+
+# Envois simultanés maximum vers le backend (toutes langues et canaux confondus)
+MAX_CONCURRENT_SENDS = int(os.getenv('TRANSLATOR_MAX_CONCURRENT_SENDS', 8))
+
+# Timeout (secondes) d'un appel traduction + envoi au backend
+BACKEND_TIMEOUT = float(os.getenv('TRANSLATOR_BACKEND_TIMEOUT', 60))
+
+class TargetPacer:
+    """
+    Espacement des envois vers un même canal cible: chaque envoi réserve un
+    créneau au moins `delay` secondes après le précédent, sans bloquer les
+    autres canaux.
+    """
+    
+    def __init__(self):
+        self.next_at = 0.0
+    
+    async def wait(self, delay: float):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self.next_at)
+        self.next_at = slot + delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
 class TelegramTranslatorBot:
     def __init__(self):
         """Initialise le bot traducteur Telegram"""
@@ -35,10 +62,14 @@ class TelegramTranslatorBot:
         
         # Clients
         self.client = None
-        self.db = None
         self.active_configs = {}
         self.monitored_channels = set()
         
+        # Index de dispatch: chat_id (peer id Telethon) -> [configurations]
+        self.configs_by_chat = {}
+        self.channel_ids = {}
+        self.message_event = None
+        
         # Statistiques
         self.stats = {
             'messages_processed': 0,
@@ -46,12 +77,21 @@ class TelegramTranslatorBot:
             'errors': 0,
             'start_time': datetime.now()
         }
+        
+        # Compteurs par configuration en attente d'écriture Firestore
+        self.pending_config_stats = {}
+        self.stats_flush_interval = STATS_FLUSH_INTERVAL
+        
+        # Fan-out des traductions: session HTTP partagée, plafond global, rythme par canal cible
+        self.http_session = None
+        self.send_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        self.target_pacers = {}
     
     async def initialize(self):
         """Initialise toutes les connexions"""
         try:
-            # Connexion Firebase
-            self.db = db()
+            # Connexion Firebase (client async: ne bloque pas la boucle Telethon)
+            firebase_service.async_db
             logger.info("✅ Firebase connecté")
             
             # Connexion Telegram
@@ -64,12 +104,12 @@ class TelegramTranslatorBot:
             await self.client.start(phone=self.phone)
             logger.info("✅ Client Telegram connecté")
             
-            # Charger les configurations actives
-            await self.load_active_configurations()
-            
             # Configurer les handlers d'événements
             self.setup_event_handlers()
             
+            # Charger les configurations actives (enregistre le handler des canaux surveillés)
+            await self.load_active_configurations()
+            
             logger.info(f"🤖 Bot initialisé avec {len(self.active_configs)} configurations")
             
         except Exception as e:
@@ -79,20 +119,20 @@ class TelegramTranslatorBot:
     async def load_active_configurations(self):
         """Charge toutes les configurations actives depuis Firebase"""
         try:
-            configs_ref = self.db.collection(COLLECTIONS['TRANSLATION_CONFIGS'])
-            query = configs_ref.where('status', '==', 'active')
-            configs = query.stream()
+            configs = await firebase_service.get_translation_configs_async(status='active')
             
-            for doc in configs:
-                config = doc.to_dict()
-                config_id = doc.id
+            active_configs = {}
+            monitored_channels = set()
+            for config in configs:
+                config_id = config['id']
                 
                 # Extraire les informations nécessaires
                 source_username = config['sourceChannelUsername']
                 target_languages = config['targetLanguages']
                 settings = config.get('settings', {})
                 
-                self.active_configs[config_id] = {
+                active_configs[config_id] = {
+                    'config_id': config_id,
                     'source_username': source_username,
                     'target_languages': target_languages,
                     'settings': settings,
@@ -101,20 +141,81 @@ class TelegramTranslatorBot:
                 }
                 
                 # Ajouter à la liste des canaux surveillés
-                self.monitored_channels.add(source_username)
+                monitored_channels.add(source_username)
+            
+            # Indexer par chat_id (une résolution par nouveau canal, mise en cache)
+            configs_by_chat = {}
+            for config_data in active_configs.values():
+                chat_id = await self.resolve_channel_id(config_data['source_username'])
+                if chat_id is not None:
+                    configs_by_chat.setdefault(chat_id, []).append(config_data)
             
-            logger.info(f"📋 {len(self.active_configs)} configurations chargées")
+            self.active_configs = active_configs
+            self.monitored_channels = monitored_channels
+            self.configs_by_chat = configs_by_chat
+            self.refresh_message_handler()
+            self.prune_target_pacers()
+            
+            logger.info(f"📋 {len(self.active_configs)} configurations chargées "
+                       f"({len(self.configs_by_chat)} canaux surveillés)")
             
         except Exception as e:
             logger.error(f"❌ Erreur chargement configurations: {e}")
     
+    async def resolve_channel_id(self, username):
+        """Retourne le chat_id (peer id) d'un canal à partir de son username"""
+        if username in self.channel_ids:
+            return self.channel_ids[username]
+        
+        try:
+            entity = await self.client.get_entity(f"@{username}")
+        except Exception as e:
+            logger.error(f"❌ Canal @{username} introuvable: {e}")
+            return None
+        
+        if not isinstance(entity, Channel):
+            logger.warning(f"⚠️ @{username} n'est pas un canal")
+            return None
+        
+        chat_id = get_peer_id(entity)
+        self.channel_ids[username] = chat_id
+        return chat_id
+    
+    @staticmethod
+    def target_key(target_lang):
+        """Canal cible d'une langue (clé du rythme d'envoi)"""
+        return target_lang.get('targetChannel') or target_lang['code']
+    
+    def prune_target_pacers(self):
+        """Oublie le rythme des canaux cibles absents des configurations chargées"""
+        active = {
+            self.target_key(target_lang)
+            for config_data in self.active_configs.values()
+            for target_lang in config_data['target_languages']
+        }
+        for target in set(self.target_pacers) - active:
+            del self.target_pacers[target]
+    
+    def refresh_message_handler(self):
+        """(Ré)enregistre le handler NewMessage restreint aux canaux surveillés"""
+        if not self.client:
+            return
+        
+        if self.message_event is not None:
+            self.client.remove_event_handler(self.process_new_message, self.message_event)
+            self.message_event = None
+        
+        # chats=[] n'est pas "aucun canal" pour Telethon: ne rien enregistrer
+        if not self.configs_by_chat:
+            return
+        
+        self.message_event = events.NewMessage(chats=list(self.configs_by_chat))
+        self.client.add_event_handler(self.process_new_message, self.message_event)
+    
     def setup_event_handlers(self):
         """Configure les handlers pour les événements Telegram"""
         
-        @self.client.on(events.NewMessage())
-        async def handle_new_message(event):
-            await self.process_new_message(event)
-        
+        # Le handler NewMessage est enregistré par refresh_message_handler
         @self.client.on(events.MessageEdited())
         async def handle_edited_message(event):
             # Optionnel: traiter les messages édités
@@ -123,35 +224,21 @@ class TelegramTranslatorBot:
     async def process_new_message(self, event):
         """Traite un nouveau message reçu"""
         try:
-            # Vérifier si le message vient d'un canal surveillé
-            chat = await event.get_chat()
+            # Configurations du canal (le handler est déjà filtré par chats=)
+            configs = self.configs_by_chat.get(event.chat_id)
+            if not configs:
+                return  # Canal non surveillé (rechargement en cours)
             
-            if not isinstance(chat, Channel):
-                return  # Ignorer les messages non-canal
+            logger.info(f"📨 Nouveau message dans @{configs[0]['source_username']} "
+                       f"({len(configs)} configuration(s))")
             
-            username = getattr(chat, 'username', None)
-            if not username or username not in self.monitored_channels:
-                return  # Canal non surveillé
-            
-            logger.info(f"📨 Nouveau message dans @{username}")
-            
-            # Trouver la configuration correspondante
-            config_data = None
-            for config_id, config in self.active_configs.items():
-                if config['source_username'] == username:
-                    config_data = config
-                    break
-            
-            if not config_data:
-                logger.warning(f"⚠️ Aucune configuration trouvée pour @{username}")
-                return
-            
-            # Traiter et traduire le message
-            await self.translate_and_forward_message(event, config_data)
-            
-            # Mettre à jour les statistiques
-            self.stats['messages_processed'] += 1
-            await self.update_config_statistics(config_id)
+            # Traiter et traduire le message pour chaque configuration du canal
+            for config_data in configs:
+                await self.translate_and_forward_message(event, config_data)
+                
+                # Mettre à jour les statistiques
+                self.stats['messages_processed'] += 1
+                await self.update_config_statistics(config_data['config_id'])
             
         except Exception as e:
             logger.error(f"❌ Erreur traitement message: {e}")
@@ -195,89 +282,125 @@ class TelegramTranslatorBot:
                 if message.text:
                     message_data['caption'] = message.text
             
-            # Traduire pour chaque langue cible
-            for target_lang in config_data['target_languages']:
-                if not target_lang.get('isActive', True):
-                    continue
-                
-                try:
-                    await self.send_translated_message(
-                        message_data,
-                        target_lang,
-                        settings
-                    )
-                    
-                    # Délai entre les envois
-                    delay = settings.get('delayBetweenMessages', 2000) / 1000
-                    await asyncio.sleep(delay)
-                    
-                    self.stats['translations_sent'] += 1
-                    
-                except Exception as e:
-                    logger.error(f"❌ Erreur envoi vers {target_lang['code']}: {e}")
-                    self.stats['errors'] += 1
+            # Traduire pour toutes les langues cibles en parallèle
+            targets = [lang for lang in config_data['target_languages'] if lang.get('isActive', True)]
+            await asyncio.gather(*(
+                self.send_to_target(message_data, target_lang, settings)
+                for target_lang in targets
+            ))
         
         except Exception as e:
             logger.error(f"❌ Erreur traduction/transmission: {e}")
             self.stats['errors'] += 1
     
+    async def send_to_target(self, message_data, target_lang, settings):
+        """Envoie vers une langue cible en respectant le rythme de son canal"""
+        try:
+            # Délai entre deux envois vers le même canal cible
+            target = self.target_key(target_lang)
+            pacer = self.target_pacers.get(target)
+            if pacer is None:
+                pacer = self.target_pacers[target] = TargetPacer()
+            await pacer.wait(settings.get('delayBetweenMessages', 2000) / 1000)
+            
+            async with self.send_semaphore:
+                await self.send_translated_message(message_data, target_lang, settings)
+            
+            self.stats['translations_sent'] += 1
+        
+        except Exception as e:
+            logger.error(f"❌ Erreur envoi vers {target_lang.get('code')}: {e}")
+            self.stats['errors'] += 1
+    
+    async def get_http_session(self):
+        """Session aiohttp partagée (pool de connexions réutilisé entre envois)"""
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=BACKEND_TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=MAX_CONCURRENT_SENDS)
+            )
+        return self.http_session
+    
     async def send_translated_message(self, message_data, target_lang, settings):
         """Envoie un message traduit vers un canal cible"""
         try:
             # Appeler l'API backend pour la traduction et l'envoi
-            async with aiohttp.ClientSession() as session:
-                payload = {
-                    'message_data': message_data,
-                    'target_language': target_lang,
-                    'settings': settings
-                }
-                
-                headers = {
-                    'Content-Type': 'application/json',
-                    'Authorization': f'Bearer {self.api_key}' if self.api_key else ''
-                }
+            session = await self.get_http_session()
+            payload = {
+                'message_data': message_data,
+                'target_language': target_lang,
+                'settings': settings
+            }
+            
+            headers = {
+                'Content-Type': 'application/json',
+                'Authorization': f'Bearer {self.api_key}' if self.api_key else ''
+            }
+            
+            async with session.post(
+                f'{self.backend_url}/api/webhook/translate-and-send',
+                json=payload,
+                headers=headers
+            ) as response:
                 
-                async with session.post(
-                    f'{self.backend_url}/api/webhook/translate-and-send',
-                    json=payload,
-                    headers=headers
-                ) as response:
-                    
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"✅ Message envoyé vers {target_lang['code']}")
-                        return result
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Erreur API: {response.status} - {error_text}")
-                        raise Exception(f"Erreur API: {response.status}")
+                if response.status == 200:
+                    result = await response.json()
+                    logger.info(f"✅ Message envoyé vers {target_lang['code']}")
+                    return result
+                else:
+                    error_text = await response.text()
+                    logger.error(f"❌ Erreur API: {response.status} - {error_text}")
+                    raise Exception(f"Erreur API: {response.status}")
         
         except Exception as e:
             logger.error(f"❌ Erreur envoi message traduit: {e}")
             raise
     
     async def update_config_statistics(self, config_id):
-        """Met à jour les statistiques d'une configuration"""
+        """Comptabilise un message traité (écrit par flush_config_statistics)"""
+        counters = self.pending_config_stats.setdefault(
+            config_id, {'totalMessages': 0, 'translatedToday': 0}
+        )
+        counters['totalMessages'] += 1
+        counters['translatedToday'] += 1
+        counters['lastActivity'] = datetime.now()
+    
+    async def flush_config_statistics(self):
+        """Écrit les compteurs accumulés avec Increment en un seul batch"""
+        if not self.pending_config_stats:
+            return
+        
+        pending, self.pending_config_stats = self.pending_config_stats, {}
         try:
-            config_ref = self.db.collection(COLLECTIONS['TRANSLATION_CONFIGS']).document(config_id)
-            config_doc = config_ref.get()
-            if config_doc.exists:
-                stats = config_doc.to_dict().get('statistics', {})
-                stats['totalMessages'] = stats.get('totalMessages', 0) + 1
-                stats['translatedToday'] = stats.get('translatedToday', 0) + 1
-                stats['lastActivity'] = datetime.now()
-                config_ref.update({'statistics': stats})
+            failed = await firebase_service.increment_translation_statistics_async(pending)
         except Exception as e:
-            logger.error(f"❌ Erreur mise à jour statistiques: {e}")
+            logger.error(f"❌ Erreur écriture statistiques: {e}")
+            failed = list(pending)
+        
+        # Remettre en attente les compteurs non écrits
+        for config_id in failed:
+            counters = self.pending_config_stats.setdefault(
+                config_id, {'totalMessages': 0, 'translatedToday': 0}
+            )
+            counters['totalMessages'] += pending[config_id]['totalMessages']
+            counters['translatedToday'] += pending[config_id]['translatedToday']
+            counters.setdefault('lastActivity', pending[config_id]['lastActivity'])
+    
+    async def periodic_stats_flush(self):
+        """Écrit périodiquement les statistiques des configurations"""
+        while True:
+            try:
+                await asyncio.sleep(self.stats_flush_interval)
+                await self.flush_config_statistics()
+            except Exception as e:
+                logger.error(f"❌ Erreur écriture périodique statistiques: {e}")
     
     async def reload_configurations(self):
         """Recharge les configurations depuis la base de données"""
         try:
             logger.info("🔄 Rechargement des configurations...")
             
-            self.active_configs.clear()
-            self.monitored_channels.clear()
-            
+            # Les index sont remplacés d'un bloc: le dispatch reste actif pendant le chargement
             await self.load_active_configurations()
             
             logger.info(f"✅ Configurations rechargées: {len(self.active_configs)} actives")
@@ -314,22 +437,21 @@ class TelegramTranslatorBot:
         """Gère les erreurs d'accès aux canaux"""
         try:
             # Marquer les configurations concernées comme en erreur
-            configs_ref = self.db.collection(COLLECTIONS['TRANSLATION_CONFIGS'])
-            query = configs_ref.where('sourceChannelUsername', '==', username).where('status', '==', 'active')
-            docs = query.stream()
+            configs = await firebase_service.get_translation_configs_async(
+                status='active', source_username=username
+            )
             
-            for doc in docs:
-                stats = doc.to_dict().get('statistics', {})
+            for config in configs:
+                stats = config.get('statistics', {})
                 stats['lastError'] = {
                     'message': f"Accès perdu: {error_message}",
                     'timestamp': datetime.now()
                 }
                 stats['errorCount'] = stats.get('errorCount', 0) + 1
-                doc.reference.update({
+                await firebase_service.update_translation_config_async(config['id'], {
                     'status': 'error',
                     'statistics': stats
-                }
-            )
+                })
             
             logger.warning(f"⚠️ Configurations @{username} marquées en erreur")
             
@@ -372,22 +494,22 @@ class TelegramTranslatorBot:
     async def send_health_to_backend(self, report):
         """Envoie le rapport de santé au backend"""
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    'Content-Type': 'application/json',
-                    'Authorization': f'Bearer {self.api_key}' if self.api_key else ''
-                }
+            session = await self.get_http_session()
+            headers = {
+                'Content-Type': 'application/json',
+                'Authorization': f'Bearer {self.api_key}' if self.api_key else ''
+            }
+            
+            async with session.post(
+                f'{self.backend_url}/api/webhook/health-report',
+                json=report,
+                headers=headers
+            ) as response:
                 
-                async with session.post(
-                    f'{self.backend_url}/api/webhook/health-report',
-                    json=report,
-                    headers=headers
-                ) as response:
-                    
-                    if response.status == 200:
-                        logger.debug("✅ Rapport santé envoyé")
-                    else:
-                        logger.warning(f"⚠️ Erreur envoi rapport: {response.status}")
+                if response.status == 200:
+                    logger.debug("✅ Rapport santé envoyé")
+                else:
+                    logger.warning(f"⚠️ Erreur envoi rapport: {response.status}")
         
         except Exception as e:
             logger.debug(f"Erreur envoi rapport santé: {e}")
@@ -396,6 +518,17 @@ class TelegramTranslatorBot:
         """Arrêt gracieux du bot"""
         logger.info("🛑 Arrêt gracieux en cours...")
         
+        try:
+            await self.flush_config_statistics()
+        except Exception as e:
+            logger.error(f"❌ Erreur écriture statistiques: {e}")
+        
+        try:
+            if self.http_session and not self.http_session.closed:
+                await self.http_session.close()
+        except Exception as e:
+            logger.error(f"❌ Erreur fermeture session HTTP: {e}")
+        
         try:
             if self.client:
                 await self.client.disconnect()
@@ -414,7 +547,8 @@ class TelegramTranslatorBot:
                 asyncio.create_task(self.client.run_until_disconnected()),
                 asyncio.create_task(self.monitor_channel_access()),
                 asyncio.create_task(self.send_health_report()),
-                asyncio.create_task(self.periodic_config_reload())
+                asyncio.create_task(self.periodic_config_reload()),
+                asyncio.create_task(self.periodic_stats_flush())
             ]
             
             logger.info("🚀 Bot démarré et en écoute...")
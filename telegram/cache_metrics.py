@@ -0,0 +1,169 @@
+# cache_metrics.py - Métriques du cache Redis (compteurs et histogrammes par préfixe de clé)
+
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+# Bornes des histogrammes
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+SERIALIZE_BUCKETS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS_BYTES = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Nom exporté -> (type Prometheus, description, bornes des histogrammes)
+METRICS = {
+    'makerhub_cache_requests_total': ('counter', "Lectures du cache par résultat (hit/miss)", None),
+    'makerhub_cache_sets_total': ('counter', "Écritures dans le cache", None),
+    'makerhub_cache_deletes_total': ('counter', "Suppressions de clés", None),
+    'makerhub_cache_errors_total': ('counter', "Erreurs Redis par opération", None),
+    'makerhub_cache_latency_ms': ('histogram', "Latence des commandes Redis (ms)", LATENCY_BUCKETS_MS),
+    'makerhub_cache_serialize_ms': ('histogram', "Temps d'encodage/décodage des valeurs (ms)", SERIALIZE_BUCKETS_MS),
+    'makerhub_cache_value_bytes': ('histogram', "Taille des valeurs lues/écrites (octets)", SIZE_BUCKETS_BYTES),
+}
+
+def key_prefix(key) -> str:
+    """Préfixe d'une clé (premier segment: landing, fs, func, ratelimit...)"""
+    if isinstance(key, bytes):
+        key = key.decode('utf-8', 'replace')
+    return str(key).split(':', 1)[0] if key else '-'
+
+def common_prefix(keys) -> str:
+    """Préfixe commun d'un lot de clés, 'mixed' s'ils diffèrent"""
+    prefixes = {key_prefix(key) for key in keys}
+    if len(prefixes) == 1:
+        return prefixes.pop()
+    return 'mixed' if prefixes else '-'
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (format Prometheus)"""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self) -> list:
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+class CacheMetrics:
+    """Registre thread-safe des compteurs et histogrammes du cache"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._histograms = {}
+    
+    @staticmethod
+    def _labels(labels: dict) -> tuple:
+        return tuple(sorted(labels.items()))
+    
+    def inc(self, name: str, amount: int = 1, **labels):
+        with self._lock:
+            self._counters[(name, self._labels(labels))] += amount
+    
+    def observe(self, name: str, value: float, **labels):
+        key = (name, self._labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(METRICS[name][2])
+            histogram.observe(value)
+    
+    # ==================== ÉVÉNEMENTS ====================
+    
+    def record_get(self, prefix: str, hit: bool, latency_ms: float = None, size: int = 0, decode_ms: float = 0):
+        """Lecture d'une clé (latence absente pour les lectures groupées: MGET, pipeline)"""
+        result = 'hit' if hit else 'miss'
+        self.inc('makerhub_cache_requests_total', prefix=prefix, result=result)
+        if latency_ms is not None:
+            self.observe('makerhub_cache_latency_ms', latency_ms, operation='get', prefix=prefix, result=result)
+        if hit:
+            self.observe('makerhub_cache_value_bytes', size, direction='read', prefix=prefix)
+            self.observe('makerhub_cache_serialize_ms', decode_ms, direction='decode', prefix=prefix)
+    
+    def record_encode(self, prefix: str, size: int, encode_ms: float):
+        self.inc('makerhub_cache_sets_total', prefix=prefix)
+        self.observe('makerhub_cache_value_bytes', size, direction='written', prefix=prefix)
+        self.observe('makerhub_cache_serialize_ms', encode_ms, direction='encode', prefix=prefix)
+    
+    def record_latency(self, operation: str, prefix: str, latency_ms: float):
+        self.observe('makerhub_cache_latency_ms', latency_ms, operation=operation, prefix=prefix, result='-')
+    
+    def record_delete(self, prefix: str, count: int = 1):
+        self.inc('makerhub_cache_deletes_total', count, prefix=prefix)
+    
+    def record_error(self, operation: str, prefix: str = '-'):
+        self.inc('makerhub_cache_errors_total', operation=operation, prefix=prefix)
+    
+    # ==================== EXPORT ====================
+    
+    def snapshot(self) -> dict:
+        """Compteurs et histogrammes (count, sum, moyenne) en JSON"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {'name': name, 'labels': dict(labels), 'count': h.count, 'sum': round(h.sum, 3),
+                 'avg': round(h.sum / h.count, 4) if h.count else 0.0}
+                for (name, labels), h in sorted(self._histograms.items())
+            ]
+        return {'counters': counters, 'histograms': histograms}
+    
+    def render_prometheus(self, extra_lines=()) -> str:
+        """Texte d'exposition Prometheus (version 0.0.4)"""
+        def fmt(labels):
+            if not labels:
+                return ''
+            escaped = (
+                f'{k}="' + str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                for k, v in labels
+            )
+            return '{' + ','.join(escaped) + '}'
+        
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.buckets), h.cumulative(), h.sum, h.count)) for key, h in self._histograms.items()
+            )
+        
+        lines = []
+        emitted = set()
+        for (name, labels), value in counters:
+            if name not in emitted:
+                emitted.add(name)
+                lines.append(f"# HELP {name} {METRICS[name][1]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{fmt(labels)} {value}")
+        for (name, labels), (buckets, cumulative, total, count) in histograms:
+            if name not in emitted:
+                emitted.add(name)
+                lines.append(f"# HELP {name} {METRICS[name][1]}")
+                lines.append(f"# TYPE {name} histogram")
+            for bound, value in zip(list(buckets) + ['+Inf'], cumulative):
+                lines.append(f"{name}_bucket{fmt(labels + (('le', bound),))} {value}")
+            lines.append(f"{name}_sum{fmt(labels)} {total}")
+            lines.append(f"{name}_count{fmt(labels)} {count}")
+        lines.extend(extra_lines)
+        return '\n'.join(lines) + '\n'
+
+# Instance globale des métriques
+cache_metrics = CacheMetrics()
+
+__all__ = [
+    'CacheMetrics',
+    'cache_metrics',
+    'key_prefix',
+    'common_prefix'
+]
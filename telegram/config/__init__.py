@@ -3,6 +3,6 @@
 Configuration module for Telegram services
 """
 
-from .database import db, get_db, initialize_firebase, test_connection, COLLECTIONS
+from .database import db, get_db, get_async_db, lazy_db, server_timestamp, increment, initialize_firebase, test_connection, COLLECTIONS
 
-__all__ = ['db', 'get_db', 'initialize_firebase', 'test_connection', 'COLLECTIONS']
\ No newline at end of file
+__all__ = ['db', 'get_db', 'get_async_db', 'lazy_db', 'server_timestamp', 'increment', 'initialize_firebase', 'test_connection', 'COLLECTIONS']
\ No newline at end of file
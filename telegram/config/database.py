@@ -6,15 +6,33 @@ PRODUCTION READY - 100% FIREBASE
 
 import os
 import logging
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
 from typing import Optional
 
+# firebase_admin et google-cloud-firestore (~350 ms d'import) sont importés au
+# premier client créé: importer ce module ne charge pas le SDK
+
 logger = logging.getLogger(__name__)
 
 # Instance globale de la base de données
 _db = None
+_async_db = None
 _initialized = False
+_client_lock = threading.Lock()
+
+# Un client sync et un client async par processus, chacun avec son canal gRPC.
+# Le canal est créé par google-cloud-firestore (keepalive 30 s, taille des
+# messages illimitée): Client n'expose pas d'option publique pour le configurer.
+
+# 'firestore' (défaut) ou 'memory' (implémentation en mémoire, sans identifiants)
+FIRESTORE_BACKEND = os.getenv('FIRESTORE_BACKEND', 'firestore').lower()
+
+def _init_memory_backend():
+    """Crée les clients en mémoire (sync et async partagent les documents)"""
+    global _db, _async_db
+    from .memory_firestore import create_memory_clients
+    _db, _async_db = create_memory_clients()
+    logger.info("✅ Client Firestore en mémoire créé (FIRESTORE_BACKEND=memory)")
 
 def initialize_firebase():
     """
@@ -23,6 +41,12 @@ def initialize_firebase():
     """
     global _initialized
     
+    if FIRESTORE_BACKEND == 'memory':
+        return True
+    
+    import firebase_admin
+    from firebase_admin import credentials
+    
     if _initialized:
         logger.info("✅ Firebase déjà initialisé")
         return True
@@ -86,26 +110,82 @@ def initialize_firebase():
         logger.error(f"❌ Erreur initialisation Firebase: {e}")
         return False
 
-def get_db() -> Optional[firestore.Client]:
+def get_db() -> Optional['firestore.Client']:
     """
     Retourne l'instance Firestore
     Initialise Firebase si nécessaire
     """
     global _db
     
+    if FIRESTORE_BACKEND == 'memory':
+        if not _db:
+            _init_memory_backend()
+        return _db
+    
     if not _initialized:
         if not initialize_firebase():
             raise Exception("Impossible d'initialiser Firebase")
     
     if not _db:
-        _db = firestore.client()
-        logger.info("✅ Client Firestore créé")
+        with _client_lock:
+            if not _db:
+                from firebase_admin import firestore
+                _db = firestore.client()
+                logger.info("✅ Client Firestore créé")
     
     return _db
 
+def get_async_db() -> Optional['firestore.AsyncClient']:
+    """
+    Retourne l'instance Firestore asynchrone (AsyncClient)
+    Pour les composants asyncio (worker traducteur, bots) - à utiliser
+    depuis une seule boucle d'événements
+    """
+    global _async_db
+    
+    if FIRESTORE_BACKEND == 'memory':
+        if not _async_db:
+            _init_memory_backend()
+        return _async_db
+    
+    if not _initialized:
+        if not initialize_firebase():
+            raise Exception("Impossible d'initialiser Firebase")
+    
+    if not _async_db:
+        with _client_lock:
+            if not _async_db:
+                from firebase_admin import firestore_async
+                _async_db = firestore_async.client()
+                logger.info("✅ Client Firestore async créé")
+    
+    return _async_db
+
 # Alias pour compatibilité
 db = get_db
 
+class LazyClient:
+    """Proxy qui crée le client Firestore au premier accès (démarrage rapide)"""
+    
+    def __init__(self, factory):
+        self._factory = factory
+    
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+# Client utilisable comme variable de module sans initialiser Firebase à l'import
+lazy_db = LazyClient(get_db)
+
+def server_timestamp():
+    """Sentinelle SERVER_TIMESTAMP de Firestore (SDK importé au premier appel)"""
+    from google.cloud.firestore_v1 import transforms
+    return transforms.SERVER_TIMESTAMP
+
+def increment(value):
+    """Transformation Increment(value) de Firestore (SDK importé au premier appel)"""
+    from google.cloud.firestore_v1 import transforms
+    return transforms.Increment(value)
+
 # Collections Telegram officielles
 COLLECTIONS = {
     # Collections principales
@@ -150,7 +230,7 @@ def test_connection() -> bool:
         db = get_db()
         # Test simple d'écriture/lecture
         test_ref = db.collection(COLLECTIONS['HEALTH_CHECK']).document('test')
-        test_ref.set({'test': True, 'timestamp': firestore.SERVER_TIMESTAMP})
+        test_ref.set({'test': True, 'timestamp': server_timestamp()})
         doc = test_ref.get()
         if doc.exists:
             test_ref.delete()  # Nettoyer
@@ -165,6 +245,10 @@ def test_connection() -> bool:
 __all__ = [
     'db',
     'get_db', 
+    'get_async_db',
+    'lazy_db',
+    'server_timestamp',
+    'increment',
     'initialize_firebase',
     'test_connection',
     'COLLECTIONS'
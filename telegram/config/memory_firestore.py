@@ -0,0 +1,778 @@
+# telegram/config/memory_firestore.py
+"""
+Implémentation en mémoire du sous-ensemble de l'API Firestore utilisé par le service
+
+Sélectionnée par get_db() / get_async_db() avec FIRESTORE_BACKEND=memory, pour
+mesurer les performances et exercer le code sans identifiants Firebase.
+
+Supporte: collection/document (sous-collections incluses), where, order_by,
+limit, start_at/start_after/end_at/end_before, get/stream, add/set/update/
+create/delete, batch, get_all, on_snapshot, et les transformations
+SERVER_TIMESTAMP, DELETE_FIELD, Increment, ArrayUnion, ArrayRemove,
+Maximum et Minimum.
+
+Variables d'environnement:
+    FIRESTORE_MEMORY_LATENCY_MS: latence injectée par appel réseau simulé
+    FIRESTORE_MEMORY_JITTER_MS: variation aléatoire ajoutée à la latence
+    FIRESTORE_FIXTURES: fichier JSON chargé à la création du client
+"""
+
+import os
+import copy
+import json
+import time
+import random
+import string
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.api_core.exceptions import AlreadyExists, NotFound, InvalidArgument
+from google.cloud.firestore_v1 import transforms
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_WRITES = 500
+
+_DATETIME_TAG = '__datetime__'
+
+_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def _auto_id():
+    return ''.join(random.choice(_ID_ALPHABET) for _ in range(20))
+
+
+def _now():
+    return DatetimeWithNanoseconds.now(timezone.utc)
+
+
+# ==================== VALEURS ====================
+
+def _type_rank(value):
+    """Rang de type Firestore (null < bool < nombre < date < texte < ...)"""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, MemoryDocumentReference):
+        return 6
+    if isinstance(value, (list, tuple)):
+        return 8
+    return 9
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank == 3 and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    if rank == 6:
+        value = value.path
+    if rank == 8:
+        value = [_sort_key(v) for v in value]
+    if rank == 9:
+        value = json.dumps(value, sort_keys=True, default=str)
+    return (rank, value)
+
+
+def _compare(a, b):
+    ka, kb = _sort_key(a), _sort_key(b)
+    return (ka > kb) - (ka < kb)
+
+
+_MISSING = object()
+
+
+def _get_field(data, field_path):
+    """Valeur d'un champ (chemin pointé), _MISSING si absent"""
+    node = data
+    for part in field_path.split('.'):
+        if not isinstance(node, dict) or part not in node:
+            return _MISSING
+        node = node[part]
+    return node
+
+
+def _apply_value(current, value, now):
+    """Résout une valeur écrite (transformations incluses) contre la valeur actuelle"""
+    if value is transforms.SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, transforms.Increment):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        return base + value.value
+    if isinstance(value, transforms.Maximum):
+        return value.value if not isinstance(current, (int, float)) else max(current, value.value)
+    if isinstance(value, transforms.Minimum):
+        return value.value if not isinstance(current, (int, float)) else min(current, value.value)
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        for item in value.values:
+            if item not in result:
+                result.append(copy.deepcopy(item))
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        if not isinstance(current, list):
+            return []
+        return [item for item in current if item not in value.values]
+    if isinstance(value, dict):
+        return {k: _apply_value(_MISSING, v, now) for k, v in value.items() if v is not transforms.DELETE_FIELD}
+    return copy.deepcopy(value)
+
+
+def _set_path(data, field_path, value, now):
+    """Écrit un champ (chemin pointé), crée les maps intermédiaires"""
+    parts = field_path.split('.')
+    node = data
+    for part in parts[:-1]:
+        if not isinstance(node.get(part), dict):
+            node[part] = {}
+        node = node[part]
+    leaf = parts[-1]
+    if value is transforms.DELETE_FIELD:
+        node.pop(leaf, None)
+    else:
+        node[leaf] = _apply_value(node.get(leaf, _MISSING), value, now)
+
+
+def _merge(target, data, now):
+    """Fusion récursive (set merge=True): les maps imbriquées sont fusionnées champ par champ"""
+    for key, value in data.items():
+        if isinstance(value, dict) and value and isinstance(target.get(key), dict):
+            _merge(target[key], value, now)
+        elif isinstance(value, dict) and value:
+            target[key] = {}
+            _merge(target[key], value, now)
+        elif value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        else:
+            target[key] = _apply_value(target.get(key, _MISSING), value, now)
+
+
+def _decode_fixture(value):
+    if isinstance(value, dict):
+        if len(value) == 1 and _DATETIME_TAG in value:
+            parsed = datetime.fromisoformat(value[_DATETIME_TAG].replace('Z', '+00:00'))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return DatetimeWithNanoseconds.fromtimestamp(parsed.timestamp(), tz=timezone.utc)
+        return {k: _decode_fixture(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_fixture(v) for v in value]
+    return value
+
+
+# ==================== STOCKAGE ====================
+
+class MemoryStore:
+    """Documents indexés par chemin, partagés par les clients sync et async"""
+    
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0):
+        self.documents = {}
+        self.times = {}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rpc_count = 0
+        self.lock = threading.RLock()
+        self._listeners = []
+    
+    def delay(self):
+        """Latence simulée d'un aller-retour, en secondes"""
+        self.rpc_count += 1
+        latency = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        return latency / 1000.0
+    
+    def commit(self, writes):
+        """
+        Applique atomiquement une liste d'écritures (op, path, data, option)
+        
+        Les préconditions (create sur document existant, update sur document
+        absent) sont vérifiées avant toute modification.
+        """
+        if len(writes) > MAX_BATCH_WRITES:
+            raise InvalidArgument(f"maximum {MAX_BATCH_WRITES} writes allowed per request")
+        
+        now = _now()
+        with self.lock:
+            staged = {}
+            
+            def current(path):
+                return staged[path] if path in staged else self.documents.get(path)
+            
+            for op, path, data, option in writes:
+                existing = current(path)
+                if op == 'create':
+                    if existing is not None:
+                        raise AlreadyExists(f"Document already exists: {path}")
+                    doc = {}
+                    _merge(doc, data, now)
+                elif op == 'set':
+                    if option:
+                        doc = copy.deepcopy(existing) if existing is not None else {}
+                        _merge(doc, data, now)
+                    else:
+                        doc = {}
+                        _merge(doc, data, now)
+                elif op == 'update':
+                    if existing is None:
+                        raise NotFound(f"No document to update: {path}")
+                    doc = copy.deepcopy(existing)
+                    for field_path, value in data.items():
+                        _set_path(doc, field_path, value, now)
+                else:
+                    doc = None
+                staged[path] = doc
+            
+            changes = []
+            for path, doc in staged.items():
+                before = self.documents.get(path)
+                if doc is None:
+                    self.documents.pop(path, None)
+                    self.times.pop(path, None)
+                    if before is not None:
+                        changes.append(('REMOVED', path))
+                else:
+                    self.documents[path] = doc
+                    created = self.times.get(path, (now, now))[0]
+                    self.times[path] = (created, now)
+                    changes.append(('ADDED' if before is None else 'MODIFIED', path))
+        
+        self._notify(changes, now)
+        return now
+    
+    # ==================== LISTENERS ====================
+    
+    def add_listener(self, watch):
+        with self.lock:
+            self._listeners.append(watch)
+    
+    def remove_listener(self, watch):
+        with self.lock:
+            if watch in self._listeners:
+                self._listeners.remove(watch)
+    
+    def _notify(self, changes, read_time):
+        if not changes or not self._listeners:
+            return
+        for watch in list(self._listeners):
+            watch.dispatch(changes, read_time)
+
+
+class MemoryDocumentSnapshot:
+    """Équivalent de DocumentSnapshot"""
+    
+    def __init__(self, reference, data, create_time=None, update_time=None, read_time=None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+    
+    @property
+    def id(self):
+        return self.reference.id
+    
+    @property
+    def exists(self):
+        return self._data is not None
+    
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+    
+    def get(self, field_path):
+        if self._data is None:
+            return None
+        value = _get_field(self._data, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class _Change:
+    """Équivalent de DocumentChange (type.name, document)"""
+    
+    class _Type:
+        def __init__(self, name):
+            self.name = name
+    
+    def __init__(self, kind, document):
+        self.type = self._Type(kind)
+        self.document = document
+
+
+class MemoryWatch:
+    """Listener on_snapshot d'une collection ou d'un document"""
+    
+    def __init__(self, target, callback):
+        self._target = target
+        self._callback = callback
+        self.is_active = True
+    
+    @property
+    def _watches_document(self):
+        return isinstance(self._target, MemoryDocumentReference)
+    
+    @property
+    def _path(self):
+        return self._target.path if self._watches_document else self._target._path
+    
+    def _matches(self, path):
+        if self._watches_document:
+            return path == self._path
+        prefix = self._path + '/'
+        return path.startswith(prefix) and '/' not in path[len(prefix):]
+    
+    def _documents(self):
+        """Snapshots courants de la cible (comme Firestore: [] pour un document absent)"""
+        if self._watches_document:
+            snapshot = self._target._snapshot()
+            return [snapshot] if snapshot.exists else []
+        return list(self._target._run_query())
+    
+    def start(self):
+        store = self._target._client._store
+        store.add_listener(self)
+        docs = self._documents()
+        self._callback(docs, [_Change('ADDED', doc) for doc in docs], _now())
+    
+    def dispatch(self, changes, read_time):
+        relevant = [(kind, path) for kind, path in changes if self._matches(path)]
+        if not relevant or not self.is_active:
+            return
+        client = self._target._client
+        doc_changes = []
+        for kind, path in relevant:
+            doc_changes.append(_Change(kind, client.document(path)._snapshot()))
+        try:
+            self._callback(self._documents(), doc_changes, read_time)
+        except Exception as e:
+            logger.error(f"Memory listener error on {self._path}: {e}")
+    
+    def unsubscribe(self):
+        self.is_active = False
+        self._target._client._store.remove_listener(self)
+
+
+# ==================== RÉFÉRENCES ====================
+
+class MemoryDocumentReference:
+    """Équivalent de DocumentReference"""
+    
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+    
+    @property
+    def id(self):
+        return self.path.rsplit('/', 1)[-1]
+    
+    @property
+    def parent(self):
+        return MemoryCollectionReference(self._client, self.path.rsplit('/', 1)[0])
+    
+    def collection(self, collection_id):
+        return MemoryCollectionReference(self._client, f"{self.path}/{collection_id}")
+    
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+    
+    def __hash__(self):
+        return hash(self.path)
+    
+    def __repr__(self):
+        return f"<MemoryDocumentReference {self.path}>"
+    
+    def __copy__(self):
+        return MemoryDocumentReference(self._client, self.path)
+    
+    def __deepcopy__(self, memo):
+        # Comme DocumentReference: la copie partage le client
+        return self.__copy__()
+    
+    def _snapshot(self, read_time=None):
+        store = self._client._store
+        with store.lock:
+            data = copy.deepcopy(store.documents.get(self.path))
+            create_time, update_time = store.times.get(self.path, (None, None))
+        return MemoryDocumentSnapshot(self, data, create_time, update_time, read_time or _now())
+    
+    def get(self, field_paths=None, transaction=None, **kwargs):
+        return self._client._rpc(self._snapshot)
+    
+    def _write(self, op, data=None, option=None):
+        return self._client._rpc(lambda: _WriteResult(self._client._store.commit([(op, self.path, data, option)])))
+    
+    def set(self, document_data, merge=False):
+        return self._write('set', document_data, merge)
+    
+    def create(self, document_data):
+        return self._write('create', document_data)
+    
+    def update(self, field_updates, option=None):
+        return self._write('update', field_updates)
+    
+    def delete(self, option=None):
+        return self._write('delete')
+    
+    def on_snapshot(self, callback):
+        watch = MemoryWatch(self, callback)
+        watch.start()
+        return watch
+
+
+class _WriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+
+class MemoryQuery:
+    """Équivalent de Query (filtres, tri, curseurs, limite)"""
+    
+    ASCENDING = 'ASCENDING'
+    DESCENDING = 'DESCENDING'
+    
+    def __init__(self, client, path, filters=None, orders=None, limit=None,
+                 start=None, end=None):
+        self._client = client
+        self._path = path
+        self._filters = list(filters or [])
+        self._orders = list(orders or [])
+        self._limit = limit
+        self._start = start
+        self._end = end
+    
+    def _copy(self, **changes):
+        params = dict(filters=self._filters, orders=self._orders, limit=self._limit,
+                      start=self._start, end=self._end)
+        params.update(changes)
+        return MemoryQuery(self._client, self._path, **params)
+    
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+    
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + [(field_path, direction)])
+    
+    def limit(self, count):
+        return self._copy(limit=count)
+    
+    def start_at(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, True))
+    
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(start=(document_fields_or_snapshot, False))
+    
+    def end_at(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, True))
+    
+    def end_before(self, document_fields_or_snapshot):
+        return self._copy(end=(document_fields_or_snapshot, False))
+    
+    # ---------- exécution ----------
+    
+    def _effective_orders(self):
+        orders = list(self._orders)
+        if not any(field == '__name__' for field, _ in orders):
+            direction = orders[-1][1] if orders else self.ASCENDING
+            orders.append(('__name__', direction))
+        return orders
+    
+    def _value(self, path, data, field_path):
+        if field_path == '__name__':
+            return MemoryDocumentReference(self._client, path)
+        return _get_field(data, field_path)
+    
+    @staticmethod
+    def _matches(value, op, expected):
+        if value is _MISSING:
+            return False
+        if op == '==':
+            return _compare(value, expected) == 0
+        if op == '!=':
+            return value is not None and _compare(value, expected) != 0
+        if op == 'in':
+            return any(_compare(value, item) == 0 for item in expected)
+        if op == 'not-in':
+            return value is not None and all(_compare(value, item) != 0 for item in expected)
+        if op == 'array_contains':
+            op = 'array-contains'
+        if op == 'array-contains':
+            return isinstance(value, list) and any(_compare(v, expected) == 0 for v in value)
+        if op == 'array-contains-any':
+            return isinstance(value, list) and any(_compare(v, e) == 0 for v in value for e in expected)
+        if _type_rank(value) != _type_rank(expected):
+            return False
+        result = _compare(value, expected)
+        return {'<': result < 0, '<=': result <= 0, '>': result > 0, '>=': result >= 0}[op]
+    
+    def _cursor_values(self, cursor, orders):
+        if isinstance(cursor, MemoryDocumentSnapshot):
+            data = cursor.to_dict() or {}
+            return [self._value(cursor.reference.path, data, field) for field, _ in orders]
+        if isinstance(cursor, dict):
+            values = []
+            for field, _ in orders[:len(cursor)]:
+                if field not in cursor and _get_field(cursor, field) is _MISSING:
+                    raise ValueError(f"The cursor is missing the order by field {field}")
+                values.append(cursor[field] if field in cursor else _get_field(cursor, field))
+        else:
+            values = list(cursor)
+        normalized = []
+        for (field, _), value in zip(orders, values):
+            if field == '__name__' and isinstance(value, str):
+                path = value if '/' in value else f"{self._path}/{value}"
+                value = MemoryDocumentReference(self._client, path)
+            normalized.append(value)
+        return normalized
+    
+    def _position(self, row_values, cursor_values, orders):
+        """Compare une ligne au curseur selon les sens de tri (-1, 0, 1)"""
+        for value, cursor_value, (_, direction) in zip(row_values, cursor_values, orders):
+            result = _compare(value, cursor_value)
+            if direction == self.DESCENDING:
+                result = -result
+            if result:
+                return result
+        return 0
+    
+    def _apply_cursor(self, rows, orders, cursor, inclusive, before):
+        """Garde les lignes après (start) ou avant (end) le curseur"""
+        cursor_values = self._cursor_values(cursor, orders)
+        n = len(cursor_values)
+        kept = []
+        for path, data in rows:
+            row_values = [self._value(path, data, field) for field, _ in orders[:n]]
+            position = self._position(row_values, cursor_values, orders)
+            if before:
+                position = -position
+            if position > 0 or (inclusive and position == 0):
+                kept.append((path, data))
+        return kept
+    
+    def _run_query(self):
+        store = self._client._store
+        prefix = self._path + '/'
+        with store.lock:
+            rows = [
+                (path, data) for path, data in store.documents.items()
+                if path.startswith(prefix) and '/' not in path[len(prefix):]
+            ]
+            rows = [(path, copy.deepcopy(data)) for path, data in rows]
+            times = {path: store.times.get(path, (None, None)) for path, _ in rows}
+        
+        for field_path, op, expected in self._filters:
+            rows = [(p, d) for p, d in rows if self._matches(_get_field(d, field_path), op, expected)]
+        
+        orders = self._effective_orders()
+        rows = [
+            (p, d) for p, d in rows
+            if all(self._value(p, d, field) is not _MISSING for field, _ in orders)
+        ]
+        for field, direction in reversed(orders):
+            rows.sort(key=lambda row: _sort_key(self._value(row[0], row[1], field)),
+                      reverse=direction == self.DESCENDING)
+        
+        if self._start is not None:
+            rows = self._apply_cursor(rows, orders, *self._start, before=False)
+        if self._end is not None:
+            rows = self._apply_cursor(rows, orders, *self._end, before=True)
+        
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        
+        read_time = _now()
+        for path, data in rows:
+            create_time, update_time = times[path]
+            yield MemoryDocumentSnapshot(
+                MemoryDocumentReference(self._client, path), data, create_time, update_time, read_time
+            )
+    
+    def stream(self, transaction=None, **kwargs):
+        return self._client._stream(lambda: list(self._run_query()))
+    
+    def get(self, transaction=None, **kwargs):
+        return self._client._rpc(lambda: list(self._run_query()))
+
+
+class MemoryCollectionReference(MemoryQuery):
+    """Équivalent de CollectionReference"""
+    
+    def __init__(self, client, path):
+        super().__init__(client, path)
+    
+    @property
+    def id(self):
+        return self._path.rsplit('/', 1)[-1]
+    
+    def document(self, document_id=None):
+        return MemoryDocumentReference(self._client, f"{self._path}/{document_id or _auto_id()}")
+    
+    def add(self, document_data, document_id=None):
+        doc_ref = self.document(document_id)
+        
+        def add():
+            update_time = self._client._store.commit([('create', doc_ref.path, document_data, None)])
+            return update_time, doc_ref
+        return self._client._rpc(add)
+    
+    def list_documents(self, page_size=None):
+        store = self._client._store
+        prefix = self._path + '/'
+        with store.lock:
+            paths = [p for p in store.documents if p.startswith(prefix) and '/' not in p[len(prefix):]]
+        return [MemoryDocumentReference(self._client, p) for p in sorted(paths)]
+    
+    def on_snapshot(self, callback):
+        watch = MemoryWatch(self, callback)
+        watch.start()
+        return watch
+
+
+class MemoryWriteBatch:
+    """Équivalent de WriteBatch (commit atomique, 500 écritures max)"""
+    
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+    
+    def __len__(self):
+        return len(self._writes)
+    
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference.path, document_data, merge))
+        return self
+    
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference.path, document_data, None))
+        return self
+    
+    def update(self, reference, field_updates, option=None):
+        self._writes.append(('update', reference.path, field_updates, None))
+        return self
+    
+    def delete(self, reference, option=None):
+        self._writes.append(('delete', reference.path, None, None))
+        return self
+    
+    def commit(self, **kwargs):
+        writes, self._writes = self._writes, []
+        
+        def commit():
+            update_time = self._client._store.commit(writes)
+            return [_WriteResult(update_time) for _ in writes]
+        return self._client._rpc(commit)
+
+
+# ==================== CLIENTS ====================
+
+class MemoryClient:
+    """Client Firestore en mémoire (API synchrone)"""
+    
+    def __init__(self, store=None, latency_ms=None, jitter_ms=None):
+        if store is None:
+            store = MemoryStore(
+                latency_ms=float(os.getenv('FIRESTORE_MEMORY_LATENCY_MS', 0)) if latency_ms is None else latency_ms,
+                jitter_ms=float(os.getenv('FIRESTORE_MEMORY_JITTER_MS', 0)) if jitter_ms is None else jitter_ms
+            )
+        self._store = store
+    
+    @property
+    def store(self):
+        return self._store
+    
+    def _rpc(self, operation):
+        delay = self._store.delay()
+        if delay:
+            time.sleep(delay)
+        return operation()
+    
+    def _stream(self, operation):
+        yield from self._rpc(operation)
+    
+    def collection(self, *collection_path):
+        return MemoryCollectionReference(self, '/'.join(collection_path).strip('/'))
+    
+    def document(self, *document_path):
+        return MemoryDocumentReference(self, '/'.join(document_path).strip('/'))
+    
+    def batch(self):
+        return MemoryWriteBatch(self)
+    
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        references = list(references)
+        return self._stream(lambda: [ref._snapshot() for ref in references])
+    
+    def collections(self):
+        with self._store.lock:
+            roots = sorted({path.split('/', 1)[0] for path in self._store.documents})
+        return [self.collection(root) for root in roots]
+    
+    def close(self):
+        pass
+    
+    # ==================== FIXTURES ====================
+    
+    def load_fixtures(self, fixtures):
+        """
+        Charge des documents depuis un dict ou un fichier JSON
+        
+        Format: {"collection": {"docId": {...}}} ou {"collection/docId/sub": {"id": {...}}}.
+        Les dates s'écrivent {"__datetime__": "2024-01-01T00:00:00Z"}.
+        
+        Returns:
+            Nombre de documents chargés
+        """
+        if isinstance(fixtures, str):
+            with open(fixtures, encoding='utf-8') as f:
+                fixtures = json.load(f)
+        
+        writes = []
+        for collection_path, documents in fixtures.items():
+            for doc_id, data in documents.items():
+                writes.append(('set', f"{collection_path.strip('/')}/{doc_id}", _decode_fixture(data), False))
+        
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            self._store.commit(writes[start:start + MAX_BATCH_WRITES])
+        logger.info(f"✅ Memory Firestore: {len(writes)} documents chargés")
+        return len(writes)
+    
+    def clear(self):
+        """Vide tous les documents"""
+        with self._store.lock:
+            self._store.documents.clear()
+            self._store.times.clear()
+
+
+class AsyncMemoryClient(MemoryClient):
+    """Client en mémoire avec l'API d'AsyncClient (appels awaitable, stream async)"""
+    
+    def _rpc(self, operation):
+        async def run():
+            delay = self._store.delay()
+            if delay:
+                await asyncio.sleep(delay)
+            return operation()
+        return run()
+    
+    async def _stream(self, operation):
+        for item in await self._rpc(operation):
+            yield item
+
+
+def create_memory_clients():
+    """Crée un client sync et un client async partageant le même stockage"""
+    client = MemoryClient()
+    fixtures = os.getenv('FIRESTORE_FIXTURES')
+    if fixtures:
+        client.load_fixtures(fixtures)
+    return client, AsyncMemoryClient(store=client.store)
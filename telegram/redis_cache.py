@@ -2,22 +2,706 @@
 
 import redis
 import json
+import math
 import os
+import time
 import logging
+import threading
+import uuid
+import zlib
+import fnmatch
+import hashlib
+import inspect
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import wraps
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Any, Optional, Callable
 import pickle
 
+from cache_metrics import cache_metrics, key_prefix, common_prefix
+
+# Dépendances optionnelles du format binaire (repli: json standard, zlib)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Configuration du logging
 logger = logging.getLogger(__name__)
 
+# Pool de connexions et disjoncteur
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 2))
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 2))
+REDIS_HEALTH_INTERVAL = float(os.getenv('REDIS_HEALTH_INTERVAL', 5))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('REDIS_BREAKER_FAILURES', 5))
+BREAKER_FAILURE_WINDOW = float(os.getenv('REDIS_BREAKER_WINDOW', 10))
+BREAKER_HALF_OPEN_WINDOW = float(os.getenv('REDIS_BREAKER_HALF_OPEN', 5))
+
+# Erreurs de connexion comptées par le disjoncteur (les autres sont seulement loguées)
+_CONNECTION_ERRORS = (redis.ConnectionError, redis.TimeoutError, OSError)
+
+# Mode dégradé: cache local (TTL plafonné, non partagé entre processus) quand Redis est indisponible
+FALLBACK_ENABLED = os.getenv('REDIS_FALLBACK_ENABLED', 'true').lower() != 'false'
+FALLBACK_MAXSIZE = int(os.getenv('REDIS_FALLBACK_MAXSIZE', 4096))
+FALLBACK_MAX_TTL = int(os.getenv('REDIS_FALLBACK_MAX_TTL', 60))
+FALLBACK_MAX_PENDING = int(os.getenv('REDIS_FALLBACK_MAX_PENDING', 10000))
+
+# Invalidation: taille des pages SCAN/SSCAN et des lots UNLINK
+SCAN_COUNT = int(os.getenv('REDIS_SCAN_COUNT', 500))
+UNLINK_BATCH_SIZE = int(os.getenv('REDIS_UNLINK_BATCH_SIZE', 500))
+
+# Ensembles de tags: tag:<nom> -> clés enregistrées sous ce tag
+TAG_KEY_PREFIX = 'tag:'
+TAG_SET_TTL = int(os.getenv('REDIS_TAG_SET_TTL', 86400))
+
+def tag_key(tag: str) -> str:
+    """Clé Redis de l'ensemble associé à un tag (ex: page:abc -> tag:page:abc)"""
+    return f"{TAG_KEY_PREFIX}{tag}"
+
+# Baux de calcul (single-flight inter-processus): lease:<clé> -> jeton du détenteur
+LEASE_KEY_PREFIX = 'lease:'
+LEASE_POLL_INTERVAL = 0.05
+
+# Supprime le bail seulement s'il appartient encore à l'appelant
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+def queue_tags(pipe, key: str, tags: Optional[list], ttl: int = None) -> int:
+    """
+    Ajoute à un pipeline l'enregistrement d'une clé dans ses ensembles de tags
+    
+    Returns:
+        Nombre de commandes ajoutées
+    """
+    tags = tags or ()
+    for tag in tags:
+        name = tag_key(tag)
+        pipe.sadd(name, key)
+        # L'ensemble vit au moins aussi longtemps que la clé qui vient d'y entrer
+        pipe.expire(name, max(ttl or 0, TAG_SET_TTL))
+    return 2 * len(tags)
+
+def lease_key(key: str) -> str:
+    """Clé Redis du bail de calcul d'une clé de cache"""
+    return f"{LEASE_KEY_PREFIX}{key}"
+
+# ==================== FORMAT DES VALEURS ====================
+# Octet d'en-tête: type du corps (bits bas) | compression (bits hauts).
+# Aucune valeur legacy ne commence par ces octets (JSON: { [ " chiffre - t f n,
+# pickle: 0x80), ce qui permet de relire les valeurs écrites avant ce format.
+
+CODEC_STR = 0x01
+CODEC_BYTES = 0x02
+CODEC_JSON = 0x03
+CODEC_MSGPACK = 0x04
+CODEC_PICKLE = 0x05
+CODEC_ZLIB = 0x10
+CODEC_ZSTD = 0x40
+
+_CODEC_TYPE_MASK = 0x0F
+_CODEC_TYPES = (CODEC_STR, CODEC_BYTES, CODEC_JSON, CODEC_MSGPACK, CODEC_PICKLE)
+_CODEC_COMPRESSIONS = {0: None, CODEC_ZLIB: 'zlib', CODEC_ZSTD: 'zstd'}
+
+def _decode_legacy(value: bytes) -> Any:
+    """Valeur écrite avant l'en-tête: JSON, sinon pickle, sinon texte brut"""
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError, UnicodeDecodeError):
+        try:
+            return pickle.loads(value)
+        except Exception:
+            return value.decode('utf-8') if isinstance(value, bytes) else value
+
+# orjson sérialiserait dates et dataclasses en chaînes/dicts: on les laisse à pickle
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+) if orjson is not None else 0
+
+class ValueCodec:
+    """Encodage auto-descriptif des valeurs du cache (en-tête d'un octet + corps)"""
+    
+    def __init__(self, serializer: str = None, compression: str = None,
+                 threshold: int = None, level: int = None):
+        """
+        Args:
+            serializer: 'json' ou 'msgpack' pour dicts/listes/nombres
+                (défaut: REDIS_CODEC, msgpack retombe sur json s'il n'est pas installé)
+            compression: 'zstd', 'zlib' ou 'none'
+                (défaut: REDIS_COMPRESSION, sinon zstd si installé, sinon zlib)
+            threshold: Taille minimale (octets) du corps pour le compresser
+            level: Niveau de compression (défaut: 3 pour zstd, 6 pour zlib)
+        """
+        serializer = serializer or os.getenv('REDIS_CODEC', 'json')
+        if serializer == 'msgpack' and msgpack is None:
+            logger.warning("⚠️ msgpack non installé, sérialisation JSON")
+            serializer = 'json'
+        self.serializer = serializer
+        
+        compression = compression or os.getenv('REDIS_COMPRESSION') or ('zstd' if zstandard else 'zlib')
+        if compression == 'zstd' and zstandard is None:
+            logger.warning("⚠️ zstandard non installé, compression zlib")
+            compression = 'zlib'
+        self.compression = None if compression == 'none' else compression
+        
+        self.threshold = threshold if threshold is not None else int(os.getenv('REDIS_COMPRESS_THRESHOLD', 1024))
+        self.level = level if level is not None else (3 if self.compression == 'zstd' else 6)
+        # Les objets zstandard ne sont pas partagés entre threads
+        self._local = threading.local()
+    
+    def _zstd(self, attr: str, factory: Callable):
+        obj = getattr(self._local, attr, None)
+        if obj is None:
+            obj = factory()
+            setattr(self._local, attr, obj)
+        return obj
+    
+    def _serialize(self, value: Any) -> tuple:
+        """Retourne (type, corps)"""
+        if isinstance(value, str):
+            return CODEC_STR, value.encode('utf-8')
+        if isinstance(value, (bytes, bytearray)):
+            return CODEC_BYTES, bytes(value)
+        if isinstance(value, (dict, list, tuple, int, float, bool)) or value is None:
+            try:
+                if self.serializer == 'msgpack':
+                    return CODEC_MSGPACK, msgpack.packb(value, use_bin_type=True)
+                if orjson is not None:
+                    return CODEC_JSON, orjson.dumps(value, option=_ORJSON_OPTIONS)
+                return CODEC_JSON, json.dumps(value, separators=(',', ':')).encode('utf-8')
+            except (TypeError, ValueError, OverflowError):
+                # Contenu non sérialisable (dates, objets): pickle
+                pass
+        return CODEC_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def encode(self, value: Any) -> bytes:
+        """Encode une valeur: en-tête + corps, compressé au-delà du seuil"""
+        kind, body = self._serialize(value)
+        if self.compression and len(body) >= self.threshold:
+            if self.compression == 'zstd':
+                compressed = self._zstd('compressor', lambda: zstandard.ZstdCompressor(level=self.level)).compress(body)
+                flag = CODEC_ZSTD
+            else:
+                compressed = zlib.compress(body, self.level)
+                flag = CODEC_ZLIB
+            # Données incompressibles: garder le corps brut
+            if len(compressed) < len(body):
+                return bytes((kind | flag,)) + compressed
+        return bytes((kind,)) + body
+    
+    def _decode_tagged(self, kind: int, flag: int, data: bytes) -> Any:
+        body = memoryview(data)[1:]
+        if flag == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("valeur compressée zstd, zstandard non installé")
+            body = self._zstd('decompressor', zstandard.ZstdDecompressor).decompress(body)
+        elif flag == CODEC_ZLIB:
+            body = zlib.decompress(body)
+        
+        if kind == CODEC_STR:
+            return bytes(body).decode('utf-8')
+        if kind == CODEC_BYTES:
+            return bytes(body)
+        if kind == CODEC_JSON:
+            return orjson.loads(body) if orjson is not None else json.loads(bytes(body))
+        if kind == CODEC_MSGPACK:
+            if msgpack is None:
+                raise RuntimeError("valeur msgpack, msgpack non installé")
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        return pickle.loads(body)
+    
+    def decode(self, data: bytes) -> Any:
+        """Décode une valeur encodée par encode(), ou une valeur legacy sans en-tête"""
+        if not isinstance(data, (bytes, bytearray)) or not data:
+            return data
+        
+        header = data[0]
+        kind = header & _CODEC_TYPE_MASK
+        flag = header & ~_CODEC_TYPE_MASK
+        if kind in _CODEC_TYPES and flag in _CODEC_COMPRESSIONS:
+            try:
+                return self._decode_tagged(kind, flag, data)
+            except Exception as e:
+                # Texte brut legacy dont le premier octet ressemble à un en-tête (ex: 'B')
+                logger.debug(f"Valeur non décodable avec l'en-tête {header:#04x}: {e}")
+        return _decode_legacy(data)
+
+class LRUCache:
+    """Cache en mémoire borné (LRU) avec expiration par entrée, thread-safe"""
+    
+    def __init__(self, maxsize: int = 1024, ttl: int = 60):
+        """
+        Initialise le cache local
+        
+        Args:
+            maxsize: Nombre maximum d'entrées conservées
+            ttl: TTL par défaut en secondes
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Récupère une valeur non expirée
+        
+        Args:
+            key: Clé à récupérer
+        
+        Returns:
+            Valeur ou None si absente/expirée
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl: int = None):
+        """
+        Stocke une valeur, en évinçant la moins récemment utilisée si plein
+        
+        Args:
+            key: Clé de stockage
+            value: Valeur à stocker
+            ttl: TTL en secondes (défaut: TTL du cache)
+        """
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: str):
+        """Supprime une clé du cache local"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """Vide le cache local"""
+        with self._lock:
+            self._data.clear()
+    
+    def incr(self, key: str, amount: int = 1, ttl: int = None) -> int:
+        """Incrémente un entier (créé à 0), en conservant l'expiration existante"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                value, expires_at = 0, now + (ttl if ttl is not None else self.ttl)
+            else:
+                value, expires_at = entry
+            value = int(value) + amount
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return value
+    
+    def expire(self, key: str, ttl: int) -> bool:
+        """Redéfinit l'expiration d'une entrée présente"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return False
+            self._data[key] = (entry[0], time.monotonic() + ttl)
+            return True
+    
+    def items(self) -> list:
+        """Entrées non expirées: [(clé, valeur, TTL restant en secondes)]"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value, expires_at - now) for key, (value, expires_at) in self._data.items()
+                    if expires_at > now]
+    
+    def __len__(self):
+        return len(self._data)
+
+class LocalFallback:
+    """
+    Cache local du mode dégradé (Redis indisponible)
+    
+    Sert les lectures/écritures à la place de Redis et mémorise ce qu'il faudra
+    rejouer au retour de Redis: invalidations (clés, patterns, tags) puis
+    écritures locales encore valides. Les TTL sont plafonnés à FALLBACK_MAX_TTL:
+    ce cache n'est pas invalidé par les autres processus.
+    """
+    
+    def __init__(self, maxsize: int = FALLBACK_MAXSIZE, max_ttl: int = FALLBACK_MAX_TTL):
+        self.max_ttl = max_ttl
+        self.cache = LRUCache(maxsize=maxsize, ttl=max_ttl)
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self._writes = {}
+        self._deletes = set()
+        self._patterns = set()
+        self._tags = set()
+        self._tag_members = {}
+    
+    def _ttl(self, ttl: int = None) -> int:
+        return min(ttl, self.max_ttl) if ttl else self.max_ttl
+    
+    def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key)
+    
+    def set(self, key: str, value: Any, ttl: int = None, tags: Optional[list] = None):
+        self.cache.set(key, value, self._ttl(ttl))
+        with self._lock:
+            if len(self._writes) < FALLBACK_MAX_PENDING or key in self._writes:
+                self._writes[key] = (tags, ttl)
+            self._deletes.discard(key)
+            for tag in tags or ():
+                self._tag_members.setdefault(tag, set()).add(key)
+    
+    def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            deleted += self.cache.get(key) is not None
+            self.cache.delete(key)
+        with self._lock:
+            for key in keys:
+                self._writes.pop(key, None)
+                if len(self._deletes) < FALLBACK_MAX_PENDING:
+                    self._deletes.add(key)
+        if len(self._deletes) >= FALLBACK_MAX_PENDING:
+            logger.warning(f"⚠️ Cache local: plus de {FALLBACK_MAX_PENDING} suppressions en attente de Redis")
+        return deleted
+    
+    def _local_keys(self, keys) -> list:
+        return [key for key in keys if self.cache.get(key) is not None]
+    
+    def invalidate_pattern(self, pattern: str) -> int:
+        keys = [key for key, _, _ in self.cache.items() if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            self.cache.delete(key)
+        with self._lock:
+            self._patterns.add(pattern)
+            for key in [key for key in self._writes if fnmatch.fnmatchcase(key, pattern)]:
+                del self._writes[key]
+        return len(keys)
+    
+    def invalidate_tags(self, *tags: str) -> int:
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tag_members.pop(tag, set())
+                self._tags.add(tag)
+            for key in keys:
+                self._writes.pop(key, None)
+        deleted = len(self._local_keys(keys))
+        for key in keys:
+            self.cache.delete(key)
+        return deleted
+    
+    def incr(self, key: str, amount: int = 1) -> int:
+        return self.cache.incr(key, amount, self.max_ttl)
+    
+    def expire(self, key: str, seconds: int) -> bool:
+        return self.cache.expire(key, self._ttl(seconds))
+    
+    def pending(self) -> dict:
+        with self._lock:
+            return {
+                'writes': len(self._writes),
+                'deletes': len(self._deletes),
+                'patterns': len(self._patterns),
+                'tags': len(self._tags),
+            }
+    
+    def drain(self) -> dict:
+        """Retourne les opérations à rejouer sur Redis et vide le cache local"""
+        entries = {key: (value, ttl) for key, value, ttl in self.cache.items()}
+        with self._lock:
+            writes = [
+                (key, entries[key][0], entries[key][1], tags)
+                for key, (tags, _) in self._writes.items() if key in entries
+            ]
+            pending = {
+                'writes': writes,
+                'deletes': list(self._deletes),
+                'patterns': list(self._patterns),
+                'tags': list(self._tags),
+            }
+            self._reset()
+        self.cache.clear()
+        return pending
+
+class LocalRateLimiter:
+    """
+    Limiteur local du mode dégradé: un seau de jetons par identifiant
+    (capacité limit, rechargé de limit jetons par window). Limite par processus.
+    """
+    
+    def __init__(self, maxsize: int = FALLBACK_MAXSIZE):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def check(self, identifier: str, limit: int, window: int) -> tuple:
+        """Même retour que check_rate_limit: (allowed, remaining, reset_at)"""
+        now = time.monotonic()
+        rate = limit / window if window else float(limit)
+        with self._lock:
+            tokens, updated_at = self._buckets.get(identifier, (float(limit), now))
+            tokens = min(float(limit), tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[identifier] = (tokens, now)
+            self._buckets.move_to_end(identifier)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        wait = (1 - tokens) / rate if not allowed else (limit - tokens) / rate
+        return (allowed, int(tokens), datetime.now() + timedelta(seconds=wait))
+
+class KeyLocks:
+    """Verrous locaux par clé, supprimés quand plus aucun thread ne les attend"""
+    
+    def __init__(self):
+        self._locks = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def hold(self, key: str):
+        """Context manager: exclusion mutuelle des threads du processus sur une clé"""
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._locks.pop(key, None)
+
+class CircuitBreaker:
+    """
+    Disjoncteur devant Redis: closed -> open -> half_open -> closed
+    
+    - closed: les appels passent; failure_threshold erreurs de connexion en
+      moins de failure_window secondes ouvrent le circuit
+    - open: les appels sont ignorés immédiatement, sans attendre de timeout;
+      seule la sonde de santé (probe) teste Redis
+    - half_open: une sonde a réussi, le trafic reprend; une erreur rouvre le
+      circuit, half_open_window secondes sans erreur le referment
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 failure_window: float = BREAKER_FAILURE_WINDOW,
+                 half_open_window: float = BREAKER_HALF_OPEN_WINDOW):
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.half_open_window = half_open_window
+        self.state = self.CLOSED
+        self.changed_at = time.monotonic()
+        self.last_error = None
+        self.transitions = {}
+        self._failures = []
+        self._lock = threading.Lock()
+    
+    def _transition(self, state: str, reason: str = None):
+        """Change d'état (verrou tenu) et compte la transition"""
+        if state == self.state:
+            return
+        name = f"{self.state}->{state}"
+        self.transitions[name] = self.transitions.get(name, 0) + 1
+        self.state = state
+        self.changed_at = time.monotonic()
+        self._failures = []
+        if state == self.OPEN:
+            logger.warning(f"⚡ Redis circuit ouvert: {reason}")
+        else:
+            logger.info(f"🔌 Redis circuit {state}")
+    
+    def allow(self) -> bool:
+        """True si les appels Redis doivent être tentés"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+        if time.monotonic() - self.changed_at >= self.half_open_window:
+            with self._lock:
+                if self.state == self.HALF_OPEN:
+                    self._transition(self.CLOSED)
+        return True
+    
+    def record_failure(self, error: Exception):
+        """Compte une erreur de connexion (ouvre le circuit au-delà du seuil)"""
+        now = time.monotonic()
+        with self._lock:
+            self.last_error = str(error)
+            if self.state == self.HALF_OPEN:
+                self._transition(self.OPEN, error)
+                return
+            if self.state == self.OPEN:
+                return
+            self._failures = [t for t in self._failures if now - t < self.failure_window]
+            self._failures.append(now)
+            if len(self._failures) >= self.failure_threshold:
+                self._transition(self.OPEN, error)
+    
+    def trip(self, error: Exception):
+        """Ouvre le circuit immédiatement (ping initial ou sonde en échec)"""
+        with self._lock:
+            self.last_error = str(error)
+            self._transition(self.OPEN, error)
+    
+    def probe_succeeded(self) -> bool:
+        """Sonde réussie: un circuit ouvert passe en half_open (retourne True si c'est le cas)"""
+        with self._lock:
+            if self.state == self.OPEN:
+                self._transition(self.HALF_OPEN)
+                return True
+            return False
+    
+    def reset(self):
+        """Referme le circuit"""
+        with self._lock:
+            self._transition(self.CLOSED)
+    
+    def status(self) -> dict:
+        """État, transitions et dernière erreur"""
+        self.allow()
+        with self._lock:
+            return {
+                'state': self.state,
+                'since_seconds': round(time.monotonic() - self.changed_at, 1),
+                'recent_failures': len(self._failures),
+                'transitions': dict(self.transitions),
+                'last_error': self.last_error,
+            }
+
+def timed_encode(codec: ValueCodec, key: str, value: Any) -> bytes:
+    """Encode une valeur en mesurant le temps d'encodage et la taille"""
+    started = time.perf_counter()
+    encoded_value = codec.encode(value)
+    cache_metrics.record_encode(key_prefix(key), len(encoded_value), (time.perf_counter() - started) * 1000)
+    return encoded_value
+
+def timed_decode(codec: ValueCodec, key: str, value: Optional[bytes], latency_ms: float = None) -> Any:
+    """Décode une réponse GET en comptant le hit/miss (latence incluse si connue)"""
+    prefix = key_prefix(key)
+    if not value:
+        cache_metrics.record_get(prefix, False, latency_ms)
+        return None
+    started = time.perf_counter()
+    decoded = codec.decode(value)
+    cache_metrics.record_get(prefix, True, latency_ms, len(value), (time.perf_counter() - started) * 1000)
+    return decoded
+
+# Marque les réponses de commandes internes (tags) absentes de CachePipeline.results
+_SKIP_RESULT = object()
+
+class CachePipeline:
+    """
+    Commandes mises en file puis envoyées en un seul aller-retour
+    
+    get/set utilisent le format du cache (ValueCodec, tags); les autres commandes
+    Redis (incr, expire, ttl, ...) sont transmises telles quelles. Après
+    l'exécution, results contient une réponse par commande, dans l'ordre.
+    """
+    
+    def __init__(self, cache, pipe):
+        self._cache = cache
+        self._pipe = pipe
+        self._decoders = []
+        self.results = None
+    
+    def _queue(self, decoder=None):
+        self._decoders.append(decoder)
+        return self
+    
+    def get(self, key: str):
+        if self._pipe is not None:
+            self._pipe.get(key)
+        return self._queue(lambda value: self._cache._decode(key, value))
+    
+    def set(self, key: str, value: Any, ttl: int = 300, tags: Optional[list] = None):
+        if self._pipe is not None:
+            encoded_value = self._cache._encode(key, value)
+            if ttl:
+                self._pipe.setex(key, ttl, encoded_value)
+            else:
+                self._pipe.set(key, encoded_value)
+            self._queue()
+            for _ in range(queue_tags(self._pipe, key, tags, ttl)):
+                self._queue(_SKIP_RESULT)
+            return self
+        return self._queue()
+    
+    def delete(self, *keys: str):
+        if self._pipe is not None:
+            self._pipe.delete(*keys)
+        return self._queue()
+    
+    def __getattr__(self, name: str):
+        def command(*args, **kwargs):
+            if self._pipe is not None:
+                getattr(self._pipe, name)(*args, **kwargs)
+            return self._queue()
+        return command
+    
+    def __len__(self):
+        return sum(1 for decoder in self._decoders if decoder is not _SKIP_RESULT)
+    
+    def _collect(self, replies: list) -> list:
+        """Décode les réponses brutes et retire celles des commandes internes"""
+        results = []
+        for value, decoder in zip(replies, self._decoders):
+            if decoder is _SKIP_RESULT:
+                continue
+            results.append(decoder(value) if decoder else value)
+        self.results = results
+        return results
+    
+    def execute(self) -> list:
+        """Envoie les commandes; sans Redis, chaque réponse vaut None"""
+        if self._pipe is None or not self._decoders:
+            self.results = [None] * len(self)
+            return self.results
+        started = time.perf_counter()
+        replies = self._pipe.execute()
+        cache_metrics.record_latency('pipeline', '-', (time.perf_counter() - started) * 1000)
+        return self._collect(replies)
+
 class RedisCache:
     """Classe de gestion du cache Redis pour MAKERHUB Python"""
     
     def __init__(self, host='localhost', port=6380, db=0, decode_responses=False):
         """
-        Initialise la connexion Redis
+        Prépare la connexion Redis (établie au premier usage, voir connect())
         
         Args:
             host: Hôte Redis (par défaut localhost)
@@ -28,26 +712,174 @@ class RedisCache:
         self.host = os.getenv('REDIS_HOST', host)
         self.port = int(os.getenv('REDIS_PORT', port))
         self.db = db
-        self.client = None
-        self.is_connected = False
+        self.decode_responses = decode_responses
+        self.codec = ValueCodec()
+        self.breaker = CircuitBreaker()
+        self.fallback = LocalFallback() if FALLBACK_ENABLED else None
+        self.pool = None
+        self._client = None
+        self._connect_lock = threading.Lock()
+        self._health_thread = None
+        self._last_probe = None
+        self._scripts = {}
+    
+    def connect(self) -> bool:
+        """
+        Crée le pool de connexions et la sonde de santé au premier appel
+        
+        Appelé au premier accès à client/is_connected, ou par un hook de warmup
+        pour sortir ce coût du démarrage et de la première requête. Si Redis
+        est indisponible, le circuit s'ouvre et la sonde reconnecte dès son retour.
         
+        Returns:
+            True si les appels Redis doivent être tentés (circuit non ouvert)
+        """
+        if self._client is not None:
+            return self.breaker.allow()
+        
+        with self._connect_lock:
+            if self._client is None:
+                self.pool = redis.ConnectionPool(
+                    host=self.host,
+                    port=self.port,
+                    db=self.db,
+                    decode_responses=self.decode_responses,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                    socket_timeout=REDIS_SOCKET_TIMEOUT,
+                    socket_keepalive=True,
+                    health_check_interval=30
+                )
+                self._client = redis.Redis(connection_pool=self.pool)
+                # Test de connexion
+                if self.probe():
+                    logger.info(f"✅ Redis connecté sur {self.host}:{self.port}")
+                else:
+                    logger.info("L'application continuera sans cache jusqu'au retour de Redis")
+                self._start_health_probe()
+        return self.breaker.allow()
+    
+    def probe(self) -> bool:
+        """
+        Sonde de santé: PING, qui ouvre le circuit en cas d'échec et le fait
+        passer en half_open en cas de succès
+        """
+        self._last_probe = datetime.now()
         try:
-            self.client = redis.Redis(
-                host=self.host,
-                port=self.port,
-                db=db,
-                decode_responses=decode_responses,
-                socket_connect_timeout=5,
-                socket_timeout=5
+            self._client.ping()
+        except Exception as e:
+            if self.breaker.state != CircuitBreaker.OPEN:
+                logger.warning(f"⚠️ Redis non disponible: {e}")
+            self.breaker.trip(e)
+            return False
+        # Retour de Redis, ou opérations mises en attente sur erreur sans ouverture du circuit
+        recovered = self.breaker.probe_succeeded()
+        if recovered or (self.fallback is not None and any(self.fallback.pending().values())):
+            self.reconcile()
+        return True
+    
+    def reconcile(self):
+        """
+        Rejoue sur Redis ce qui a été fait localement pendant l'indisponibilité:
+        invalidations d'abord, puis écritures locales encore valides (SET NX:
+        une valeur écrite depuis par un autre processus n'est pas écrasée)
+        """
+        if self.fallback is None:
+            return
+        
+        pending = self.fallback.drain()
+        if not any(pending.values()):
+            return
+        
+        try:
+            self.delete_many(pending['deletes'])
+            for pattern in pending['patterns']:
+                self.flush_pattern(pattern)
+            self.invalidate_tags(*pending['tags'])
+            if pending['writes']:
+                pipe = self.client.pipeline(transaction=False)
+                for key, value, ttl, tags in pending['writes']:
+                    ttl = max(1, int(ttl))
+                    pipe.set(key, self._encode(key, value), ex=ttl, nx=True)
+                    queue_tags(pipe, key, tags, ttl)
+                pipe.execute()
+            logger.info(
+                f"🔄 Redis réconcilié: {len(pending['deletes'])} suppressions, "
+                f"{len(pending['patterns'])} patterns, {len(pending['tags'])} tags, "
+                f"{len(pending['writes'])} écritures"
             )
-            # Test de connexion
-            self.client.ping()
-            self.is_connected = True
-            logger.info(f"✅ Redis connecté sur {self.host}:{self.port}")
-        except (redis.ConnectionError, redis.TimeoutError) as e:
-            logger.warning(f"⚠️ Redis non disponible: {e}")
-            logger.info("L'application continuera sans cache")
-            self.is_connected = False
+        except Exception as e:
+            self._error("RECONCILE", e)
+    
+    def _start_health_probe(self):
+        """Thread de sonde périodique (reconnexion automatique)"""
+        if REDIS_HEALTH_INTERVAL <= 0 or self._health_thread is not None:
+            return
+        
+        def run():
+            while True:
+                time.sleep(REDIS_HEALTH_INTERVAL)
+                self.probe()
+        
+        self._health_thread = threading.Thread(target=run, name='redis-health', daemon=True)
+        self._health_thread.start()
+    
+    def _error(self, operation: str, error: Exception, key: str = None):
+        """Logue et compte une erreur de commande; les erreurs de connexion alimentent le disjoncteur"""
+        logger.error(f"Erreur Redis {operation}: {error}")
+        cache_metrics.record_error(operation.split(' ', 1)[0], key_prefix(key) if key else '-')
+        if isinstance(error, _CONNECTION_ERRORS):
+            self.breaker.record_failure(error)
+    
+    def _fallback_set(self, key: str, value: Any, ttl: int = None, tags: Optional[list] = None) -> bool:
+        """Écriture dans le cache local du mode dégradé"""
+        if self.fallback is None:
+            return False
+        self.fallback.set(key, value, ttl, tags)
+        return True
+    
+    def _encode(self, key: str, value: Any) -> bytes:
+        return timed_encode(self.codec, key, value)
+    
+    def _decode(self, key: str, value: Optional[bytes], latency_ms: float = None) -> Any:
+        return timed_decode(self.codec, key, value, latency_ms)
+    
+    def health(self) -> dict:
+        """État du disjoncteur, de la sonde et du pool de connexions"""
+        status = {
+            'host': f"{self.host}:{self.port}",
+            'breaker': self.breaker.status(),
+            'last_probe': self._last_probe.isoformat() if self._last_probe else None,
+        }
+        if self.fallback is not None:
+            status['fallback'] = dict(self.fallback.pending(), size=len(self.fallback.cache))
+        if self.pool is not None:
+            status['pool'] = {
+                'max_connections': self.pool.max_connections,
+                'in_use': len(getattr(self.pool, '_in_use_connections', ())),
+                'available': len(getattr(self.pool, '_available_connections', ())),
+            }
+        return status
+    
+    @property
+    def client(self):
+        self.connect()
+        return self._client
+    
+    @client.setter
+    def client(self, value):
+        self._client = value
+    
+    @property
+    def is_connected(self) -> bool:
+        return self.connect()
+    
+    @is_connected.setter
+    def is_connected(self, value: bool):
+        if value:
+            self.breaker.reset()
+        else:
+            self.breaker.trip(RuntimeError("désactivé manuellement"))
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -60,27 +892,17 @@ class RedisCache:
             Valeur décodée ou None si non trouvée
         """
         if not self.is_connected:
-            return None
+            return self.fallback.get(key) if self.fallback else None
             
         try:
+            started = time.perf_counter()
             value = self.client.get(key)
-            if value:
-                # Essayer de décoder en JSON d'abord
-                try:
-                    return json.loads(value)
-                except (json.JSONDecodeError, TypeError):
-                    # Si échec, essayer pickle
-                    try:
-                        return pickle.loads(value)
-                    except:
-                        # Retourner la valeur brute
-                        return value.decode('utf-8') if isinstance(value, bytes) else value
-            return None
+            return self._decode(key, value, (time.perf_counter() - started) * 1000)
         except Exception as e:
-            logger.error(f"Erreur Redis GET {key}: {e}")
-            return None
+            self._error(f"GET {key}", e, key)
+            return self.fallback.get(key) if self.fallback else None
     
-    def set(self, key: str, value: Any, ttl: int = 300) -> bool:
+    def set(self, key: str, value: Any, ttl: int = 300, tags: Optional[list] = None) -> bool:
         """
         Stocke une valeur dans le cache
         
@@ -88,33 +910,137 @@ class RedisCache:
             key: Clé de stockage
             value: Valeur à stocker
             ttl: Temps d'expiration en secondes (défaut 5 minutes)
+            tags: Tags sous lesquels enregistrer la clé (ex: ["page:abc", "creator:xyz"])
             
         Returns:
             True si succès, False sinon
         """
         if not self.is_connected:
-            return False
+            return self._fallback_set(key, value, ttl, tags)
             
         try:
-            # Encoder la valeur
-            if isinstance(value, (dict, list)):
-                encoded_value = json.dumps(value)
-            elif isinstance(value, (str, int, float, bool)):
-                encoded_value = json.dumps(value)
-            else:
-                # Pour les objets complexes, utiliser pickle
-                encoded_value = pickle.dumps(value)
+            # Encoder la valeur (en-tête de type, compression au-delà du seuil)
+            encoded_value = self._encode(key, value)
             
-            # Stocker avec TTL
+            # Stocker avec TTL (et enregistrer la clé dans ses tags, même aller-retour)
+            pipe = self.client.pipeline(transaction=False)
             if ttl:
-                self.client.setex(key, ttl, encoded_value)
+                pipe.setex(key, ttl, encoded_value)
             else:
-                self.client.set(key, encoded_value)
+                pipe.set(key, encoded_value)
+            queue_tags(pipe, key, tags, ttl)
+            started = time.perf_counter()
+            pipe.execute()
+            cache_metrics.record_latency('set', key_prefix(key), (time.perf_counter() - started) * 1000)
             
             return True
         except Exception as e:
-            logger.error(f"Erreur Redis SET {key}: {e}")
+            self._error(f"SET {key}", e, key)
+            return self._fallback_set(key, value, ttl, tags)
+    
+    @contextmanager
+    def pipeline(self, transaction: bool = False):
+        """
+        Context manager: regroupe des commandes en un aller-retour
+        
+        Args:
+            transaction: True pour MULTI/EXEC (exécution atomique)
+        
+        Usage:
+            with redis_cache.pipeline() as pipe:
+                pipe.get("a")
+                pipe.incr("b")
+            value, count = pipe.results
+        """
+        pipe = self.client.pipeline(transaction=transaction) if self.is_connected else None
+        batch = CachePipeline(self, pipe)
+        yield batch
+        try:
+            batch.execute()
+        except Exception as e:
+            self._error(f"PIPELINE ({len(batch)} commandes)", e)
+            batch.results = [None] * len(batch)
+    
+    def get_many(self, keys: list) -> dict:
+        """
+        Récupère plusieurs valeurs en un aller-retour (MGET)
+        
+        Args:
+            keys: Clés à récupérer
+        
+        Returns:
+            Dict {clé: valeur décodée} des clés présentes
+        """
+        if not keys:
+            return {}
+        if not self.is_connected:
+            return self._fallback_get_many(keys)
+        
+        try:
+            started = time.perf_counter()
+            values = self.client.mget(keys)
+            cache_metrics.record_latency('get_many', common_prefix(keys), (time.perf_counter() - started) * 1000)
+            decoded = {key: self._decode(key, value) for key, value in zip(keys, values)}
+            return {key: value for key, value in decoded.items() if value is not None}
+        except Exception as e:
+            self._error(f"MGET ({len(keys)} clés)", e, keys[0])
+            return self._fallback_get_many(keys)
+    
+    def _fallback_get_many(self, keys: list) -> dict:
+        if self.fallback is None:
+            return {}
+        values = {key: self.fallback.get(key) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+    
+    def set_many(self, mapping: dict, ttl: int = 300, ttls: Optional[dict] = None,
+                 tags: Optional[dict] = None) -> bool:
+        """
+        Stocke plusieurs valeurs en un aller-retour
+        
+        Args:
+            mapping: Dict {clé: valeur}
+            ttl: TTL par défaut en secondes
+            ttls: TTL par clé, prioritaires sur ttl
+            tags: Tags par clé (voir set)
+        
+        Returns:
+            True si succès, False sinon
+        """
+        if not mapping:
             return False
+        
+        ttls = ttls or {}
+        tags = tags or {}
+        if not self.is_connected:
+            return all([self._fallback_set(key, value, ttls.get(key, ttl), tags.get(key))
+                        for key, value in mapping.items()])
+        with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ttls.get(key, ttl), tags=tags.get(key))
+        return pipe.results is not None and None not in pipe.results
+    
+    def delete_many(self, keys: list) -> int:
+        """
+        Supprime plusieurs clés (UNLINK par lots)
+        
+        Args:
+            keys: Clés à supprimer
+        
+        Returns:
+            Nombre de clés supprimées
+        """
+        if not keys:
+            return 0
+        if not self.is_connected:
+            return self._fallback_delete(*keys)
+        
+        try:
+            deleted = self._unlink_iter(keys)
+            cache_metrics.record_delete(common_prefix(keys), deleted)
+            return deleted
+        except Exception as e:
+            self._error(f"DELETE_MANY ({len(keys)} clés)", e, keys[0])
+            return self._fallback_delete(*keys)
     
     def delete(self, key: str) -> bool:
         """
@@ -127,14 +1053,20 @@ class RedisCache:
             True si supprimée, False sinon
         """
         if not self.is_connected:
-            return False
+            self._fallback_delete(key)
+            return self.fallback is not None
             
         try:
-            self.client.delete(key)
+            cache_metrics.record_delete(key_prefix(key), self.client.delete(key))
             return True
         except Exception as e:
-            logger.error(f"Erreur Redis DELETE {key}: {e}")
-            return False
+            self._error(f"DELETE {key}", e, key)
+            self._fallback_delete(key)
+            return self.fallback is not None
+    
+    def _fallback_delete(self, *keys: str) -> int:
+        """Suppression dans le cache local, rejouée sur Redis par reconcile()"""
+        return self.fallback.delete(*keys) if self.fallback else 0
     
     def exists(self, key: str) -> bool:
         """
@@ -147,12 +1079,12 @@ class RedisCache:
             True si existe, False sinon
         """
         if not self.is_connected:
-            return False
+            return bool(self.fallback) and self.fallback.get(key) is not None
             
         try:
             return self.client.exists(key) > 0
         except Exception as e:
-            logger.error(f"Erreur Redis EXISTS {key}: {e}")
+            self._error(f"EXISTS {key}", e, key)
             return False
     
     def incr(self, key: str, amount: int = 1) -> int:
@@ -167,12 +1099,12 @@ class RedisCache:
             Nouvelle valeur après incrémentation
         """
         if not self.is_connected:
-            return 1
+            return self.fallback.incr(key, amount) if self.fallback else 1
             
         try:
             return self.client.incr(key, amount)
         except Exception as e:
-            logger.error(f"Erreur Redis INCR {key}: {e}")
+            self._error(f"INCR {key}", e, key)
             return 1
     
     def expire(self, key: str, seconds: int) -> bool:
@@ -187,18 +1119,102 @@ class RedisCache:
             True si TTL défini, False sinon
         """
         if not self.is_connected:
-            return False
+            return bool(self.fallback) and self.fallback.expire(key, seconds)
             
         try:
             return self.client.expire(key, seconds)
         except Exception as e:
-            logger.error(f"Erreur Redis EXPIRE {key}: {e}")
+            self._error(f"EXPIRE {key}", e, key)
+            return False
+    
+    def acquire_lease(self, key: str, ttl_ms: int) -> Optional[str]:
+        """
+        Prend le bail de calcul d'une clé (SET NX PX)
+        
+        Args:
+            key: Clé de cache à calculer
+            ttl_ms: Durée du bail en millisecondes
+        
+        Returns:
+            Jeton à passer à release_lease, None si un autre processus le détient.
+            Sans Redis, le bail est toujours accordé (seul le verrou local compte).
+        """
+        token = uuid.uuid4().hex
+        if not self.is_connected:
+            return token
+        
+        try:
+            if self.client.set(lease_key(key), token, nx=True, px=ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            self._error(f"LEASE {key}", e, key)
+            return token
+    
+    def run_script(self, source: str, keys: list = (), args: list = ()) -> Any:
+        """
+        Exécute un script Lua (EVALSHA, chargé au premier appel)
+        
+        Args:
+            source: Source du script
+            keys: KEYS du script
+            args: ARGV du script
+        
+        Returns:
+            Réponse du script, None si Redis indisponible ou erreur
+        """
+        if not self.is_connected:
+            return None
+        
+        try:
+            script = self._scripts.get(source)
+            if script is None:
+                script = self._scripts[source] = self.client.register_script(source)
+            return script(keys=list(keys), args=list(args), client=self.client)
+        except Exception as e:
+            self._error(f"SCRIPT {keys}", e, keys[0] if keys else None)
+            return None
+    
+    def release_lease(self, key: str, token: str) -> bool:
+        """
+        Libère un bail s'il appartient encore au jeton (sinon il a expiré)
+        
+        Returns:
+            True si le bail a été supprimé
+        """
+        if not self.is_connected or not token:
             return False
+        
+        return bool(self.run_script(_RELEASE_LEASE_SCRIPT, keys=[lease_key(key)], args=[token]))
+    
+    def _unlink(self, keys: list) -> int:
+        """Supprime un lot de clés (UNLINK: libération mémoire hors du thread Redis)"""
+        try:
+            return self.client.unlink(*keys)
+        except redis.ResponseError:
+            # Redis < 4.0 sans UNLINK
+            return self.client.delete(*keys)
+    
+    def _unlink_iter(self, keys) -> int:
+        """Supprime les clés d'un itérateur par lots de UNLINK_BATCH_SIZE"""
+        deleted = 0
+        batch = []
+        for key in keys:
+            batch.append(key)
+            if len(batch) >= UNLINK_BATCH_SIZE:
+                deleted += self._unlink(batch)
+                batch = []
+        if batch:
+            deleted += self._unlink(batch)
+        return deleted
     
     def flush_pattern(self, pattern: str) -> int:
         """
         Supprime toutes les clés correspondant à un pattern
         
+        Parcourt l'espace de clés avec SCAN (incrémental, ne bloque pas Redis
+        comme KEYS) et supprime par lots avec UNLINK.
+        
         Args:
             pattern: Pattern de clés (ex: "landing:*")
             
@@ -206,63 +1222,335 @@ class RedisCache:
             Nombre de clés supprimées
         """
         if not self.is_connected:
-            return 0
+            return self.fallback.invalidate_pattern(pattern) if self.fallback else 0
             
         try:
-            keys = self.client.keys(pattern)
-            if keys:
-                return self.client.delete(*keys)
-            return 0
+            return self._unlink_iter(self.client.scan_iter(match=pattern, count=SCAN_COUNT))
+        except Exception as e:
+            self._error(f"FLUSH_PATTERN {pattern}", e, pattern)
+            return self.fallback.invalidate_pattern(pattern) if self.fallback else 0
+    
+    def tag(self, key: str, *tags: str, ttl: int = None) -> bool:
+        """
+        Enregistre une clé déjà en cache sous des tags
+        
+        Args:
+            key: Clé en cache
+            tags: Tags (ex: "page:abc", "creator:xyz")
+            ttl: TTL de la clé, pour dimensionner celui des ensembles
+        
+        Returns:
+            True si succès, False sinon
+        """
+        if not self.is_connected or not tags:
+            return False
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            queue_tags(pipe, key, tags, ttl)
+            pipe.execute()
+            return True
         except Exception as e:
-            logger.error(f"Erreur Redis FLUSH_PATTERN {pattern}: {e}")
+            self._error(f"TAG {key}", e, key)
+            return False
+    
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        Supprime toutes les clés enregistrées sous des tags, puis les ensembles
+        
+        Coût proportionnel au nombre de membres (SSCAN + UNLINK par lots),
+        sans parcourir l'espace de clés.
+        
+        Args:
+            tags: Tags à invalider
+        
+        Returns:
+            Nombre de clés supprimées (hors ensembles de tags)
+        """
+        if not tags:
             return 0
+        if not self.is_connected:
+            return self.fallback.invalidate_tags(*tags) if self.fallback else 0
+        
+        deleted = 0
+        for tag in tags:
+            name = tag_key(tag)
+            try:
+                deleted += self._unlink_iter(self.client.sscan_iter(name, count=SCAN_COUNT))
+                self._unlink([name])
+            except Exception as e:
+                self._error(f"INVALIDATE_TAG {tag}", e, tag)
+                if self.fallback:
+                    deleted += self.fallback.invalidate_tags(tag)
+        return deleted
 
 # Instance globale du cache
 redis_cache = RedisCache()
 
-def cache_result(ttl: int = 300, key_prefix: str = None):
+# Limiteur local utilisé par check_rate_limit quand Redis est indisponible
+local_rate_limiter = LocalRateLimiter()
+
+# Verrous single-flight partagés par toutes les fonctions décorées
+_key_locks = KeyLocks()
+
+# Enveloppe des valeurs stale-while-revalidate: fin de fraîcheur (timestamp Unix) + valeur
+_SWR_FIELD = '__fresh_until__'
+
+class CacheResultStats:
+    """Compteurs hit/miss d'une fonction décorée par cache_result"""
+    
+    FIELDS = ('l1_hits', 'redis_hits', 'stale_hits', 'coalesced', 'misses')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+    
+    def count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+    
+    def snapshot(self) -> dict:
+        """Compteurs et hit_ratio (tout ce qui n'a pas exécuté la fonction)"""
+        with self._lock:
+            stats = dict(self._counts)
+        total = sum(stats.values())
+        hits = total - stats['misses']
+        stats['hit_ratio'] = round(hits / total, 4) if total else 0.0
+        return stats
+
+# Compteurs par fonction (module.qualname)
+_cache_result_stats = {}
+
+def get_cache_result_stats() -> dict:
+    """Compteurs et hit_ratio de chaque fonction décorée par cache_result"""
+    return {name: stats.snapshot() for name, stats in _cache_result_stats.items()}
+
+def canonical_arg(value: Any) -> Any:
+    """
+    Forme JSON non ambiguë d'un argument
+    
+    str, int, float, bool et None restent natifs (JSON les distingue); tous les
+    autres types sont un objet à une seule clé, le nom du type: {"list": [...]},
+    {"dict": [[clé, valeur], ...]} trié, {"set": [...]} trié, {"datetime": iso},
+    {"bytes": hex}... Les objets passent par leur méthode cache_key() si elle
+    existe, sinon repr(), sous le nom qualifié de leur classe.
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return {'bytes': bytes(value).hex()}
+    if isinstance(value, datetime):
+        return {'datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'date': value.isoformat()}
+    if isinstance(value, list):
+        return {'list': [canonical_arg(item) for item in value]}
+    if isinstance(value, tuple):
+        return {'tuple': [canonical_arg(item) for item in value]}
+    if isinstance(value, (set, frozenset)):
+        return {'set': sorted((canonical_arg(item) for item in value), key=_canonical_dump)}
+    if isinstance(value, dict):
+        items = [[canonical_arg(k), canonical_arg(v)] for k, v in value.items()]
+        return {'dict': sorted(items, key=_canonical_dump)}
+    
+    kind = f"{type(value).__module__}.{type(value).__qualname__}"
+    if callable(getattr(value, 'cache_key', None)):
+        return {kind: canonical_arg(value.cache_key())}
+    return {kind: repr(value)}
+
+def _canonical_dump(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+class CacheKeyBuilder:
+    """
+    Clés Redis des appels d'une fonction décorée (partagé par cache_result et
+    async_cache_result): <namespace>:<fonction>:v<version>:<hash des arguments>
+    
+    Les arguments sont liés à la signature (f(1) et f(x=1) donnent la même clé,
+    valeurs par défaut incluses, self/cls ignorés), encodés par canonical_arg
+    puis hachés (blake2b, 128 bits): deux appels différents ne partagent pas de clé.
+    Changer la version rend toutes les anciennes entrées inaccessibles (elles
+    expirent avec leur TTL), sans parcourir l'espace de clés.
+    """
+    
+    def __init__(self, func: Callable, namespace: str = None, version: int = 1):
+        self.prefix = f"{namespace or 'func'}:{func.__name__}:v{version}"
+        try:
+            self.signature = inspect.signature(func)
+        except (TypeError, ValueError):
+            self.signature = None
+        parameters = list(self.signature.parameters) if self.signature else []
+        self.skip_first = bool(parameters) and parameters[0] in ('self', 'cls')
+    
+    def _arguments(self, args: tuple, kwargs: dict) -> list:
+        if self.signature is not None:
+            try:
+                bound = self.signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                items = list(bound.arguments.items())
+                return items[1:] if self.skip_first else items
+            except TypeError:
+                pass
+        return list(enumerate(args)) + sorted(kwargs.items())
+    
+    def __call__(self, args: tuple, kwargs: dict) -> str:
+        arguments = self._arguments(args, kwargs)
+        if not arguments:
+            return self.prefix
+        
+        encoded = _canonical_dump([[name, canonical_arg(value)] for name, value in arguments])
+        digest = hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+        return f"{self.prefix}:{digest}"
+
+def render_metrics() -> str:
+    """
+    Métriques du cache au format Prometheus: compteurs et histogrammes par
+    préfixe (cache_metrics), état du disjoncteur et hits par fonction @cache_result
+    """
+    breaker = redis_cache.breaker.status()
+    lines = [
+        "# HELP makerhub_cache_breaker_state État du disjoncteur Redis (1 = état courant)",
+        "# TYPE makerhub_cache_breaker_state gauge",
+    ]
+    for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN):
+        lines.append(f'makerhub_cache_breaker_state{{state="{state}"}} {int(breaker["state"] == state)}')
+    lines += [
+        "# HELP makerhub_cache_breaker_transitions_total Transitions du disjoncteur Redis",
+        "# TYPE makerhub_cache_breaker_transitions_total counter",
+    ]
+    for transition, count in sorted(breaker['transitions'].items()):
+        lines.append(f'makerhub_cache_breaker_transitions_total{{transition="{transition}"}} {count}')
+    lines += [
+        "# HELP makerhub_cache_function_calls_total Appels des fonctions @cache_result par résultat",
+        "# TYPE makerhub_cache_function_calls_total counter",
+    ]
+    for name, stats in sorted(get_cache_result_stats().items()):
+        for field in CacheResultStats.FIELDS:
+            lines.append(f'makerhub_cache_function_calls_total{{function="{name}",result="{field}"}} {stats[field]}')
+    return cache_metrics.render_prometheus(extra_lines=lines)
+
+def cache_result(ttl: int = 300, key_prefix: str = None, l1_ttl: int = 0, l1_maxsize: int = 1024,
+                 stale_ttl: int = 0, lock_timeout: float = 10, version: int = 1):
     """
     Décorateur pour mettre en cache le résultat d'une fonction
     
+    Sur un miss, un seul appelant exécute la fonction: les threads du processus
+    attendent un verrou local, les autres processus attendent le bail Redis
+    (SET NX) puis lisent le résultat en cache.
+    
     Args:
         ttl: Temps d'expiration en secondes
-        key_prefix: Préfixe personnalisé pour la clé
+        key_prefix: Namespace de la clé (défaut: "func"), voir CacheKeyBuilder
+        l1_ttl: TTL du cache local en mémoire (0: désactivé), plafonné à ttl.
+            Non invalidé par invalidate_cache: à garder court.
+        l1_maxsize: Nombre maximum d'entrées du cache local
+        stale_ttl: Après ttl, durée pendant laquelle la valeur périmée est encore
+            servie pendant qu'un seul appelant la recalcule en arrière-plan (0: désactivé)
+        lock_timeout: Durée du bail Redis et attente maximale du calcul d'un autre processus
+        version: Version des entrées, à incrémenter quand le format du résultat change
         
     Usage:
-        @cache_result(ttl=600, key_prefix="landing")
+        @cache_result(ttl=600, key_prefix="landing", l1_ttl=5, stale_ttl=60)
         def get_landing_page(slug):
             return fetch_from_database(slug)
     """
     def decorator(func: Callable) -> Callable:
+        stats = _cache_result_stats.setdefault(f"{func.__module__}.{func.__qualname__}", CacheResultStats())
+        local = LRUCache(maxsize=l1_maxsize, ttl=min(l1_ttl, ttl)) if l1_ttl else None
+        lease_ms = int(lock_timeout * 1000)
+        build_key = CacheKeyBuilder(func, key_prefix, version)
+        
+        def load(cache_key):
+            """Lit Redis: (valeur, fraîche), (None, False) si absente"""
+            cached = redis_cache.get(cache_key)
+            if cached is None:
+                return None, False
+            if stale_ttl and isinstance(cached, dict) and _SWR_FIELD in cached:
+                return cached['value'], cached[_SWR_FIELD] > time.time()
+            return cached, True
+        
+        def store(cache_key, result):
+            if local is not None:
+                local.set(cache_key, result)
+            if stale_ttl:
+                redis_cache.set(cache_key, {_SWR_FIELD: time.time() + ttl, 'value': result}, ttl + stale_ttl)
+            else:
+                redis_cache.set(cache_key, result, ttl)
+        
+        def refresh(cache_key, token, args, kwargs):
+            """Recalcul en arrière-plan d'une valeur périmée (bail déjà pris)"""
+            try:
+                store(cache_key, func(*args, **kwargs))
+            except Exception as e:
+                logger.error(f"Erreur rafraîchissement cache {cache_key}: {e}")
+            finally:
+                redis_cache.release_lease(cache_key, token)
+        
+        def wait_for(cache_key):
+            """Attend le résultat calculé par le détenteur du bail"""
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(LEASE_POLL_INTERVAL)
+                value, _ = load(cache_key)
+                if value is not None:
+                    return value
+                if not redis_cache.exists(lease_key(cache_key)):
+                    break
+            return None
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Construire la clé de cache
-            if key_prefix:
-                cache_key = f"{key_prefix}:{func.__name__}"
-            else:
-                cache_key = f"func:{func.__name__}"
-            
-            # Ajouter les arguments à la clé
-            if args:
-                cache_key += f":{':'.join(str(arg) for arg in args)}"
-            if kwargs:
-                cache_key += f":{':'.join(f'{k}={v}' for k, v in sorted(kwargs.items()))}"
+            cache_key = build_key(args, kwargs)
             
-            # Vérifier le cache
-            cached_value = redis_cache.get(cache_key)
-            if cached_value is not None:
-                logger.info(f"📦 Cache hit: {cache_key}")
-                return cached_value
+            # Vérifier le cache local puis Redis
+            if local is not None:
+                value = local.get(cache_key)
+                if value is not None:
+                    stats.count('l1_hits')
+                    return value
             
-            # Exécuter la fonction
-            logger.info(f"🔍 Cache miss: {cache_key}")
-            result = func(*args, **kwargs)
+            value, fresh = load(cache_key)
+            if value is not None:
+                if fresh:
+                    stats.count('redis_hits')
+                    if local is not None:
+                        local.set(cache_key, value)
+                    return value
+                # Périmée: servie telle quelle, le détenteur du bail la recalcule
+                stats.count('stale_hits')
+                token = redis_cache.acquire_lease(cache_key, lease_ms)
+                if token:
+                    threading.Thread(target=refresh, args=(cache_key, token, args, kwargs), daemon=True).start()
+                return value
             
-            # Mettre en cache le résultat
-            redis_cache.set(cache_key, result, ttl)
+            with _key_locks.hold(cache_key):
+                # Le cache a pu être rempli pendant l'attente du verrou
+                value, _ = load(cache_key)
+                if value is not None:
+                    stats.count('coalesced')
+                    return value
+                
+                token = redis_cache.acquire_lease(cache_key, lease_ms)
+                if token is None:
+                    value = wait_for(cache_key)
+                    if value is not None:
+                        stats.count('coalesced')
+                        return value
+                
+                # Exécuter la fonction
+                stats.count('misses')
+                try:
+                    result = func(*args, **kwargs)
+                    
+                    # Mettre en cache le résultat
+                    store(cache_key, result)
+                finally:
+                    redis_cache.release_lease(cache_key, token)
             
             return result
         
+        wrapper.cache_stats = stats.snapshot
+        wrapper.cache_key = lambda *args, **kwargs: build_key(args, kwargs)
         return wrapper
     return decorator
 
@@ -281,11 +1569,35 @@ def invalidate_cache(pattern: str):
         logger.info(f"🧹 Cache invalidé: {count} clés supprimées pour pattern '{pattern}'")
     return count
 
+def invalidate_tags(*tags: str):
+    """
+    Invalide le cache des clés enregistrées sous des tags
+    
+    Args:
+        tags: Tags à invalider (ex: "page:abc", "creator:xyz")
+    
+    Returns:
+        Nombre de clés invalidées
+    """
+    count = redis_cache.invalidate_tags(*tags)
+    if count > 0:
+        logger.info(f"🧹 Cache invalidé: {count} clés supprimées pour tags {list(tags)}")
+    return count
+
+def landing_tags(data: dict) -> list:
+    """Tags d'une landing page: page:<id> et creator:<creatorId> si présents"""
+    tags = []
+    if data.get('id'):
+        tags.append(f"page:{data['id']}")
+    if data.get('creatorId'):
+        tags.append(f"creator:{data['creatorId']}")
+    return tags
+
 # Fonctions spécifiques pour les routes Python MAKERHUB
 
 def cache_landing_page(slug: str, data: dict, ttl: int = 600):
     """
-    Met en cache une landing page
+    Met en cache une landing page, sous les tags page:<id> et creator:<creatorId>
     
     Args:
         slug: Slug de la landing page
@@ -293,7 +1605,21 @@ def cache_landing_page(slug: str, data: dict, ttl: int = 600):
         ttl: TTL en secondes (défaut 10 minutes)
     """
     key = f"landing:{slug}"
-    redis_cache.set(key, data, ttl)
+    redis_cache.set(key, data, ttl, tags=landing_tags(data))
+
+def cache_landing_pages(pages: dict, ttl: int = 600):
+    """
+    Met en cache plusieurs landing pages en un aller-retour
+    
+    Args:
+        pages: Dict {slug: données}
+        ttl: TTL en secondes (défaut 10 minutes)
+    """
+    redis_cache.set_many(
+        {f"landing:{slug}": data for slug, data in pages.items()},
+        ttl,
+        tags={f"landing:{slug}": landing_tags(data) for slug, data in pages.items()}
+    )
 
 def get_cached_landing_page(slug: str) -> Optional[dict]:
     """
@@ -308,6 +1634,19 @@ def get_cached_landing_page(slug: str) -> Optional[dict]:
     key = f"landing:{slug}"
     return redis_cache.get(key)
 
+def get_cached_landing_pages(slugs: list) -> dict:
+    """
+    Récupère plusieurs landing pages du cache en un aller-retour
+    
+    Args:
+        slugs: Slugs des landing pages
+    
+    Returns:
+        Dict {slug: données} des pages en cache
+    """
+    cached = redis_cache.get_many([f"landing:{slug}" for slug in slugs])
+    return {slug: cached[f"landing:{slug}"] for slug in slugs if f"landing:{slug}" in cached}
+
 def invalidate_landing_cache(slug: str):
     """
     Invalide le cache d'une landing page
@@ -345,10 +1684,30 @@ def get_cached_landing_stats(slug: str) -> Optional[dict]:
     key = f"landing:stats:{slug}"
     return redis_cache.get(key)
 
-# Rate limiting pour le backend Python
+# Rate limiting pour le backend Python (GCRA: une requête tous les window/limit,
+# rafale jusqu'à limit). L'heure vient de Redis (TIME): pas de dérive entre processus.
+# Retourne {autorisé, restant, ms avant la prochaine requête autorisée, ms avant rafale complète}
+_RATE_LIMIT_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local emission = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + emission
+if new_tat - now > period then
+    return {0, 0, new_tat - now - period, tat - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, math.floor((period - (new_tat - now)) / emission), 0, new_tat - now}
+"""
+
 def check_rate_limit(identifier: str, limit: int = 100, window: int = 60) -> tuple:
     """
-    Vérifie le rate limit pour un identifiant
+    Vérifie le rate limit pour un identifiant (un appel Lua atomique)
     
     Args:
         identifier: IP ou ID utilisateur
@@ -356,73 +1715,90 @@ def check_rate_limit(identifier: str, limit: int = 100, window: int = 60) -> tup
         window: Fenêtre de temps en secondes
         
     Returns:
-        Tuple (allowed: bool, remaining: int, reset_at: datetime)
+        Tuple (allowed: bool, remaining: int, reset_at: datetime) - reset_at est
+        l'instant de la prochaine requête autorisée si refusée, sinon celui où
+        la rafale complète est de nouveau disponible
     """
     if not redis_cache.is_connected:
-        return (True, limit, None)
+        return local_rate_limiter.check(identifier, limit, window)
     
     key = f"ratelimit:python:{identifier}"
+    period_ms = int(window * 1000)
+    emission_ms = max(1, period_ms // max(1, limit))
     
-    # Incrémenter le compteur
-    count = redis_cache.incr(key)
-    
-    # Si première requête, définir l'expiration
-    if count == 1:
-        redis_cache.expire(key, window)
-    
-    # Calculer le temps de reset
-    ttl = redis_cache.client.ttl(key) if redis_cache.is_connected else 0
-    reset_at = datetime.now() + timedelta(seconds=ttl) if ttl > 0 else None
+    result = redis_cache.run_script(_RATE_LIMIT_SCRIPT, keys=[key], args=[emission_ms, period_ms])
+    if result is None:
+        return local_rate_limiter.check(identifier, limit, window)
     
-    # Vérifier la limite
-    allowed = count <= limit
-    remaining = max(0, limit - count)
+    allowed, remaining, retry_after_ms, reset_after_ms = (int(value) for value in result)
+    wait_ms = reset_after_ms if allowed else retry_after_ms
+    reset_at = datetime.now() + timedelta(milliseconds=wait_ms)
     
-    return (allowed, remaining, reset_at)
+    return (bool(allowed), remaining, reset_at)
 
 # Middleware Flask pour le rate limiting
 def rate_limit_middleware(app, limit=100, window=60):
     """
     Ajoute un middleware de rate limiting à l'app Flask
     
+    Le résultat de la vérification est conservé dans flask.g, lu par un unique
+    hook after_request qui ajoute les en-têtes X-RateLimit-*.
+    
     Args:
         app: Application Flask
         limit: Limite de requêtes
         window: Fenêtre en secondes
     """
+    from flask import request, jsonify, g
+    
     @app.before_request
     def check_rate_limit_before_request():
-        from flask import request, jsonify
-        
         # Identifier le client
         identifier = request.remote_addr
         
         # Vérifier le rate limit
         allowed, remaining, reset_at = check_rate_limit(identifier, limit, window)
-        
-        # Ajouter les headers
-        @app.after_request
-        def add_rate_limit_headers(response):
-            response.headers['X-RateLimit-Limit'] = str(limit)
-            response.headers['X-RateLimit-Remaining'] = str(remaining)
-            if reset_at:
-                response.headers['X-RateLimit-Reset'] = reset_at.isoformat()
-            return response
+        g.rate_limit = (limit, remaining, reset_at)
         
         # Bloquer si limite dépassée
         if not allowed:
-            return jsonify({
+            retry_after = max(1, math.ceil((reset_at - datetime.now()).total_seconds())) if reset_at else window
+            response = jsonify({
                 'error': 'Limite de requêtes dépassée',
-                'retry_after': (reset_at - datetime.now()).seconds if reset_at else window
-            }), 429
+                'retry_after': retry_after
+            })
+            response.status_code = 429
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+    
+    # Ajouter les headers
+    @app.after_request
+    def add_rate_limit_headers(response):
+        rate_limit = g.get('rate_limit')
+        if rate_limit:
+            limit_value, remaining, reset_at = rate_limit
+            response.headers['X-RateLimit-Limit'] = str(limit_value)
+            response.headers['X-RateLimit-Remaining'] = str(remaining)
+            if reset_at:
+                response.headers['X-RateLimit-Reset'] = reset_at.isoformat()
+        return response
 
 # Export des fonctions principales
 __all__ = [
+    'ValueCodec',
+    'LRUCache',
     'redis_cache',
     'cache_result',
+    'CacheKeyBuilder',
+    'get_cache_result_stats',
+    'render_metrics',
     'invalidate_cache',
+    'invalidate_tags',
+    'tag_key',
     'cache_landing_page',
     'get_cached_landing_page',
+    'cache_landing_pages',
+    'get_cached_landing_pages',
     'invalidate_landing_cache',
     'cache_landing_stats',
     'get_cached_landing_stats',
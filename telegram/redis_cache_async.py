@@ -0,0 +1,579 @@
+# redis_cache_async.py - Cache Redis asynchrone (redis.asyncio) pour le backend Python MAKERHUB
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Any, Optional, Callable
+
+import redis
+import redis.asyncio as aioredis
+
+from cache_metrics import cache_metrics, key_prefix, common_prefix
+from redis_cache import (
+    redis_cache, ValueCodec, CircuitBreaker, CachePipeline, CacheResultStats, LRUCache, timed_encode, timed_decode,
+    CacheKeyBuilder, tag_key, lease_key, queue_tags, _cache_result_stats, _SWR_FIELD,
+    _CONNECTION_ERRORS, _RELEASE_LEASE_SCRIPT, LEASE_POLL_INTERVAL,
+    REDIS_MAX_CONNECTIONS, REDIS_SOCKET_TIMEOUT, REDIS_CONNECT_TIMEOUT,
+    REDIS_HEALTH_INTERVAL, SCAN_COUNT, UNLINK_BATCH_SIZE
+)
+
+# Configuration du logging
+logger = logging.getLogger(__name__)
+
+class AsyncCachePipeline(CachePipeline):
+    """CachePipeline dont l'exécution est une coroutine (pipeline redis.asyncio)"""
+    
+    async def execute(self) -> list:
+        """Envoie les commandes; sans Redis, chaque réponse vaut None"""
+        if self._pipe is None or not self._decoders:
+            self.results = [None] * len(self)
+            return self.results
+        started = time.perf_counter()
+        replies = await self._pipe.execute()
+        cache_metrics.record_latency('pipeline', '-', (time.perf_counter() - started) * 1000)
+        return self._collect(replies)
+
+class AsyncRedisCache:
+    """
+    Pendant asynchrone de RedisCache: mêmes clés, même format de valeurs
+    (ValueCodec), mêmes tags et baux, pour les composants asyncio (worker de
+    traduction, bots, FirebaseService.*_async). Le pool est lié à la boucle
+    d'événements courante: il est recréé si la boucle change (asyncio.run successifs).
+    """
+    
+    def __init__(self, host='localhost', port=6380, db=0):
+        """
+        Prépare la connexion Redis (établie au premier appel, voir connect())
+        
+        Args:
+            host: Hôte Redis (par défaut localhost)
+            port: Port Redis (6380 pour MAKERHUB)
+            db: Numéro de la base Redis
+        """
+        self.host = os.getenv('REDIS_HOST', host)
+        self.port = int(os.getenv('REDIS_PORT', port))
+        self.db = db
+        self.codec = ValueCodec()
+        self.breaker = CircuitBreaker()
+        self.pool = None
+        self.client = None
+        self._connect_lock = None
+        self._health_task = None
+        self._loop = None
+        self._scripts = {}
+    
+    async def connect(self) -> bool:
+        """
+        Crée le pool de connexions et la sonde de santé au premier appel
+        
+        Returns:
+            True si les appels Redis doivent être tentés (circuit non ouvert)
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pool et tâches de l'ancienne boucle inutilisables: abandonnés, sonde annulée
+            task = self._health_task
+            if task is not None and not task.done() and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(task.cancel)
+            self.client = self.pool = self._health_task = None
+            self._connect_lock = None
+            self._scripts = {}
+            self._loop = loop
+        
+        if self.client is not None:
+            return self.breaker.allow()
+        
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.client is None:
+                self.pool = aioredis.ConnectionPool(
+                    host=self.host,
+                    port=self.port,
+                    db=self.db,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                    socket_timeout=REDIS_SOCKET_TIMEOUT,
+                    socket_keepalive=True,
+                    health_check_interval=30
+                )
+                self.client = aioredis.Redis(connection_pool=self.pool)
+                if await self.probe():
+                    logger.info(f"✅ Redis (async) connecté sur {self.host}:{self.port}")
+                if REDIS_HEALTH_INTERVAL > 0:
+                    self._health_task = loop.create_task(self._health_loop())
+        return self.breaker.allow()
+    
+    async def probe(self) -> bool:
+        """Sonde de santé: PING (ouvre le circuit en cas d'échec, half_open en cas de succès)"""
+        try:
+            await self.client.ping()
+        except Exception as e:
+            if self.breaker.state != CircuitBreaker.OPEN:
+                logger.warning(f"⚠️ Redis (async) non disponible: {e}")
+            self.breaker.trip(e)
+            return False
+        recovered = self.breaker.probe_succeeded()
+        if recovered or (self.fallback is not None and any(self.fallback.pending().values())):
+            await self.reconcile()
+        return True
+    
+    @property
+    def fallback(self):
+        """File locale du mode dégradé, partagée avec redis_cache (rejouée par la première sonde qui réussit)"""
+        return redis_cache.fallback
+    
+    async def reconcile(self):
+        """Équivalent async de RedisCache.reconcile: invalidations, puis écritures (SET NX)"""
+        if self.fallback is None:
+            return
+        
+        pending = self.fallback.drain()
+        if not any(pending.values()):
+            return
+        
+        # Une invalidation qui échoue encore est remise en file par delete_many & co
+        await self.delete_many(pending['deletes'])
+        for pattern in pending['patterns']:
+            await self.flush_pattern(pattern)
+        await self.invalidate_tags(*pending['tags'])
+        try:
+            if pending['writes']:
+                pipe = self.client.pipeline(transaction=False)
+                for key, value, ttl, tags in pending['writes']:
+                    ttl = max(1, int(ttl))
+                    pipe.set(key, self._encode(key, value), ex=ttl, nx=True)
+                    queue_tags(pipe, key, tags, ttl)
+                await pipe.execute()
+            logger.info(
+                f"🔄 Redis (async) réconcilié: {len(pending['deletes'])} suppressions, "
+                f"{len(pending['patterns'])} patterns, {len(pending['tags'])} tags, "
+                f"{len(pending['writes'])} écritures"
+            )
+        except Exception as e:
+            self._error("RECONCILE", e)
+    
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(REDIS_HEALTH_INTERVAL)
+            await self.probe()
+    
+    async def close(self):
+        """Arrête la sonde et ferme le pool de connexions"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+    
+    def _error(self, operation: str, error: Exception, key: str = None):
+        """Logue et compte une erreur de commande; les erreurs de connexion alimentent le disjoncteur"""
+        logger.error(f"Erreur Redis (async) {operation}: {error}")
+        cache_metrics.record_error(operation.split(' ', 1)[0], key_prefix(key) if key else '-')
+        if isinstance(error, _CONNECTION_ERRORS):
+            self.breaker.record_failure(error)
+    
+    def _encode(self, key: str, value: Any) -> bytes:
+        return timed_encode(self.codec, key, value)
+    
+    def _decode(self, key: str, value: Optional[bytes], latency_ms: float = None) -> Any:
+        return timed_decode(self.codec, key, value, latency_ms)
+    
+    def health(self) -> dict:
+        """État du disjoncteur"""
+        return {'host': f"{self.host}:{self.port}", 'breaker': self.breaker.status()}
+    
+    # ==================== CLÉS ====================
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Récupère une valeur décodée, None si absente"""
+        if not await self.connect():
+            return None
+        
+        try:
+            started = time.perf_counter()
+            value = await self.client.get(key)
+            return self._decode(key, value, (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            self._error(f"GET {key}", e, key)
+            return None
+    
+    async def set(self, key: str, value: Any, ttl: int = 300, tags: Optional[list] = None) -> bool:
+        """Stocke une valeur (voir RedisCache.set)"""
+        if not await self.connect():
+            return False
+        
+        async with self.pipeline() as pipe:
+            pipe.set(key, value, ttl, tags=tags)
+        return pipe.results == [True]
+    
+    def _fallback_delete(self, *keys: str) -> int:
+        """Suppression mise en file locale, rejouée sur Redis par reconcile()"""
+        return self.fallback.delete(*keys) if self.fallback else 0
+    
+    async def delete(self, key: str) -> bool:
+        """Supprime une clé (mise en file si Redis est indisponible)"""
+        if not await self.connect():
+            self._fallback_delete(key)
+            return False
+        
+        try:
+            cache_metrics.record_delete(key_prefix(key), await self.client.delete(key))
+            return True
+        except Exception as e:
+            self._error(f"DELETE {key}", e, key)
+            self._fallback_delete(key)
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        """Vérifie si une clé existe"""
+        if not await self.connect():
+            return False
+        
+        try:
+            return await self.client.exists(key) > 0
+        except Exception as e:
+            self._error(f"EXISTS {key}", e, key)
+            return False
+    
+    async def incr(self, key: str, amount: int = 1) -> int:
+        """Incrémente une valeur (1 si Redis indisponible, comme RedisCache.incr)"""
+        if not await self.connect():
+            return 1
+        
+        try:
+            return await self.client.incr(key, amount)
+        except Exception as e:
+            self._error(f"INCR {key}", e, key)
+            return 1
+    
+    async def expire(self, key: str, seconds: int) -> bool:
+        """Définit un TTL sur une clé existante"""
+        if not await self.connect():
+            return False
+        
+        try:
+            return await self.client.expire(key, seconds)
+        except Exception as e:
+            self._error(f"EXPIRE {key}", e, key)
+            return False
+    
+    # ==================== MULTI-CLÉS ====================
+    
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False):
+        """
+        Context manager asynchrone: regroupe des commandes en un aller-retour
+        
+        Usage:
+            async with async_redis_cache.pipeline() as pipe:
+                pipe.get("a")
+                pipe.incr("b")
+            value, count = pipe.results
+        """
+        pipe = self.client.pipeline(transaction=transaction) if await self.connect() else None
+        batch = AsyncCachePipeline(self, pipe)
+        yield batch
+        try:
+            await batch.execute()
+        except Exception as e:
+            self._error(f"PIPELINE ({len(batch)} commandes)", e)
+            batch.results = [None] * len(batch)
+    
+    async def get_many(self, keys: list) -> dict:
+        """Récupère plusieurs valeurs en un aller-retour (MGET): {clé: valeur} des clés présentes"""
+        if not keys or not await self.connect():
+            return {}
+        
+        try:
+            started = time.perf_counter()
+            values = await self.client.mget(keys)
+            cache_metrics.record_latency('get_many', common_prefix(keys), (time.perf_counter() - started) * 1000)
+            decoded = {key: self._decode(key, value) for key, value in zip(keys, values)}
+            return {key: value for key, value in decoded.items() if value is not None}
+        except Exception as e:
+            self._error(f"MGET ({len(keys)} clés)", e, keys[0])
+            return {}
+    
+    async def set_many(self, mapping: dict, ttl: int = 300, ttls: Optional[dict] = None,
+                       tags: Optional[dict] = None) -> bool:
+        """Stocke plusieurs valeurs en un aller-retour (TTL et tags par clé)"""
+        if not mapping or not await self.connect():
+            return False
+        
+        ttls = ttls or {}
+        tags = tags or {}
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ttls.get(key, ttl), tags=tags.get(key))
+        return pipe.results is not None and None not in pipe.results
+    
+    async def _unlink(self, keys: list) -> int:
+        try:
+            return await self.client.unlink(*keys)
+        except redis.ResponseError:
+            return await self.client.delete(*keys)
+    
+    async def _unlink_iter(self, keys) -> int:
+        """Supprime les clés d'un itérateur (sync ou async) par lots de UNLINK_BATCH_SIZE"""
+        deleted = 0
+        batch = []
+        
+        async def flush():
+            nonlocal deleted, batch
+            if batch:
+                deleted += await self._unlink(batch)
+                batch = []
+        
+        if hasattr(keys, '__aiter__'):
+            async for key in keys:
+                batch.append(key)
+                if len(batch) >= UNLINK_BATCH_SIZE:
+                    await flush()
+        else:
+            for key in keys:
+                batch.append(key)
+                if len(batch) >= UNLINK_BATCH_SIZE:
+                    await flush()
+        await flush()
+        return deleted
+    
+    async def delete_many(self, keys: list) -> int:
+        """Supprime plusieurs clés (UNLINK par lots, mises en file si Redis est indisponible)"""
+        if not keys:
+            return 0
+        if not await self.connect():
+            return self._fallback_delete(*keys)
+        
+        try:
+            deleted = await self._unlink_iter(keys)
+            cache_metrics.record_delete(common_prefix(keys), deleted)
+            return deleted
+        except Exception as e:
+            self._error(f"DELETE_MANY ({len(keys)} clés)", e, keys[0])
+            return self._fallback_delete(*keys)
+    
+    # ==================== INVALIDATION ====================
+    
+    async def flush_pattern(self, pattern: str) -> int:
+        """Supprime les clés d'un pattern (SCAN + UNLINK par lots, mis en file si Redis est indisponible)"""
+        if not await self.connect():
+            return self.fallback.invalidate_pattern(pattern) if self.fallback else 0
+        
+        try:
+            return await self._unlink_iter(self.client.scan_iter(match=pattern, count=SCAN_COUNT))
+        except Exception as e:
+            self._error(f"FLUSH_PATTERN {pattern}", e, pattern)
+            return self.fallback.invalidate_pattern(pattern) if self.fallback else 0
+    
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Supprime les clés enregistrées sous des tags, puis les ensembles (mis en file si Redis est indisponible)"""
+        if not tags:
+            return 0
+        if not await self.connect():
+            return self.fallback.invalidate_tags(*tags) if self.fallback else 0
+        
+        deleted = 0
+        for tag in tags:
+            name = tag_key(tag)
+            try:
+                deleted += await self._unlink_iter(self.client.sscan_iter(name, count=SCAN_COUNT))
+                await self._unlink([name])
+            except Exception as e:
+                self._error(f"INVALIDATE_TAG {tag}", e, tag)
+                if self.fallback is not None:
+                    deleted += self.fallback.invalidate_tags(tag)
+        return deleted
+    
+    # ==================== SCRIPTS ET BAUX ====================
+    
+    async def run_script(self, source: str, keys: list = (), args: list = ()) -> Any:
+        """Exécute un script Lua (EVALSHA), None si Redis indisponible ou erreur"""
+        if not await self.connect():
+            return None
+        
+        try:
+            script = self._scripts.get(source)
+            if script is None:
+                script = self._scripts[source] = self.client.register_script(source)
+            return await script(keys=list(keys), args=list(args), client=self.client)
+        except Exception as e:
+            self._error(f"SCRIPT {keys}", e, keys[0] if keys else None)
+            return None
+    
+    async def acquire_lease(self, key: str, ttl_ms: int) -> Optional[str]:
+        """Prend le bail de calcul d'une clé (voir RedisCache.acquire_lease)"""
+        token = uuid.uuid4().hex
+        if not await self.connect():
+            return token
+        
+        try:
+            if await self.client.set(lease_key(key), token, nx=True, px=ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            self._error(f"LEASE {key}", e, key)
+            return token
+    
+    async def release_lease(self, key: str, token: str) -> bool:
+        """Libère un bail s'il appartient encore au jeton"""
+        if not token:
+            return False
+        return bool(await self.run_script(_RELEASE_LEASE_SCRIPT, keys=[lease_key(key)], args=[token]))
+
+# Instance globale du cache asynchrone (boucle principale du worker / des bots)
+async_redis_cache = AsyncRedisCache()
+
+class AsyncKeyLocks:
+    """Verrous asyncio par clé, supprimés quand plus aucune tâche ne les attend"""
+    
+    def __init__(self):
+        self._locks = {}
+    
+    @asynccontextmanager
+    async def hold(self, key: str):
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(key, None)
+
+def async_cache_result(ttl: int = 300, key_prefix: str = None, l1_ttl: int = 0, l1_maxsize: int = 1024,
+                       stale_ttl: int = 0, lock_timeout: float = 10, version: int = 1,
+                       cache: AsyncRedisCache = None):
+    """
+    Décorateur de coroutine, équivalent asynchrone de cache_result
+    
+    Mêmes clés et même format (enveloppe stale-while-revalidate comprise) que
+    cache_result: une fonction sync et une coroutine décorées avec le même
+    key_prefix, le même nom, la même version et la même signature partagent
+    leurs entrées.
+    
+    Args:
+        cache: Instance AsyncRedisCache (défaut: async_redis_cache)
+        (autres arguments: voir cache_result)
+    
+    Usage:
+        @async_cache_result(ttl=600, key_prefix="landing", stale_ttl=60)
+        async def get_landing_page(slug):
+            return await fetch_from_database(slug)
+    """
+    def decorator(func: Callable) -> Callable:
+        stats = _cache_result_stats.setdefault(f"{func.__module__}.{func.__qualname__}", CacheResultStats())
+        local = LRUCache(maxsize=l1_maxsize, ttl=min(l1_ttl, ttl)) if l1_ttl else None
+        lease_ms = int(lock_timeout * 1000)
+        build_key = CacheKeyBuilder(func, key_prefix, version)
+        locks = AsyncKeyLocks()
+        refreshing = set()
+        
+        def backend():
+            return cache or async_redis_cache
+        
+        async def load(cache_key):
+            """Lit Redis: (valeur, fraîche), (None, False) si absente"""
+            cached = await backend().get(cache_key)
+            if cached is None:
+                return None, False
+            if stale_ttl and isinstance(cached, dict) and _SWR_FIELD in cached:
+                return cached['value'], cached[_SWR_FIELD] > time.time()
+            return cached, True
+        
+        async def store(cache_key, result):
+            if local is not None:
+                local.set(cache_key, result)
+            if stale_ttl:
+                await backend().set(cache_key, {_SWR_FIELD: time.time() + ttl, 'value': result}, ttl + stale_ttl)
+            else:
+                await backend().set(cache_key, result, ttl)
+        
+        async def refresh(cache_key, token, args, kwargs):
+            """Recalcul en tâche de fond d'une valeur périmée (bail déjà pris)"""
+            try:
+                await store(cache_key, await func(*args, **kwargs))
+            except Exception as e:
+                logger.error(f"Erreur rafraîchissement cache {cache_key}: {e}")
+            finally:
+                await backend().release_lease(cache_key, token)
+        
+        async def wait_for(cache_key):
+            """Attend le résultat calculé par le détenteur du bail"""
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LEASE_POLL_INTERVAL)
+                value, _ = await load(cache_key)
+                if value is not None:
+                    return value
+                if not await backend().exists(lease_key(cache_key)):
+                    break
+            return None
+        
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = build_key(args, kwargs)
+            
+            if local is not None:
+                value = local.get(cache_key)
+                if value is not None:
+                    stats.count('l1_hits')
+                    return value
+            
+            value, fresh = await load(cache_key)
+            if value is not None:
+                if fresh:
+                    stats.count('redis_hits')
+                    if local is not None:
+                        local.set(cache_key, value)
+                    return value
+                # Périmée: servie telle quelle, le détenteur du bail la recalcule
+                stats.count('stale_hits')
+                token = await backend().acquire_lease(cache_key, lease_ms)
+                if token:
+                    task = asyncio.create_task(refresh(cache_key, token, args, kwargs))
+                    refreshing.add(task)
+                    task.add_done_callback(refreshing.discard)
+                return value
+            
+            async with locks.hold(cache_key):
+                # Le cache a pu être rempli pendant l'attente du verrou
+                value, _ = await load(cache_key)
+                if value is not None:
+                    stats.count('coalesced')
+                    return value
+                
+                token = await backend().acquire_lease(cache_key, lease_ms)
+                if token is None:
+                    value = await wait_for(cache_key)
+                    if value is not None:
+                        stats.count('coalesced')
+                        return value
+                
+                stats.count('misses')
+                try:
+                    result = await func(*args, **kwargs)
+                    await store(cache_key, result)
+                finally:
+                    await backend().release_lease(cache_key, token)
+            
+            return result
+        
+        wrapper.cache_stats = stats.snapshot
+        wrapper.cache_key = lambda *args, **kwargs: build_key(args, kwargs)
+        return wrapper
+    return decorator
+
+# Export des fonctions principales
+__all__ = [
+    'AsyncRedisCache',
+    'AsyncCachePipeline',
+    'async_redis_cache',
+    'async_cache_result'
+]
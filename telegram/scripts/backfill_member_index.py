@@ -0,0 +1,41 @@
+# telegram/scripts/backfill_member_index.py
+"""
+Construit l'index telegram_member_index pour les membres existants
+
+Usage (depuis telegram/):
+    python scripts/backfill_member_index.py [--batch-size 400]
+
+Une fois exécuté, MEMBER_INDEX_QUERY_FALLBACK=false désactive le repli
+sur les requêtes where() dans les webhooks.
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.MemberIndexService import member_index_service, BACKFILL_BATCH_SIZE
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de l'index membres Telegram")
+    parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE)
+    args = parser.parse_args()
+    
+    scanned = member_index_service.backfill(batch_size=args.batch_size)
+    print(f"✅ {scanned} membres indexés")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# telegram/scripts/migrate_collected_email_ids.py
+"""
+Migre collected_emails vers les IDs déterministes (creatorId + email normalisé)
+
+Chaque document legacy est fusionné dans le document cible puis supprimé, dans
+le même batch. Les doublons sont regroupés en un seul passage (stream): les
+compteurs sont additionnés avec Increment, le premier document rencontré
+fournit les autres champs. Relancer le script après une interruption est sûr.
+
+Usage (depuis telegram/):
+    python scripts/migrate_collected_email_ids.py [--dry-run] [--batch-size 200]
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from firebase_admin import firestore
+from config.database import get_db
+from services.FirebaseService import collected_email_id, normalize_email
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# 2 écritures par document migré, Firestore limite un batch à 500
+DEFAULT_BATCH_SIZE = 200
+
+
+def legacy_totals(data):
+    """Achats et montant représentés par un document legacy"""
+    # Copie écrite par la page de succès (l'achat est déjà porté par le document du webhook)
+    if 'amount' not in data and 'customerName' not in data:
+        return 0, 0
+    # Le premier achat n'était pas compté dans totalPurchases/totalAmount
+    purchases = (data.get('totalPurchases') or 0) + 1
+    amount = (data.get('amount') or 0) + (data.get('totalAmount') or 0)
+    return purchases, amount
+
+
+def migrate(batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    db = get_db()
+    collection = db.collection('collected_emails')
+    
+    seen = set()
+    counted_sessions = set()
+    stats = {'scanned': 0, 'moved': 0, 'merged': 0, 'skipped': 0}
+    
+    batch = db.batch()
+    pending = 0
+    
+    for doc in collection.stream():
+        stats['scanned'] += 1
+        data = doc.to_dict()
+        
+        if not data.get('email'):
+            stats['skipped'] += 1
+            continue
+        
+        target_id = collected_email_id(data.get('creatorId', ''), data['email'])
+        if doc.id == target_id:
+            seen.add(target_id)
+            continue
+        
+        target_ref = collection.document(target_id)
+        purchases, amount = legacy_totals(data)
+        
+        # Webhook et page de succès créaient chacun un document pour le même achat;
+        # seul un document qui porte l'achat marque la session (ordre du stream quelconque)
+        session_id = data.get('stripeSessionId')
+        if session_id and (target_id, session_id) in counted_sessions:
+            purchases, amount = 0, 0
+        elif session_id and purchases:
+            counted_sessions.add((target_id, session_id))
+        
+        if target_id not in seen and not target_ref.get().exists:
+            new_data = dict(data)
+            new_data.update({
+                'emailNormalized': normalize_email(data['email']),
+                'totalPurchases': purchases,
+                'totalAmount': amount
+            })
+            batch.set(target_ref, new_data)
+            stats['moved'] += 1
+        else:
+            batch.set(target_ref, {
+                'totalPurchases': firestore.Increment(purchases),
+                'totalAmount': firestore.Increment(amount),
+                'opens': firestore.Increment(data.get('opens') or 0),
+                'clicks': firestore.Increment(data.get('clicks') or 0)
+            }, merge=True)
+            stats['merged'] += 1
+        
+        seen.add(target_id)
+        batch.delete(doc.reference)
+        pending += 1
+        
+        if pending >= batch_size:
+            if not dry_run:
+                batch.commit()
+            batch = db.batch()
+            pending = 0
+            logger.info(f"📧 {stats['scanned']} documents scanned")
+    
+    if pending and not dry_run:
+        batch.commit()
+    
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migration des IDs de collected_emails")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+    
+    stats = migrate(batch_size=args.batch_size, dry_run=args.dry_run)
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(f"✅ {prefix}{stats['scanned']} documents: {stats['moved']} déplacés, "
+          f"{stats['merged']} fusionnés, {stats['skipped']} ignorés")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# telegram/scripts/rebuild_stats.py
+"""
+Recalcule creator_stats et page_stats depuis sales et stats_events
+
+Usage (depuis telegram/):
+    python scripts/rebuild_stats.py [--creator-id ID]
+
+À lancer hors des pics de webhooks: les événements appliqués pendant la
+reconstruction peuvent être écrasés par le recalcul.
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.StatsService import stats_service
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruction des agrégats de ventes")
+    parser.add_argument('--creator-id', default=None)
+    args = parser.parse_args()
+    
+    written = stats_service.rebuild(creator_id=args.creator_id)
+    print(f"✅ {written} documents d'agrégats recalculés")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,11 @@
 import stripe
 import os
 from datetime import datetime
-from config.database import db
+from config.database import get_db
 import firebase_admin
 from firebase_admin import firestore
+from services.FirebaseService import firebase_service
+from services.Pagination import fetch_page, iter_pages, serialize_document, DEFAULT_PAGE_SIZE
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,7 +13,10 @@ logger = logging.getLogger(__name__)
 class CheckoutService:
     def __init__(self):
         stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
-        self.db = db
+    
+    @property
+    def db(self):
+        return get_db()
         
     def create_multi_currency_prices(self, product_id, base_price_usd, interval='month'):
         """Créer des prix pour toutes les devises"""
@@ -161,8 +166,8 @@ class CheckoutService:
                 'error': str(e)
             }
     
-    def handle_checkout_completed(self, session):
-        """Traiter une session de checkout complétée - inclut la collecte d'email"""
+    def handle_checkout_completed(self, session, event_id=None):
+        """Traiter une session de checkout complétée - inclut la collecte d'email (event_id: déduplication des retries)"""
         try:
             # Extraire les données de la session
             customer_email = session.get('customer_email')
@@ -194,7 +199,7 @@ class CheckoutService:
             # COLLECTE D'EMAIL POUR V1
             if customer_email and creator_id:
                 try:
-                    # Sauvegarder dans collected_emails
+                    # Sauvegarder dans collected_emails (document unique par créateur + email)
                     email_data = {
                         'email': customer_email,
                         'customerName': customer_details.get('name', ''),
@@ -206,30 +211,12 @@ class CheckoutService:
                         'saleId': sale_ref[1].id,
                         'amount': amount_total,
                         'currency': currency,
-                        'createdAt': firestore.SERVER_TIMESTAMP,
-                        'opens': 0,
-                        'clicks': 0,
                         'status': 'active'
                     }
                     
-                    # Vérifier si l'email existe déjà pour ce créateur
-                    existing_emails = self.db.collection('collected_emails').where(
-                        'email', '==', customer_email
-                    ).where('creatorId', '==', creator_id).limit(1).get()
-                    
-                    if not list(existing_emails):
-                        # Nouvel email, l'ajouter
-                        email_ref = self.db.collection('collected_emails').add(email_data)
-                        logger.info(f"✅ Email collected: {customer_email} (ID: {email_ref[1].id})")
-                    else:
-                        # Email existe déjà, mettre à jour la dernière transaction
-                        for doc in existing_emails:
-                            doc.reference.update({
-                                'lastPurchaseAt': firestore.SERVER_TIMESTAMP,
-                                'totalPurchases': firestore.Increment(1),
-                                'totalAmount': firestore.Increment(amount_total)
-                            })
-                        logger.info(f"✅ Email updated: {customer_email}")
+                    email_id = firebase_service.upsert_collected_email(email_data, amount=amount_total,
+                                                                      event_id=event_id)
+                    logger.info(f"✅ Email collected: {customer_email} (ID: {email_id})")
                     
                 except Exception as email_error:
                     logger.error(f"❌ Error collecting email: {email_error}")
@@ -308,23 +295,32 @@ class CheckoutService:
             logger.error(f"Error retrieving checkout session: {e}")
             return None
     
+    def _sales_query(self, creator_id):
+        return self.db.collection("sales").where("creator_id", "==", creator_id)
+    
+    @staticmethod
+    def _serialize_sale(doc):
+        return serialize_document(doc, timestamp_fields=('created_at',))
+    
+    def get_creator_sales_page(self, creator_id, page_size=DEFAULT_PAGE_SIZE, page_token=None):
+        """
+        Récupérer une page de ventes d'un créateur (plus récentes d'abord)
+        
+        Returns:
+            Dict {'items': [...], 'next_page_token': str ou None}
+        """
+        return fetch_page(self._sales_query(creator_id), "created_at", page_size, page_token,
+                          serializer=self._serialize_sale)
+    
+    def iter_creator_sales_pages(self, creator_id, page_size=DEFAULT_PAGE_SIZE, page_token=None):
+        """Générateur des pages de ventes d'un créateur, lues à la demande"""
+        return iter_pages(self._sales_query(creator_id), "created_at", page_size, page_token,
+                          serializer=self._serialize_sale)
+    
     def list_creator_sales(self, creator_id, limit=100):
-        """Lister les ventes d'un créateur"""
+        """Lister les ventes d'un créateur (première page)"""
         try:
-            sales = self.db.collection("sales").where(
-                "creator_id", "==", creator_id
-            ).order_by("created_at", direction=firestore.Query.DESCENDING).limit(limit).stream()
-            
-            sales_list = []
-            for doc in sales:
-                sale_data = doc.to_dict()
-                sale_data['id'] = doc.id
-                if 'created_at' in sale_data and sale_data['created_at']:
-                    sale_data['created_at'] = sale_data['created_at'].isoformat() if hasattr(sale_data['created_at'], 'isoformat') else str(sale_data['created_at'])
-                sales_list.append(sale_data)
-            
-            return sales_list
-            
+            return self.get_creator_sales_page(creator_id, page_size=limit)['items']
         except Exception as e:
             logger.error(f"Error listing creator sales: {e}")
             return []
@@ -0,0 +1,154 @@
+# telegram/services/CollectionMirror.py
+"""
+Miroir en mémoire de collections Firestore maintenu par listeners temps réel (on_snapshot)
+"""
+
+import os
+import copy
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Collections lues en boucle sur le parcours de paiement et rarement modifiées
+MIRRORED_COLLECTIONS = ['landingPages', 'telegram_connections', 'users']
+
+# Intervalle (secondes) de vérification de l'état des listeners
+HEALTH_CHECK_INTERVAL = int(os.getenv('FIRESTORE_MIRROR_HEALTH_INTERVAL', 10))
+
+
+class CollectionMirror:
+    """Maintient une copie en mémoire de collections à partir des événements on_snapshot"""
+    
+    def __init__(self, db_getter, collections=None, health_interval=HEALTH_CHECK_INTERVAL):
+        """
+        Args:
+            db_getter: Fonction retournant le client Firestore
+            collections: Collections à répliquer (défaut: MIRRORED_COLLECTIONS)
+            health_interval: Intervalle de vérification des listeners en secondes
+        """
+        self._db_getter = db_getter
+        self.collections = list(collections or MIRRORED_COLLECTIONS)
+        self.health_interval = health_interval
+        self._docs = {c: {} for c in self.collections}
+        self._ready = {c: False for c in self.collections}
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._monitor_thread = None
+        self.resyncs = 0
+    
+    # ==================== CYCLE DE VIE ====================
+    
+    def start(self):
+        """Abonne les listeners et lance la surveillance"""
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            return
+        
+        self._stop_event.clear()
+        for collection in self.collections:
+            self._subscribe(collection)
+        
+        self._monitor_thread = threading.Thread(
+            target=self._monitor, name='firestore-mirror-monitor', daemon=True
+        )
+        self._monitor_thread.start()
+        logger.info(f"✅ Firestore mirror started: {', '.join(self.collections)}")
+    
+    def stop(self):
+        """Arrête les listeners"""
+        self._stop_event.set()
+        for collection in self.collections:
+            self._unsubscribe(collection)
+    
+    def _subscribe(self, collection):
+        """Abonne un listener on_snapshot sur une collection"""
+        with self._lock:
+            self._ready[collection] = False
+        
+        def callback(docs, changes, read_time):
+            self._on_snapshot(collection, docs, changes)
+        
+        try:
+            self._watches[collection] = self._db_getter().collection(collection).on_snapshot(callback)
+        except Exception as e:
+            logger.error(f"Error subscribing mirror for {collection}: {e}")
+            self._watches.pop(collection, None)
+    
+    def _unsubscribe(self, collection):
+        """Ferme le listener d'une collection"""
+        watch = self._watches.pop(collection, None)
+        with self._lock:
+            self._ready[collection] = False
+        if watch:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logger.debug(f"Error closing mirror listener for {collection}: {e}")
+    
+    def _resync(self, collection):
+        """Réabonne une collection après une erreur de listener"""
+        logger.warning(f"⚠️ Firestore mirror resync: {collection}")
+        self.resyncs += 1
+        self._unsubscribe(collection)
+        if not self._stop_event.is_set():
+            self._subscribe(collection)
+    
+    def _monitor(self):
+        """Détecte les listeners arrêtés et les réabonne"""
+        while not self._stop_event.wait(self.health_interval):
+            for collection in self.collections:
+                watch = self._watches.get(collection)
+                if watch is None or not getattr(watch, 'is_active', True):
+                    self._resync(collection)
+    
+    # ==================== ÉVÉNEMENTS ====================
+    
+    def _on_snapshot(self, collection, docs, changes):
+        """Applique un snapshot (complet au premier appel, incrémental ensuite)"""
+        try:
+            with self._lock:
+                if not self._ready[collection]:
+                    self._docs[collection] = {doc.id: doc.to_dict() for doc in docs}
+                    self._ready[collection] = True
+                    logger.info(f"✅ Firestore mirror ready: {collection} ({len(docs)} docs)")
+                    return
+                
+                mirror = self._docs[collection]
+                for change in changes:
+                    doc = change.document
+                    if change.type.name == 'REMOVED':
+                        mirror.pop(doc.id, None)
+                    else:
+                        mirror[doc.id] = doc.to_dict()
+        except Exception as e:
+            logger.error(f"Error applying mirror snapshot for {collection}: {e}")
+            with self._lock:
+                self._ready[collection] = False
+            threading.Thread(target=self._resync, args=(collection,), daemon=True).start()
+    
+    # ==================== LECTURE ====================
+    
+    def is_ready(self, collection):
+        """True si la collection est répliquée et son listener sain"""
+        if not self._ready.get(collection):
+            return False
+        watch = self._watches.get(collection)
+        return watch is not None and getattr(watch, 'is_active', True)
+    
+    def get(self, collection, doc_id):
+        """Retourne une copie du document répliqué, None si absent"""
+        with self._lock:
+            data = self._docs.get(collection, {}).get(doc_id)
+            return copy.deepcopy(data) if data is not None else None
+    
+    def status(self):
+        """État du miroir par collection"""
+        with self._lock:
+            return {
+                'collections': {
+                    c: {'ready': self._ready[c], 'documents': len(self._docs[c])}
+                    for c in self.collections
+                },
+                'resyncs': self.resyncs,
+            }
@@ -0,0 +1,281 @@
+# telegram/services/DocumentCache.py
+"""
+Cache à deux niveaux (LRU en mémoire + Redis) pour les documents Firestore
+
+Les méthodes *_async partagent le niveau local et lisent/écrivent Redis via
+async_redis_cache (mêmes clés, même format): elles ne bloquent pas la boucle
+d'événements.
+"""
+
+import os
+import copy
+import logging
+import threading
+from datetime import datetime
+from google.cloud.firestore_v1 import GeoPoint
+from google.cloud.firestore_v1.base_document import BaseDocumentReference
+from config.database import get_db
+from config.memory_firestore import MemoryDocumentReference
+from redis_cache import redis_cache, LRUCache
+from redis_cache_async import async_redis_cache
+
+logger = logging.getLogger(__name__)
+
+# TTL (secondes) par collection - les pages et users sont aussi modifiés
+# par le backend Node.js, d'où des TTL courts
+COLLECTION_TTLS = {
+    'landingPages': int(os.getenv('CACHE_TTL_LANDING_PAGES', 60)),
+    'users': int(os.getenv('CACHE_TTL_USERS', 120)),
+    'creators': int(os.getenv('CACHE_TTL_CREATORS', 300)),
+    'telegram_connections': int(os.getenv('CACHE_TTL_TELEGRAM_CONNECTIONS', 300)),
+}
+
+DEFAULT_TTL = 60
+
+# Le niveau local n'est pas invalidé par les autres processus: TTL plafonné
+LOCAL_TTL_MAX = int(os.getenv('CACHE_LOCAL_TTL_MAX', 30))
+LOCAL_MAXSIZE = int(os.getenv('CACHE_LOCAL_MAXSIZE', 2048))
+
+_DATETIME_TAG = '__datetime__'
+_REFERENCE_TAG = '__reference__'
+_GEOPOINT_TAG = '__geopoint__'
+
+_DOCUMENT_REFERENCES = (BaseDocumentReference, MemoryDocumentReference)
+
+
+def _to_cacheable(value):
+    """Convertit les dates, références et GeoPoint Firestore en valeurs sérialisables JSON"""
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    if isinstance(value, _DOCUMENT_REFERENCES):
+        return {_REFERENCE_TAG: value.path}
+    if isinstance(value, GeoPoint):
+        return {_GEOPOINT_TAG: [value.latitude, value.longitude]}
+    if isinstance(value, dict):
+        return {k: _to_cacheable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_cacheable(v) for v in value]
+    return value
+
+
+def _from_cacheable(value):
+    """Opération inverse de _to_cacheable (les références sont recréées sur le client sync)"""
+    if isinstance(value, dict):
+        if len(value) == 1:
+            if _DATETIME_TAG in value:
+                return datetime.fromisoformat(value[_DATETIME_TAG])
+            if _REFERENCE_TAG in value:
+                return get_db().document(value[_REFERENCE_TAG])
+            if _GEOPOINT_TAG in value:
+                return GeoPoint(*value[_GEOPOINT_TAG])
+        return {k: _from_cacheable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_from_cacheable(v) for v in value]
+    return value
+
+
+class DocumentCache:
+    """Cache read-through des documents Firestore: L1 local puis L2 Redis"""
+    
+    def __init__(self, ttls=None, local_maxsize=LOCAL_MAXSIZE, enabled=None):
+        self.ttls = dict(COLLECTION_TTLS, **(ttls or {}))
+        self.local = LRUCache(maxsize=local_maxsize, ttl=LOCAL_TTL_MAX)
+        if enabled is None:
+            enabled = os.getenv('FIRESTORE_CACHE_ENABLED', 'true').lower() != 'false'
+        self.enabled = enabled
+        self._stats_lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'redis_hits': 0, 'misses': 0, 'invalidations': 0}
+    
+    @staticmethod
+    def _key(collection, doc_id):
+        return f"fs:{collection}:{doc_id}"
+    
+    def _ttl(self, collection):
+        return self.ttls.get(collection, DEFAULT_TTL)
+    
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+    
+    def _get_local(self, key):
+        data = self.local.get(key)
+        if data is not None:
+            self._count('local_hits')
+            return copy.deepcopy(data)
+        return None
+    
+    def _from_redis(self, collection, key, cached):
+        """Remonte une valeur lue dans Redis au niveau local, compte le hit/miss"""
+        if isinstance(cached, dict):
+            self._count('redis_hits')
+            data = _from_cacheable(cached)
+            self.local.set(key, data, min(self._ttl(collection), LOCAL_TTL_MAX))
+            return copy.deepcopy(data)
+        
+        self._count('misses')
+        return None
+    
+    def _set_local(self, collection, key, data):
+        ttl = self._ttl(collection)
+        self.local.set(key, copy.deepcopy(data), min(ttl, LOCAL_TTL_MAX))
+        return ttl
+    
+    def get(self, collection, doc_id):
+        """Lit un document en cache (L1 puis L2), None si absent"""
+        key = self._key(collection, doc_id)
+        
+        data = self._get_local(key)
+        if data is not None:
+            return data
+        
+        return self._from_redis(collection, key, redis_cache.get(key))
+    
+    def _split_local(self, items):
+        """Sert les documents présents en L1; retourne les clés Redis à lire"""
+        results = {}
+        missing = {}
+        for name, (collection, doc_id) in items.items():
+            key = self._key(collection, doc_id)
+            results[name] = self._get_local(key)
+            if results[name] is None:
+                missing[name] = (collection, key)
+        return results, missing
+    
+    def _apply_redis(self, results, missing, cached):
+        for name, (collection, key) in missing.items():
+            results[name] = self._from_redis(collection, key, cached.get(key))
+        return results
+    
+    def get_many(self, items):
+        """
+        Lit plusieurs documents (L1 puis un seul MGET)
+        
+        Args:
+            items: Dict {nom: (collection, doc_id)}
+        
+        Returns:
+            Dict {nom: données} - None pour les documents absents du cache
+        """
+        results, missing = self._split_local(items)
+        if missing:
+            cached = redis_cache.get_many([key for _, key in missing.values()])
+            self._apply_redis(results, missing, cached)
+        return results
+    
+    def _prepare_many(self, entries):
+        """Écrit les entrées en L1; retourne (valeurs Redis, TTL par clé)"""
+        mapping = {}
+        ttls = {}
+        for collection, doc_id, data in entries:
+            key = self._key(collection, doc_id)
+            ttls[key] = self._set_local(collection, key, data)
+            mapping[key] = _to_cacheable(data)
+        return mapping, ttls
+    
+    def set_many(self, entries):
+        """Stocke plusieurs documents [(collection, doc_id, données)] en un aller-retour (pipeline)"""
+        mapping, ttls = self._prepare_many(entries)
+        if mapping:
+            redis_cache.set_many(mapping, ttls=ttls)
+    
+    def set(self, collection, doc_id, data):
+        """Stocke un document dans les deux niveaux"""
+        key = self._key(collection, doc_id)
+        ttl = self._set_local(collection, key, data)
+        redis_cache.set(key, _to_cacheable(data), ttl)
+    
+    def get_or_load(self, collection, doc_id, loader):
+        """
+        Retourne le document en cache ou l'obtient via loader()
+        
+        Les documents absents (loader() -> None) ne sont pas mis en cache
+        """
+        if not self.enabled or not doc_id:
+            return loader()
+        
+        data = self.get(collection, doc_id)
+        if data is not None:
+            return data
+        
+        data = loader()
+        if data is not None:
+            self.set(collection, doc_id, data)
+        return data
+    
+    def invalidate(self, collection, doc_id):
+        """Invalide un document dans les deux niveaux"""
+        key = self._key(collection, doc_id)
+        self.local.delete(key)
+        redis_cache.delete(key)
+        self._count('invalidations')
+    
+    # ==================== ASYNC ====================
+    
+    async def get_async(self, collection, doc_id):
+        """Équivalent async de get"""
+        key = self._key(collection, doc_id)
+        
+        data = self._get_local(key)
+        if data is not None:
+            return data
+        
+        return self._from_redis(collection, key, await async_redis_cache.get(key))
+    
+    async def get_many_async(self, items):
+        """
+        Lit plusieurs documents (L1 puis un seul MGET)
+        
+        Args:
+            items: Dict {nom: (collection, doc_id)}
+        
+        Returns:
+            Dict {nom: données} - None pour les documents absents du cache
+        """
+        results, missing = self._split_local(items)
+        if missing:
+            cached = await async_redis_cache.get_many([key for _, key in missing.values()])
+            self._apply_redis(results, missing, cached)
+        return results
+    
+    async def set_async(self, collection, doc_id, data):
+        """Équivalent async de set"""
+        key = self._key(collection, doc_id)
+        ttl = self._set_local(collection, key, data)
+        await async_redis_cache.set(key, _to_cacheable(data), ttl)
+    
+    async def set_many_async(self, entries):
+        """Stocke plusieurs documents [(collection, doc_id, données)] en un aller-retour"""
+        mapping, ttls = self._prepare_many(entries)
+        if mapping:
+            await async_redis_cache.set_many(mapping, ttls=ttls)
+    
+    async def get_or_load_async(self, collection, doc_id, loader):
+        """Équivalent async de get_or_load (loader est une coroutine sans argument)"""
+        if not self.enabled or not doc_id:
+            return await loader()
+        
+        data = await self.get_async(collection, doc_id)
+        if data is not None:
+            return data
+        
+        data = await loader()
+        if data is not None:
+            await self.set_async(collection, doc_id, data)
+        return data
+    
+    async def invalidate_async(self, collection, doc_id):
+        """Équivalent async de invalidate"""
+        key = self._key(collection, doc_id)
+        self.local.delete(key)
+        await async_redis_cache.delete(key)
+        self._count('invalidations')
+    
+    def stats(self):
+        """Compteurs hit/miss du cache"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        hits = stats['local_hits'] + stats['redis_hits']
+        total = hits + stats['misses']
+        stats['hit_ratio'] = round(hits / total, 4) if total else 0.0
+        stats['local_size'] = len(self.local)
+        return stats
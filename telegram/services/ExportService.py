@@ -0,0 +1,178 @@
+# telegram/services/ExportService.py
+"""
+Export en flux (CSV / NDJSON) des ventes et emails collectés d'un créateur
+
+Les documents sont lus page par page avec un curseur Firestore et écrits au
+fur et à mesure: la mémoire utilisée ne dépend que de la taille de page.
+Chaque ligne porte un curseur permettant de reprendre l'export après elle.
+Le flux se termine par une ligne de fin (export complet) ou d'erreur (curseur
+de reprise): en CSV une ligne de commentaire '#', en NDJSON un objet JSON.
+"""
+
+import io
+import os
+import csv
+import re
+import json
+import logging
+from config.database import get_db
+from services.Pagination import (iter_pages, encode_page_token, decode_page_token, serialize_document,
+                                 InvalidPageToken)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', 500))
+
+# Jeux de données exportables: collection, schémas (champ créateur, champ de tri)
+# lus l'un après l'autre, colonnes CSV
+DATASETS = {
+    'emails': {
+        'collection': 'collected_emails',
+        'schemas': [('creatorId', 'createdAt')],
+        'columns': ['id', 'email', 'customerName', 'landingPageId', 'source',
+                    'amount', 'currency', 'status', 'createdAt'],
+    },
+    'sales': {
+        'collection': 'sales',
+        # Ventes d'app.py (camelCase) puis de CheckoutService (snake_case)
+        'schemas': [('creatorId', 'createdAt'), ('creator_id', 'created_at')],
+        'columns': ['id', 'email', 'amount', 'currency', 'pageId', 'status', 'type',
+                    'stripeSessionId', 'stripeSubscriptionId', 'createdAt'],
+    },
+}
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+CURSOR_FIELD = 'cursor'
+
+
+def _camel_case(key):
+    """creator_id -> creatorId (les colonnes d'export sont en camelCase)"""
+    return re.sub(r'_([a-z0-9])', lambda match: match.group(1).upper(), key)
+
+
+class ExportService:
+    """Génère les exports ligne par ligne à partir de pages Firestore"""
+    
+    def __init__(self, page_size=EXPORT_PAGE_SIZE):
+        self.page_size = page_size
+    
+    @property
+    def db(self):
+        return get_db()
+    
+    @staticmethod
+    def _resume_schema(dataset, page_token):
+        """Index du schéma auquel appartient le jeton (son champ de tri)"""
+        schemas = DATASETS[dataset]['schemas']
+        for index, (_, order_field) in enumerate(schemas):
+            try:
+                decode_page_token(page_token, order_field)
+                return index
+            except InvalidPageToken:
+                continue
+        raise InvalidPageToken(f"Invalid page token for {dataset}")
+    
+    def validate(self, dataset, fmt, page_token=None):
+        """
+        Vérifie les paramètres avant l'ouverture du flux
+        
+        Raises:
+            ValueError: jeu de données, format ou jeton invalide
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset: {dataset}")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        if page_token:
+            self._resume_schema(dataset, page_token)
+    
+    def _rows(self, dataset, creator_id, page_token=None):
+        """Générateur de pages de lignes (dicts) avec leur curseur de reprise"""
+        config = DATASETS[dataset]
+        first = self._resume_schema(dataset, page_token) if page_token else 0
+        
+        for index, (creator_field, order_field) in enumerate(config['schemas']):
+            if index < first:
+                continue
+            
+            def serializer(doc, order_field=order_field):
+                cursor = encode_page_token(order_field, doc.get(order_field), doc.id)
+                row = serialize_document(doc, timestamp_fields=(order_field,))
+                row = {_camel_case(key): value for key, value in row.items()}
+                row[CURSOR_FIELD] = cursor
+                return row
+            
+            query = self.db.collection(config['collection']).where(creator_field, '==', creator_id)
+            token = page_token if index == first else None
+            for page in iter_pages(query, order_field, self.page_size, token, serializer=serializer):
+                yield page['items']
+    
+    def _csv_chunks(self, dataset, pages, page_token=None):
+        """Blocs CSV (en-tête, puis un bloc par page)"""
+        columns = DATASETS[dataset]['columns'] + [CURSOR_FIELD]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+        
+        # Pas d'en-tête en reprise: le bloc est concaténé au fichier déjà reçu
+        if not page_token:
+            writer.writeheader()
+            yield buffer.getvalue()
+        
+        for rows in pages:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue()
+    
+    @staticmethod
+    def _ndjson_chunks(pages):
+        """Blocs NDJSON (un bloc par page)"""
+        for rows in pages:
+            yield ''.join(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in rows)
+    
+    @staticmethod
+    def _trailer(fmt, rows, error=None, cursor=None):
+        """Dernière ligne du flux: fin de l'export ou erreur avec le curseur de reprise"""
+        if fmt == 'ndjson':
+            status = {'error': error, CURSOR_FIELD: cursor} if error else {'complete': True}
+            return json.dumps(dict(status, rows=rows)) + '\n'
+        if error:
+            return f"# error: {error}; rows: {rows}; {CURSOR_FIELD}: {cursor or ''}\n"
+        return f"# complete; rows: {rows}\n"
+    
+    def stream(self, dataset, creator_id, fmt='csv', page_token=None):
+        """
+        Générateur de l'export complet, terminé par une ligne de fin ou d'erreur
+        
+        Args:
+            dataset: 'emails' ou 'sales'
+            creator_id: ID du créateur
+            fmt: 'csv' ou 'ndjson'
+            page_token: Curseur d'une ligne déjà reçue pour reprendre après elle
+        """
+        progress = {'rows': 0, 'cursor': page_token}
+        
+        def pages():
+            for rows in self._rows(dataset, creator_id, page_token):
+                yield rows
+                progress['rows'] += len(rows)
+                progress['cursor'] = rows[-1][CURSOR_FIELD]
+        
+        chunks = self._csv_chunks(dataset, pages(), page_token) if fmt == 'csv' else self._ndjson_chunks(pages())
+        try:
+            yield from chunks
+        except Exception as e:
+            # Les en-têtes sont déjà envoyés: le client reprend avec le curseur de la ligne d'erreur
+            logger.error(f"Export {dataset} interrupted for creator {creator_id} after {progress['rows']} rows: {e}")
+            yield self._trailer(fmt, progress['rows'], 'export interrupted', progress['cursor'])
+            return
+        logger.info(f"✅ Export {dataset} ({fmt}) done for creator {creator_id}: {progress['rows']} rows")
+        yield self._trailer(fmt, progress['rows'])
+
+
+# Instance globale du service
+export_service = ExportService()
@@ -4,20 +4,41 @@ Service Firebase pour le service Python MAKERHUB V1
 """
 
 import os
+import hashlib
 import logging
 from datetime import datetime
-from config.database import db, get_db, initialize_firebase, COLLECTIONS
+from config.database import db, get_db, get_async_db, initialize_firebase, COLLECTIONS
 from firebase_admin import firestore
+from google.api_core.exceptions import NotFound, AlreadyExists, Conflict
+from services.DocumentCache import DocumentCache
+from services.CollectionMirror import CollectionMirror
+from services.Pagination import fetch_page, iter_pages, DEFAULT_PAGE_SIZE
 
 logger = logging.getLogger(__name__)
 
+# Marqueurs des achats déjà comptés dans collected_emails (un par événement Stripe)
+COLLECTED_EMAIL_EVENTS_COLLECTION = 'collected_email_events'
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def collected_email_id(creator_id, email):
+    """ID déterministe d'un email collecté: hash de (creatorId, email normalisé)"""
+    key = f"{creator_id}:{normalize_email(email)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
 
 class FirebaseService:
     """Service Firebase pour les opérations de base de données"""
     
     def __init__(self):
         self._db = None
+        self._async_db = None
         self._initialized = False
+        self.cache = DocumentCache()
+        self.mirror = None
     
     def _get_db(self):
         """Lazy initialization de la connexion Firebase"""
@@ -26,12 +47,139 @@ class FirebaseService:
             self._initialized = True
         if not self._db:
             self._db = get_db()
+            if os.getenv('FIRESTORE_MIRROR_ENABLED', 'false').lower() == 'true':
+                self.enable_mirror()
         return self._db
     
+    def enable_mirror(self, collections=None):
+        """Active le miroir temps réel des collections chaudes (opt-in)"""
+        if self.mirror is None:
+            self.mirror = CollectionMirror(self._get_db, collections)
+            self.mirror.start()
+        return self.mirror
+    
+    def disable_mirror(self):
+        """Arrête le miroir temps réel"""
+        if self.mirror:
+            self.mirror.stop()
+            self.mirror = None
+    
     @property
     def db(self):
         return self._get_db()
     
+    @property
+    def async_db(self):
+        """Client Firestore async (AsyncClient) pour les composants asyncio"""
+        if not self._async_db:
+            self._async_db = get_async_db()
+        return self._async_db
+    
+    def _fetch_document(self, collection, doc_id):
+        """Lit un document directement dans Firestore"""
+        doc = self.db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+    
+    def _get_cached_document(self, collection, doc_id, include_id=True):
+        """Lit un document via le miroir, puis le cache L1/L2, Firestore en dernier recours"""
+        if doc_id and self.mirror and self.mirror.is_ready(collection):
+            data = self.mirror.get(collection, doc_id)
+        else:
+            data = self.cache.get_or_load(
+                collection, doc_id,
+                lambda: self._fetch_document(collection, doc_id)
+            )
+        
+        if data is not None and include_id:
+            data['id'] = doc_id
+        return data
+    
+    def _document_ref(self, ref, client=None):
+        """Normalise une référence: DocumentReference, chemin 'collection/id' ou tuple (collection, id)"""
+        client = client or self.db
+        if isinstance(ref, str):
+            return client.document(ref)
+        if isinstance(ref, (tuple, list)):
+            return client.collection(ref[0]).document(ref[1])
+        return ref
+    
+    def _resolve_mirrored_refs(self, refs, client):
+        """Sert les documents présents dans le miroir; retourne les références à chercher ailleurs"""
+        results = {}
+        pending = {}
+        
+        for ref in refs:
+            doc_ref = self._document_ref(ref, client)
+            collection, doc_id = doc_ref.parent.id, doc_ref.id
+            
+            if self.mirror and self.mirror.is_ready(collection):
+                data = self.mirror.get(collection, doc_id)
+                if data is not None:
+                    data['id'] = doc_id
+                results[doc_ref.path] = data
+            else:
+                results[doc_ref.path] = None
+                pending[doc_ref.path] = doc_ref
+        
+        return results, pending
+    
+    @staticmethod
+    def _apply_cached(results, pending, cached):
+        """Place les documents trouvés en cache dans les résultats; retourne ceux à relire"""
+        to_fetch = []
+        for path, doc_ref in pending.items():
+            data = cached.get(path)
+            if data is None:
+                to_fetch.append(doc_ref)
+                continue
+            data['id'] = doc_ref.id
+            results[path] = data
+        return to_fetch
+    
+    def _cached_refs(self, pending):
+        """Arguments de DocumentCache.get_many pour les références à chercher en cache"""
+        return {path: (ref.parent.id, ref.id) for path, ref in pending.items()}
+    
+    def _store_fetched(self, results, doc):
+        """Enregistre un snapshot lu via get_all dans les résultats; retourne l'entrée à mettre en cache"""
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        results[doc.reference.path] = dict(data, id=doc.id)
+        return (doc.reference.parent.id, doc.id, data)
+    
+    def get_many(self, refs):
+        """
+        Récupère plusieurs documents (collections mixtes) en un seul appel get_all
+        
+        Les documents déjà présents dans le miroir ou le cache ne sont pas relus.
+        
+        Args:
+            refs: DocumentReference, chemins 'collection/id' ou tuples (collection, id)
+        
+        Returns:
+            Dict {chemin: données avec 'id'} - None pour les documents absents
+        """
+        results, pending = self._resolve_mirrored_refs(refs, self.db)
+        cached = {}
+        if self.cache.enabled and pending:
+            cached = self.cache.get_many(self._cached_refs(pending))
+        to_fetch = self._apply_cached(results, pending, cached)
+        
+        if to_fetch:
+            fetched = [self._store_fetched(results, doc) for doc in self.db.get_all(to_fetch)]
+            if self.cache.enabled:
+                self.cache.set_many([entry for entry in fetched if entry is not None])
+        
+        return results
+    
+    def get_cache_stats(self):
+        """Compteurs hit/miss du cache de documents (et état du miroir si actif)"""
+        stats = self.cache.stats()
+        if self.mirror:
+            stats['mirror'] = self.mirror.status()
+        return stats
+    
     # ==================== HEALTH CHECK ====================
     
     def check_connection(self):
@@ -48,12 +196,7 @@ class FirebaseService:
     def get_landing_page(self, page_id):
         """Récupère une landing page par ID"""
         try:
-            doc = self.db.collection('landingPages').document(page_id).get()
-            if doc.exists:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                return data
-            return None
+            return self._get_cached_document('landingPages', page_id)
         except Exception as e:
             logger.error(f"Error getting landing page {page_id}: {e}")
             return None
@@ -63,6 +206,7 @@ class FirebaseService:
         try:
             data['updatedAt'] = firestore.SERVER_TIMESTAMP
             self.db.collection('landingPages').document(page_id).update(data)
+            self.cache.invalidate('landingPages', page_id)
             return True
         except Exception as e:
             logger.error(f"Error updating landing page {page_id}: {e}")
@@ -73,12 +217,7 @@ class FirebaseService:
     def get_user(self, user_id):
         """Récupère un utilisateur par ID"""
         try:
-            doc = self.db.collection('users').document(user_id).get()
-            if doc.exists:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                return data
-            return None
+            return self._get_cached_document('users', user_id)
         except Exception as e:
             logger.error(f"Error getting user {user_id}: {e}")
             return None
@@ -86,12 +225,7 @@ class FirebaseService:
     def get_creator(self, creator_id):
         """Récupère un créateur par ID"""
         try:
-            doc = self.db.collection('creators').document(creator_id).get()
-            if doc.exists:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                return data
-            return None
+            return self._get_cached_document('creators', creator_id)
         except Exception as e:
             logger.error(f"Error getting creator {creator_id}: {e}")
             return None
@@ -101,6 +235,7 @@ class FirebaseService:
         try:
             data['updatedAt'] = firestore.SERVER_TIMESTAMP
             self.db.collection('users').document(user_id).update(data)
+            self.cache.invalidate('users', user_id)
             return True
         except Exception as e:
             logger.error(f"Error updating user {user_id}: {e}")
@@ -108,37 +243,116 @@ class FirebaseService:
     
     # ==================== EMAILS ====================
     
-    def save_collected_email(self, email_data):
-        """Sauvegarde un email collecté"""
+    def upsert_collected_email(self, email_data, amount=None, count_purchase=True, event_id=None):
+        """
+        Crée ou met à jour un email collecté sans requête préalable
+        
+        Le document est adressé par collected_email_id(creatorId, email): create()
+        au premier achat, set(merge=True) avec Increment pour les suivants.
+        Avec event_id, l'écriture est faite dans un batch qui crée aussi
+        collected_email_events/{eventId}: un webhook rejoué échoue sur ce
+        create et l'achat n'est pas recompté.
+        
+        Args:
+            email_data: Données de l'email (email et creatorId requis)
+            amount: Montant de l'achat
+            count_purchase: False pour seulement garantir l'existence du document
+                (ex: page de succès, l'achat étant compté par le webhook)
+            event_id: ID de l'événement Stripe qui compte l'achat (déduplication)
+        
+        Returns:
+            ID du document
+        """
         try:
-            email_data['createdAt'] = firestore.SERVER_TIMESTAMP
-            email_data['status'] = email_data.get('status', 'active')
-            email_data['opens'] = 0
-            email_data['clicks'] = 0
+            email_id = collected_email_id(email_data['creatorId'], email_data['email'])
+            doc_ref = self.db.collection('collected_emails').document(email_id)
+            amount = amount or 0
+            marker = None
+            if count_purchase and event_id:
+                marker = (self.db.collection(COLLECTED_EMAIL_EVENTS_COLLECTION).document(event_id), {
+                    'emailId': email_id,
+                    'creatorId': email_data['creatorId'],
+                    'amount': amount,
+                    'createdAt': firestore.SERVER_TIMESTAMP
+                })
             
-            doc_ref = self.db.collection('collected_emails').add(email_data)
-            logger.info(f"✅ Email saved: {email_data.get('email')}")
-            return doc_ref[1].id
+            new_data = dict(email_data)
+            new_data.update({
+                'emailNormalized': normalize_email(email_data['email']),
+                'createdAt': firestore.SERVER_TIMESTAMP,
+                'status': email_data.get('status', 'active'),
+                'opens': 0,
+                'clicks': 0,
+                'totalPurchases': 1 if count_purchase else 0,
+                'totalAmount': amount if count_purchase else 0
+            })
+            if count_purchase:
+                new_data['lastPurchaseAt'] = firestore.SERVER_TIMESTAMP
+            
+            # Un échec sur le document existant annule aussi le marqueur
+            try:
+                self._commit_with_marker(marker, lambda batch: batch.create(doc_ref, new_data))
+                logger.info(f"✅ Email saved: {email_data.get('email')}")
+                return email_id
+            except (AlreadyExists, Conflict):
+                pass
+            
+            if count_purchase:
+                update = {
+                    key: value for key, value in email_data.items()
+                    if key in ('stripeCustomerId', 'stripeSessionId', 'saleId', 'currency') and value
+                }
+                update.update({
+                    'lastPurchaseAt': firestore.SERVER_TIMESTAMP,
+                    'totalPurchases': firestore.Increment(1),
+                    'totalAmount': firestore.Increment(amount)
+                })
+                try:
+                    self._commit_with_marker(marker, lambda batch: batch.set(doc_ref, update, merge=True))
+                except (AlreadyExists, Conflict):
+                    logger.info(f"ℹ️ Purchase event {event_id} already counted for {email_data.get('email')}")
+                    return email_id
+                logger.info(f"✅ Email updated: {email_data.get('email')}")
+            return email_id
         except Exception as e:
             logger.error(f"Error saving email: {e}")
             return None
     
+    def _commit_with_marker(self, marker, write):
+        """Applique write(batch), précédé du create du marqueur d'événement s'il y en a un"""
+        batch = self.db.batch()
+        if marker:
+            batch.create(*marker)
+        write(batch)
+        batch.commit()
+    
+    def save_collected_email(self, email_data):
+        """Sauvegarde un email collecté (compte un achat)"""
+        return self.upsert_collected_email(email_data, amount=email_data.get('amount'))
+    
+    def _emails_query(self, creator_id):
+        return self.db.collection('collected_emails').where('creatorId', '==', creator_id)
+    
+    def get_emails_page(self, creator_id, page_size=DEFAULT_PAGE_SIZE, page_token=None):
+        """
+        Récupère une page d'emails d'un créateur (plus récents d'abord)
+        
+        Returns:
+            Dict {'items': [...], 'next_page_token': str ou None}
+        
+        Raises:
+            InvalidPageToken: si page_token est invalide
+        """
+        return fetch_page(self._emails_query(creator_id), 'createdAt', page_size, page_token)
+    
+    def iter_email_pages(self, creator_id, page_size=DEFAULT_PAGE_SIZE, page_token=None):
+        """Générateur des pages d'emails d'un créateur, lues à la demande"""
+        return iter_pages(self._emails_query(creator_id), 'createdAt', page_size, page_token)
+    
     def get_emails_by_creator(self, creator_id, limit=100):
-        """Récupère les emails d'un créateur"""
+        """Récupère les emails d'un créateur (première page)"""
         try:
-            docs = self.db.collection('collected_emails').where(
-                'creatorId', '==', creator_id
-            ).order_by('createdAt', direction=firestore.Query.DESCENDING).limit(limit).get()
-            
-            emails = []
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                if 'createdAt' in data and data['createdAt']:
-                    data['createdAt'] = data['createdAt'].isoformat() if hasattr(data['createdAt'], 'isoformat') else str(data['createdAt'])
-                emails.append(data)
-            
-            return emails
+            return self.get_emails_page(creator_id, page_size=limit)['items']
         except Exception as e:
             logger.error(f"Error getting emails for creator {creator_id}: {e}")
             return []
@@ -146,10 +360,8 @@ class FirebaseService:
     def email_exists(self, email, creator_id):
         """Vérifie si un email existe déjà pour ce créateur"""
         try:
-            docs = self.db.collection('collected_emails').where(
-                'email', '==', email
-            ).where('creatorId', '==', creator_id).limit(1).get()
-            return len(list(docs)) > 0
+            doc = self.db.collection('collected_emails').document(collected_email_id(creator_id, email)).get()
+            return doc.exists
         except Exception as e:
             logger.error(f"Error checking email existence: {e}")
             return False
@@ -172,10 +384,7 @@ class FirebaseService:
     def get_telegram_connection(self, page_id):
         """Récupère la connexion Telegram d'une page"""
         try:
-            doc = self.db.collection('telegram_connections').document(page_id).get()
-            if doc.exists:
-                return doc.to_dict()
-            return None
+            return self._get_cached_document('telegram_connections', page_id, include_id=False)
         except Exception as e:
             logger.error(f"Error getting telegram connection: {e}")
             return None
@@ -185,10 +394,210 @@ class FirebaseService:
         try:
             connection_data['updatedAt'] = firestore.SERVER_TIMESTAMP
             self.db.collection('telegram_connections').document(page_id).set(connection_data, merge=True)
+            self.cache.invalidate('telegram_connections', page_id)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving telegram connection: {e}")
+            return False
+
+    
+    # ==================== ASYNC (asyncio) ====================
+    # Variantes non bloquantes pour la boucle d'événements (Telethon, bots):
+    # Firestore via AsyncClient, cache Redis via async_redis_cache
+    
+    async def _fetch_document_async(self, collection, doc_id):
+        """Lit un document directement dans Firestore (async)"""
+        doc = await self.async_db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+    
+    async def _get_cached_document_async(self, collection, doc_id, include_id=True):
+        """Équivalent async de _get_cached_document"""
+        if doc_id and self.mirror and self.mirror.is_ready(collection):
+            data = self.mirror.get(collection, doc_id)
+        else:
+            data = await self.cache.get_or_load_async(
+                collection, doc_id,
+                lambda: self._fetch_document_async(collection, doc_id)
+            )
+        
+        if data is not None and include_id:
+            data['id'] = doc_id
+        return data
+    
+    async def get_many_async(self, refs):
+        """Équivalent async de get_many (un MGET pour le cache, un seul appel get_all)"""
+        results, pending = self._resolve_mirrored_refs(refs, self.async_db)
+        cached = {}
+        if self.cache.enabled and pending:
+            cached = await self.cache.get_many_async(self._cached_refs(pending))
+        to_fetch = self._apply_cached(results, pending, cached)
+        
+        if to_fetch:
+            fetched = [self._store_fetched(results, doc) async for doc in self.async_db.get_all(to_fetch)]
+            if self.cache.enabled:
+                await self.cache.set_many_async([entry for entry in fetched if entry is not None])
+        
+        return results
+    
+    async def get_landing_page_async(self, page_id):
+        """Récupère une landing page par ID (async)"""
+        try:
+            return await self._get_cached_document_async('landingPages', page_id)
+        except Exception as e:
+            logger.error(f"Error getting landing page {page_id}: {e}")
+            return None
+    
+    async def update_landing_page_async(self, page_id, data):
+        """Met à jour une landing page (async)"""
+        try:
+            data['updatedAt'] = firestore.SERVER_TIMESTAMP
+            await self.async_db.collection('landingPages').document(page_id).update(data)
+            await self.cache.invalidate_async('landingPages', page_id)
+            return True
+        except Exception as e:
+            logger.error(f"Error updating landing page {page_id}: {e}")
+            return False
+    
+    async def get_user_async(self, user_id):
+        """Récupère un utilisateur par ID (async)"""
+        try:
+            return await self._get_cached_document_async('users', user_id)
+        except Exception as e:
+            logger.error(f"Error getting user {user_id}: {e}")
+            return None
+    
+    async def get_creator_async(self, creator_id):
+        """Récupère un créateur par ID (async)"""
+        try:
+            return await self._get_cached_document_async('creators', creator_id)
+        except Exception as e:
+            logger.error(f"Error getting creator {creator_id}: {e}")
+            return None
+    
+    async def list_creators_async(self):
+        """Liste tous les créateurs (async)"""
+        try:
+            creators = []
+            async for doc in self.async_db.collection('creators').stream():
+                data = doc.to_dict()
+                data['id'] = doc.id
+                creators.append(data)
+            return creators
+        except Exception as e:
+            logger.error(f"Error listing creators: {e}")
+            return []
+    
+    async def update_user_async(self, user_id, data):
+        """Met à jour un utilisateur (async)"""
+        try:
+            data['updatedAt'] = firestore.SERVER_TIMESTAMP
+            await self.async_db.collection('users').document(user_id).update(data)
+            await self.cache.invalidate_async('users', user_id)
+            return True
+        except Exception as e:
+            logger.error(f"Error updating user {user_id}: {e}")
+            return False
+    
+    async def get_telegram_connection_async(self, page_id):
+        """Récupère la connexion Telegram d'une page (async)"""
+        try:
+            return await self._get_cached_document_async('telegram_connections', page_id, include_id=False)
+        except Exception as e:
+            logger.error(f"Error getting telegram connection: {e}")
+            return None
+    
+    async def save_telegram_connection_async(self, page_id, connection_data):
+        """Sauvegarde une connexion Telegram (async)"""
+        try:
+            connection_data['updatedAt'] = firestore.SERVER_TIMESTAMP
+            await self.async_db.collection('telegram_connections').document(page_id).set(connection_data, merge=True)
+            await self.cache.invalidate_async('telegram_connections', page_id)
             return True
         except Exception as e:
             logger.error(f"Error saving telegram connection: {e}")
             return False
+    
+    # ==================== TRADUCTION (async) ====================
+    
+    async def get_translation_configs_async(self, status='active', source_username=None):
+        """Récupère les configurations de traduction (async), liste de dicts avec 'id'"""
+        try:
+            query = self.async_db.collection(COLLECTIONS['TRANSLATION_CONFIGS']).where('status', '==', status)
+            if source_username:
+                query = query.where('sourceChannelUsername', '==', source_username)
+            
+            configs = []
+            async for doc in query.stream():
+                data = doc.to_dict()
+                data['id'] = doc.id
+                configs.append(data)
+            return configs
+        except Exception as e:
+            logger.error(f"Error getting translation configs: {e}")
+            return []
+    
+    async def get_translation_config_async(self, config_id):
+        """Récupère une configuration de traduction (async)"""
+        try:
+            doc = await self.async_db.collection(COLLECTIONS['TRANSLATION_CONFIGS']).document(config_id).get()
+            if doc.exists:
+                data = doc.to_dict()
+                data['id'] = doc.id
+                return data
+            return None
+        except Exception as e:
+            logger.error(f"Error getting translation config {config_id}: {e}")
+            return None
+    
+    async def update_translation_config_async(self, config_id, data):
+        """Met à jour une configuration de traduction (async)"""
+        try:
+            await self.async_db.collection(COLLECTIONS['TRANSLATION_CONFIGS']).document(config_id).update(data)
+            return True
+        except Exception as e:
+            logger.error(f"Error updating translation config {config_id}: {e}")
+            return False
+    
+    async def increment_translation_statistics_async(self, counters):
+        """
+        Applique des compteurs de statistiques accumulés en un seul batch
+        
+        Args:
+            counters: Dict {config_id: {'totalMessages': n, ..., 'lastActivity': datetime}}
+        
+        Returns:
+            Liste des config_id non mis à jour (à réessayer)
+        """
+        collection = self.async_db.collection(COLLECTIONS['TRANSLATION_CONFIGS'])
+        
+        def stats_update(values):
+            return {
+                f'statistics.{field}': value if field == 'lastActivity' else firestore.Increment(value)
+                for field, value in values.items()
+            }
+        
+        items = list(counters.items())
+        failed = []
+        # Firestore limite un batch à 500 écritures
+        for start in range(0, len(items), 500):
+            chunk = items[start:start + 500]
+            batch = self.async_db.batch()
+            for config_id, values in chunk:
+                batch.update(collection.document(config_id), stats_update(values))
+            try:
+                await batch.commit()
+            except Exception as e:
+                # Un document supprimé fait échouer tout le batch: repli document par document
+                logger.warning(f"Statistics batch failed, retrying per config: {e}")
+                for config_id, values in chunk:
+                    try:
+                        await collection.document(config_id).update(stats_update(values))
+                    except NotFound:
+                        logger.debug(f"Translation config {config_id} deleted, statistics dropped")
+                    except Exception as e:
+                        logger.error(f"Error updating statistics for {config_id}: {e}")
+                        failed.append(config_id)
+        return failed
 
 
 # Instance globale du service
@@ -0,0 +1,190 @@
+# telegram/services/MemberIndexService.py
+"""
+Index dénormalisé des membres Telegram par identifiants Stripe
+
+Chaque document de telegram_member_index (id "<type>:<id Stripe>") liste les
+chemins des documents telegram_members correspondants. L'index est écrit dans
+le même batch que le membre et mis en cache dans Redis (une clé par entrée,
+avec TTL: une relecture concurrente d'une invalidation ne peut pas réinsérer
+des chemins périmés au-delà de MEMBER_INDEX_CACHE_TTL).
+"""
+
+import os
+import logging
+from config.database import get_db
+from firebase_admin import firestore
+from redis_cache import redis_cache
+
+logger = logging.getLogger(__name__)
+
+MEMBERS_COLLECTION = 'telegram_members'
+INDEX_COLLECTION = 'telegram_member_index'
+
+# Type d'index -> champ du document membre
+INDEXED_FIELDS = {
+    'subscription': 'stripeSubscriptionId',
+    'customer': 'stripeCustomerId',
+    'session': 'stripeSessionId',
+}
+
+# TTL (secondes) des entrées d'index en cache
+MEMBER_INDEX_CACHE_TTL = int(os.getenv('MEMBER_INDEX_CACHE_TTL', 300))
+
+# Firestore limite un batch à 500 écritures
+BACKFILL_BATCH_SIZE = 400
+
+
+class MemberIndexService:
+    """Lecture/écriture des membres Telegram via l'index Stripe"""
+    
+    def __init__(self):
+        # Repli sur une requête where() tant que le backfill n'a pas été exécuté
+        self.query_fallback = os.getenv('MEMBER_INDEX_QUERY_FALLBACK', 'true').lower() != 'false'
+    
+    @property
+    def db(self):
+        return get_db()
+    
+    @staticmethod
+    def _redis_key(kind, value):
+        return f"member_index:{kind}:{value}"
+    
+    def _index_ref(self, kind, value):
+        return self.db.collection(INDEX_COLLECTION).document(f"{kind}:{value}")
+    
+    @staticmethod
+    def _index_entries(member_data):
+        """(type, valeur) des identifiants Stripe présents dans un membre"""
+        for kind, field in INDEXED_FIELDS.items():
+            value = member_data.get(field)
+            if value:
+                yield kind, str(value)
+    
+    def _add_to_batch(self, batch, member_path, member_data):
+        """Ajoute au batch les écritures d'index d'un membre, retourne les entrées écrites"""
+        entries = list(self._index_entries(member_data))
+        for kind, value in entries:
+            batch.set(self._index_ref(kind, value), {
+                'kind': kind,
+                'value': value,
+                'members': firestore.ArrayUnion([member_path]),
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            }, merge=True)
+        return entries
+    
+    def _invalidate_redis(self, entries):
+        """Supprime de Redis les entrées réécrites (après commit)"""
+        redis_cache.delete_many([self._redis_key(kind, value) for kind, value in entries])
+    
+    # ==================== ÉCRITURE ====================
+    
+    def create_member(self, member_data):
+        """
+        Crée un document telegram_members et ses entrées d'index atomiquement
+        
+        Returns:
+            DocumentReference du membre créé
+        """
+        member_ref = self.db.collection(MEMBERS_COLLECTION).document()
+        batch = self.db.batch()
+        batch.set(member_ref, member_data)
+        entries = self._add_to_batch(batch, member_ref.path, member_data)
+        batch.commit()
+        self._invalidate_redis(entries)
+        return member_ref
+    
+    # ==================== LECTURE ====================
+    
+    def _member_paths(self, kind, value):
+        """Chemins des membres indexés: Redis, puis document d'index"""
+        redis_key = self._redis_key(kind, value)
+        paths = redis_cache.get(redis_key)
+        if paths is not None:
+            return paths
+        
+        index_doc = self._index_ref(kind, value).get()
+        if not index_doc.exists:
+            return None
+        
+        paths = index_doc.to_dict().get('members', [])
+        redis_cache.set(redis_key, paths, ttl=MEMBER_INDEX_CACHE_TTL)
+        return paths
+    
+    def find_members(self, kind, value):
+        """
+        Retourne les snapshots telegram_members associés à un identifiant Stripe
+        
+        Args:
+            kind: 'subscription', 'customer' ou 'session'
+            value: Identifiant Stripe
+        """
+        if not value:
+            return []
+        
+        paths = self._member_paths(kind, value)
+        
+        if paths is None:
+            return self._find_by_query(kind, value) if self.query_fallback else []
+        if not paths:
+            return []
+        
+        refs = [self.db.document(path) for path in paths]
+        return [doc for doc in self.db.get_all(refs) if doc.exists]
+    
+    def _find_by_query(self, kind, value):
+        """Recherche par requête pour les membres non indexés, et répare l'index"""
+        members = list(
+            self.db.collection(MEMBERS_COLLECTION).where(INDEXED_FIELDS[kind], '==', value).stream()
+        )
+        if members:
+            batch = self.db.batch()
+            entries = []
+            for doc in members:
+                entries += self._add_to_batch(batch, doc.reference.path, doc.to_dict())
+            batch.commit()
+            self._invalidate_redis(entries)
+            logger.info(f"🔧 Member index repaired for {kind}:{value}")
+        return members
+    
+    def find_by_subscription(self, subscription_id):
+        return self.find_members('subscription', subscription_id)
+    
+    def find_by_customer(self, customer_id):
+        return self.find_members('customer', customer_id)
+    
+    def find_by_session(self, session_id):
+        return self.find_members('session', session_id)
+    
+    # ==================== BACKFILL ====================
+    
+    def backfill(self, batch_size=BACKFILL_BATCH_SIZE):
+        """
+        Indexe les membres existants en un seul passage (stream)
+        
+        Returns:
+            Nombre de membres parcourus
+        """
+        batch = self.db.batch()
+        pending = []
+        scanned = 0
+        
+        for doc in self.db.collection(MEMBERS_COLLECTION).stream():
+            scanned += 1
+            pending += self._add_to_batch(batch, doc.reference.path, doc.to_dict())
+            if len(pending) >= batch_size:
+                batch.commit()
+                self._invalidate_redis(pending)
+                batch = self.db.batch()
+                pending = []
+                logger.info(f"📇 Member index backfill: {scanned} members scanned")
+        
+        if pending:
+            batch.commit()
+            self._invalidate_redis(pending)
+        
+        logger.info(f"✅ Member index backfill done: {scanned} members")
+        return scanned
+
+
+# Instance globale du service
+member_index_service = MemberIndexService()
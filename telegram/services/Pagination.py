@@ -0,0 +1,135 @@
+# telegram/services/Pagination.py
+"""
+Pagination par curseur des requêtes Firestore
+
+Les pages sont triées sur (champ date, id du document) et reprises avec
+start_after. Le curseur est transmis au client sous forme de jeton opaque.
+"""
+
+import json
+import base64
+import logging
+from datetime import datetime
+from firebase_admin import firestore
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidPageToken(ValueError):
+    """Jeton de page illisible ou ne correspondant pas à la requête"""
+
+
+def _serialize_timestamp(value):
+    if hasattr(value, 'rfc3339'):
+        return value.rfc3339()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def serialize_document(doc, timestamp_fields=('createdAt',)):
+    """Convertit un snapshot en dict JSON (id inclus, dates en ISO 8601)"""
+    data = doc.to_dict()
+    data['id'] = doc.id
+    for field in timestamp_fields:
+        if data.get(field):
+            data[field] = data[field].isoformat() if hasattr(data[field], 'isoformat') else str(data[field])
+    return data
+
+
+def encode_page_token(order_field, value, doc_id):
+    """Encode le curseur (valeur du champ de tri, id du document) en jeton opaque"""
+    payload = {'f': order_field, 'v': _serialize_timestamp(value), 'id': doc_id}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token, order_field):
+    """
+    Décode un jeton de page
+    
+    Returns:
+        Tuple (valeur du champ de tri, id du document)
+    
+    Raises:
+        InvalidPageToken: si le jeton est illisible ou issu d'un autre tri
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        value, doc_id = payload['v'], payload['id']
+        if payload['f'] != order_field or not doc_id:
+            raise ValueError('order field mismatch')
+        if isinstance(value, str):
+            value = DatetimeWithNanoseconds.from_rfc3339(value) if value.endswith('Z') else datetime.fromisoformat(value)
+        return value, doc_id
+    except Exception as e:
+        raise InvalidPageToken(f"Invalid page token: {e}")
+
+
+def clamp_page_size(page_size):
+    """Borne la taille de page demandée par un client"""
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def fetch_page(query, order_field, page_size=DEFAULT_PAGE_SIZE, page_token=None,
+               direction=firestore.Query.DESCENDING, serializer=serialize_document):
+    """
+    Lit une page d'une requête triée sur (order_field, id du document)
+    
+    Args:
+        query: Requête Firestore filtrée (sans order_by ni limit)
+        order_field: Champ de tri (timestamp)
+        page_size: Nombre de documents par page
+        page_token: Jeton retourné par la page précédente
+        serializer: Fonction snapshot -> dict
+    
+    Returns:
+        Dict {'items': [...], 'next_page_token': str ou None}
+    """
+    page_size = clamp_page_size(page_size)
+    query = query.order_by(order_field, direction=direction).order_by('__name__', direction=direction)
+    
+    if page_token:
+        value, doc_id = decode_page_token(page_token, order_field)
+        query = query.start_after({order_field: value, '__name__': doc_id})
+    
+    # Un document de plus pour savoir s'il existe une page suivante
+    docs = list(query.limit(page_size + 1).stream())
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    
+    next_page_token = None
+    if has_more and docs:
+        last = docs[-1]
+        next_page_token = encode_page_token(order_field, last.get(order_field), last.id)
+    
+    return {
+        'items': [serializer(doc) for doc in docs],
+        'next_page_token': next_page_token
+    }
+
+
+def iter_pages(query, order_field, page_size=DEFAULT_PAGE_SIZE, page_token=None,
+               direction=firestore.Query.DESCENDING, serializer=serialize_document):
+    """
+    Générateur de pages: chaque page n'est lue qu'au moment où elle est consommée
+    
+    Yields:
+        Dict {'items': [...], 'next_page_token': str ou None}
+    """
+    while True:
+        page = fetch_page(query, order_field, page_size, page_token, direction, serializer)
+        if page['items']:
+            yield page
+        page_token = page['next_page_token']
+        if not page_token:
+            return
@@ -0,0 +1,300 @@
+# telegram/services/StatsService.py
+"""
+Agrégats de ventes par créateur et par page, maintenus par les webhooks Stripe
+
+Chaque événement met à jour creator_stats/{creatorId} et page_stats/{pageId}
+avec firestore.Increment dans un batch qui crée aussi stats_events/{eventId}:
+un webhook rejoué par Stripe échoue sur ce create et n'est pas recompté.
+Les montants sont stockés en unités mineures (centimes) par devise.
+
+Les compteurs journaliers (revenueByDay, churnByDay) sont rangés par mois dans
+{agrégat}/days/{YYYY-MM} pour que le document principal reste de taille bornée.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from config.database import get_db
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, Conflict
+
+logger = logging.getLogger(__name__)
+
+CREATOR_STATS_COLLECTION = 'creator_stats'
+PAGE_STATS_COLLECTION = 'page_stats'
+DAYS_COLLECTION = 'days'
+EVENTS_COLLECTION = 'stats_events'
+
+# Compteurs stockés dans les documents mensuels days/{YYYY-MM}
+DAY_FIELDS = ('revenueByDay', 'churnByDay')
+
+# Firestore limite un batch à 500 écritures
+REBUILD_BATCH_SIZE = 400
+
+
+def _day(when):
+    """Clé de jour UTC (YYYY-MM-DD) d'un timestamp Unix ou d'une date"""
+    if when is None:
+        when = datetime.now(timezone.utc)
+    elif isinstance(when, (int, float)):
+        when = datetime.fromtimestamp(when, tz=timezone.utc)
+    elif when.tzinfo is not None:
+        when = when.astimezone(timezone.utc)
+    return when.strftime('%Y-%m-%d')
+
+
+def _delta(kind, day, amount_cents=0, currency=None):
+    """Compteurs modifiés par un événement"""
+    delta = defaultdict(int)
+    currency = (currency or 'eur').lower()
+    if kind in ('sale', 'renewal'):
+        delta[f'revenue.{currency}'] += amount_cents
+        delta[f'revenueByDay.{day}.{currency}'] += amount_cents
+        delta['salesCount' if kind == 'sale' else 'renewalsCount'] += 1
+    if kind == 'sale':
+        delta['activeSubscriptions'] += 1
+    if kind == 'churn':
+        delta['activeSubscriptions'] -= 1
+        delta['churnCount'] += 1
+        delta[f'churnByDay.{day}'] += 1
+    return delta
+
+
+def _split_days(delta):
+    """Sépare les totaux des compteurs journaliers, groupés par mois (YYYY-MM)"""
+    totals, months = {}, defaultdict(dict)
+    for path, value in delta.items():
+        field, _, rest = path.partition('.')
+        if field in DAY_FIELDS:
+            months[rest[:7]][path] = value
+        else:
+            totals[path] = value
+    return totals, months
+
+
+def _nest(delta, transform=None):
+    """Convertit {'a.b.c': v} en dicts imbriqués (Increment si transform)"""
+    nested = {}
+    for path, value in delta.items():
+        node = nested
+        *parents, leaf = path.split('.')
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = transform(value) if transform else value
+    return nested
+
+
+def _sale_fields(sale):
+    """(creatorId, pageId, createdAt) d'une vente, en camelCase (app.py) ou snake_case (CheckoutService)"""
+    return (sale.get('creatorId') or sale.get('creator_id'),
+            sale.get('pageId') or sale.get('page_id'),
+            sale.get('createdAt') or sale.get('created_at'))
+
+
+class StatsService:
+    """Mise à jour incrémentale et lecture O(1) des agrégats de ventes"""
+    
+    @property
+    def db(self):
+        return get_db()
+    
+    def _targets(self, creator_id, page_id):
+        refs = []
+        if creator_id:
+            refs.append(self.db.collection(CREATOR_STATS_COLLECTION).document(creator_id))
+        if page_id:
+            refs.append(self.db.collection(PAGE_STATS_COLLECTION).document(page_id))
+        return refs
+    
+    # ==================== ÉVÉNEMENTS ====================
+    
+    def record_event(self, event_id, kind, creator_id=None, page_id=None,
+                     amount_cents=0, currency=None, when=None):
+        """
+        Applique un événement aux agrégats du créateur et de la page
+        
+        Args:
+            event_id: ID de l'événement Stripe (déduplication)
+            kind: 'sale', 'renewal' ou 'churn'
+            amount_cents: Montant en unités mineures
+            when: Timestamp Unix de l'événement
+        
+        Returns:
+            True si appliqué, False si déjà compté ou sans cible
+        """
+        targets = self._targets(creator_id, page_id)
+        if not targets:
+            logger.warning(f"⚠️ Stats event {event_id} ({kind}) without creator/page")
+            return False
+        
+        day = _day(when)
+        totals, months = _split_days(_delta(kind, day, amount_cents, currency))
+        
+        batch = self.db.batch()
+        batch.create(self.db.collection(EVENTS_COLLECTION).document(event_id), {
+            'kind': kind,
+            'creatorId': creator_id,
+            'pageId': page_id,
+            'amountCents': amount_cents,
+            'currency': (currency or 'eur').lower(),
+            'day': day,
+            'createdAt': firestore.SERVER_TIMESTAMP
+        })
+        for ref in targets:
+            data = dict(_nest(totals, firestore.Increment), updatedAt=firestore.SERVER_TIMESTAMP)
+            if ref.parent.id == PAGE_STATS_COLLECTION and creator_id:
+                # Permet à rebuild(creator_id) de retrouver les pages du créateur
+                data['creatorId'] = creator_id
+            batch.set(ref, data, merge=True)
+            for month, days in months.items():
+                batch.set(ref.collection(DAYS_COLLECTION).document(month),
+                          _nest(days, firestore.Increment), merge=True)
+        
+        try:
+            batch.commit()
+        except (AlreadyExists, Conflict):
+            logger.info(f"ℹ️ Stats event {event_id} already applied")
+            return False
+        return True
+    
+    def record_sale(self, event_id, creator_id, page_id, amount_cents, currency, when=None):
+        return self.record_event(event_id, 'sale', creator_id, page_id, amount_cents, currency, when)
+    
+    def record_renewal(self, event_id, creator_id, page_id, amount_cents, currency, when=None):
+        return self.record_event(event_id, 'renewal', creator_id, page_id, amount_cents, currency, when)
+    
+    def record_churn(self, event_id, creator_id, page_id, when=None):
+        return self.record_event(event_id, 'churn', creator_id, page_id, when=when)
+    
+    # ==================== LECTURE ====================
+    
+    def get_stats(self, scope, target_id, month=None):
+        """
+        Retourne les agrégats d'un créateur ou d'une page (une lecture, deux avec month)
+        
+        Args:
+            scope: 'creator' ou 'page'
+            month: 'YYYY-MM' pour inclure revenueByDay et churnByDay de ce mois
+        """
+        collection = CREATOR_STATS_COLLECTION if scope == 'creator' else PAGE_STATS_COLLECTION
+        ref = self.db.collection(collection).document(target_id)
+        doc = ref.get()
+        if not doc.exists:
+            return None
+        
+        stats = doc.to_dict()
+        if month:
+            days = ref.collection(DAYS_COLLECTION).document(month).get()
+            stats.update({field: {} for field in DAY_FIELDS})
+            if days.exists:
+                stats.update(days.to_dict())
+        return stats
+    
+    # ==================== RECONSTRUCTION ====================
+    
+    def _sales(self, creator_id=None):
+        """Ventes à recompter, enregistrées avec creatorId (app.py) ou creator_id (CheckoutService)"""
+        sales = self.db.collection('sales')
+        if not creator_id:
+            for doc in sales.stream():
+                yield doc.to_dict()
+            return
+        
+        seen = set()
+        for field in ('creatorId', 'creator_id'):
+            for doc in sales.where(field, '==', creator_id).stream():
+                if doc.id not in seen:
+                    seen.add(doc.id)
+                    yield doc.to_dict()
+    
+    def _existing_aggregates(self, creator_id=None):
+        """Chemins des agrégats actuels (et de leurs mois) couverts par la reconstruction"""
+        if creator_id:
+            refs = [self.db.collection(CREATOR_STATS_COLLECTION).document(creator_id)]
+            pages = self.db.collection(PAGE_STATS_COLLECTION).where('creatorId', '==', creator_id)
+            refs.extend(doc.reference for doc in pages.stream())
+        else:
+            refs = [doc.reference
+                    for collection in (CREATOR_STATS_COLLECTION, PAGE_STATS_COLLECTION)
+                    for doc in self.db.collection(collection).stream()]
+        
+        paths = set()
+        for ref in refs:
+            paths.add(ref.path)
+            paths.update(doc.reference.path for doc in ref.collection(DAYS_COLLECTION).stream())
+        return paths
+    
+    def rebuild(self, creator_id=None):
+        """
+        Recalcule les agrégats depuis sales (ventes, résiliations) et
+        stats_events (renouvellements, absents de sales)
+        
+        Les documents recalculés sont remplacés, les agrégats et mois existants
+        sans vente correspondante sont supprimés.
+        
+        Args:
+            creator_id: Limite la reconstruction à un créateur (et à ses pages)
+        
+        Returns:
+            Nombre de documents d'agrégats écrits
+        """
+        totals = defaultdict(lambda: defaultdict(int))
+        owners = {}
+        
+        def apply(creator, page, delta):
+            for ref in self._targets(creator, page):
+                for path, value in delta.items():
+                    totals[ref.path][path] += value
+                if creator and ref.parent.id == PAGE_STATS_COLLECTION:
+                    owners[ref.path] = creator
+        
+        for sale in self._sales(creator_id):
+            creator, page, created_at = _sale_fields(sale)
+            amount_cents = int(round(float(sale.get('amount') or 0) * 100))
+            apply(creator, page, _delta('sale', _day(created_at), amount_cents, sale.get('currency')))
+            if sale.get('status') == 'cancelled':
+                apply(creator, page, _delta('churn', _day(sale.get('cancelledAt') or created_at)))
+        
+        renewals = self.db.collection(EVENTS_COLLECTION).where('kind', '==', 'renewal')
+        if creator_id:
+            renewals = renewals.where('creatorId', '==', creator_id)
+        for doc in renewals.stream():
+            event = doc.to_dict()
+            apply(event.get('creatorId'), event.get('pageId'),
+                  _delta('renewal', event.get('day'), event.get('amountCents', 0), event.get('currency')))
+        
+        writes = {}
+        for path, delta in totals.items():
+            main, months = _split_days(delta)
+            data = _nest(main)
+            if path in owners:
+                data['creatorId'] = owners[path]
+            data['rebuiltAt'] = firestore.SERVER_TIMESTAMP
+            data['updatedAt'] = firestore.SERVER_TIMESTAMP
+            writes[path] = data
+            for month, days in months.items():
+                writes[f'{path}/{DAYS_COLLECTION}/{month}'] = _nest(days)
+        stale = self._existing_aggregates(creator_id) - writes.keys()
+        
+        batch = self.db.batch()
+        pending = 0
+        operations = [(path, data) for path, data in writes.items()] + [(path, None) for path in sorted(stale)]
+        for path, data in operations:
+            if data is None:
+                batch.delete(self.db.document(path))
+            else:
+                batch.set(self.db.document(path), data)
+            pending += 1
+            if pending >= REBUILD_BATCH_SIZE:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+        
+        logger.info(f"✅ Stats rebuilt: {len(totals)} aggregate documents, {len(stale)} stale documents removed")
+        return len(totals)
+
+
+# Instance globale du service
+stats_service = StatsService()
@@ -44,7 +44,9 @@ class StripeService:
                 raise ValueError(f"Landing page not found: {page_id}")
             
             creator_id = page.get('userId') or page.get('creatorId')
-            creator = firebase_service.get_user(creator_id) or firebase_service.get_creator(creator_id)
+            # users et creators lus ensemble en un seul aller-retour
+            creator_docs = firebase_service.get_many([('users', creator_id), ('creators', creator_id)]) if creator_id else {}
+            creator = creator_docs.get(f'users/{creator_id}') or creator_docs.get(f'creators/{creator_id}')
             
             if not creator:
                 raise ValueError(f"Creator not found: {creator_id}")
@@ -135,8 +137,8 @@ class StripeService:
             logger.error(f"Webhook error: {e}")
             raise
     
-    def handle_checkout_completed(self, session):
-        """Traite une session de checkout complétée"""
+    def handle_checkout_completed(self, session, event_id=None):
+        """Traite une session de checkout complétée (event_id: événement Stripe, pour ne compter l'achat qu'une fois)"""
         from services.FirebaseService import firebase_service
         
         try:
@@ -167,18 +169,18 @@ class StripeService:
             sale_id = firebase_service.save_sale(sale_data)
             
             if customer_email and creator_id:
-                if not firebase_service.email_exists(customer_email, creator_id):
-                    email_data = {
-                        'email': customer_email,
-                        'customerName': customer_details.get('name', ''),
-                        'creatorId': creator_id,
-                        'landingPageId': page_id,
-                        'source': 'Stripe Checkout',
-                        'stripeCustomerId': session.get('customer'),
-                        'amount': amount_total,
-                        'currency': currency,
-                    }
-                    firebase_service.save_collected_email(email_data)
+                firebase_service.upsert_collected_email({
+                    'email': customer_email,
+                    'customerName': customer_details.get('name', ''),
+                    'creatorId': creator_id,
+                    'landingPageId': page_id,
+                    'source': 'Stripe Checkout',
+                    'stripeCustomerId': session.get('customer'),
+                    'stripeSessionId': session.get('id'),
+                    'saleId': sale_id,
+                    'amount': amount_total,
+                    'currency': currency,
+                }, amount=amount_total, event_id=event_id)
             
             logger.info(f"✅ Checkout completed: {session.get('id')}")
             
@@ -4,13 +4,13 @@ from flask import Flask, request
 from telegram import Bot
 from dotenv import load_dotenv
 import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
 from telethon.sync import TelegramClient
 
 # Charger les variables d'environnement
 load_dotenv()
 
+from config.database import initialize_firebase, lazy_db
+
 # --- Configuration ---
 app = Flask(__name__)
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
@@ -22,11 +22,9 @@ PHONE_NUMBER = os.getenv("PHONE_NUMBER")
 bot = Bot(token=TELEGRAM_TOKEN)
 stripe.api_key = STRIPE_SECRET_KEY
 
-# --- Initialiser Firebase ---
-if not firebase_admin._apps:
-    cred = credentials.Certificate("firebase-service-account.json")
-    firebase_admin.initialize_app(cred)
-db = firestore.client()
+# --- Initialiser Firebase (client partagé de config.database) ---
+initialize_firebase()
+db = lazy_db
 
 @app.route("/webhook", methods=["POST"])
 def webhook_received():
@@ -6,8 +6,7 @@ import logging
 from flask import Flask, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials
+from config.database import initialize_firebase
 from routes.telegram_routes import telegram_bp
 from services.TelegramBotHandler import TelegramBotHandler
 
@@ -34,33 +33,7 @@ CORS(app, resources={
     }
 })
 
-# Initialize Firebase Admin SDK
-def initialize_firebase():
-    """Initialize Firebase Admin SDK"""
-    try:
-        # Check if already initialized
-        if len(firebase_admin._apps) > 0:
-            logger.info("Firebase already initialized")
-            return
-        
-        # Get service account path from environment
-        service_account_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_PATH')
-        
-        if service_account_path and os.path.exists(service_account_path):
-            cred = credentials.Certificate(service_account_path)
-            firebase_admin.initialize_app(cred)
-            logger.info("✅ Firebase Admin SDK initialized with service account")
-        else:
-            # Try to initialize with default credentials
-            firebase_admin.initialize_app()
-            logger.info("✅ Firebase Admin SDK initialized with default credentials")
-            
-    except Exception as error:
-        logger.error(f"❌ Error initializing Firebase: {error}")
-        # Continue without Firebase if initialization fails
-        pass
-
-# Initialize Firebase
+# Initialize Firebase (shared client factory in config.database)
 initialize_firebase()
 
 # Register blueprints
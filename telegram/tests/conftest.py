@@ -0,0 +1,43 @@
+# tests/conftest.py - Configuration commune des tests du service Python
+import os
+import sys
+
+# Les modules du service sont importés depuis telegram/ (comme app.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Variables minimales pour importer app.py sans identifiants réels
+os.environ.setdefault('TELEGRAM_API_ID', '12345')
+os.environ.setdefault('TELEGRAM_API_HASH', 'test-hash')
+os.environ.setdefault('TELEGRAM_TOKEN', '123456:TEST-TOKEN')
+os.environ.setdefault('FIRESTORE_BACKEND', 'memory')
+
+import pytest
+
+
+@pytest.fixture
+def fake_redis():
+    """Branche le cache global sur un serveur fakeredis neuf"""
+    fakeredis = pytest.importorskip('fakeredis')
+    from redis_cache import redis_cache, LocalFallback
+    
+    previous = (redis_cache._client, redis_cache.pool, redis_cache.fallback)
+    redis_cache._client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    redis_cache.pool = None
+    redis_cache.fallback = LocalFallback()
+    redis_cache.breaker.reset()
+    yield redis_cache
+    redis_cache._client, redis_cache.pool, redis_cache.fallback = previous
+    redis_cache.breaker.reset()
+
+
+@pytest.fixture
+def memory_db(monkeypatch):
+    """Clients Firestore en mémoire neufs, renvoyés par get_db() et get_async_db()"""
+    from config import database
+    from config.memory_firestore import create_memory_clients
+    
+    db, async_db = create_memory_clients()
+    monkeypatch.setattr(database, 'FIRESTORE_BACKEND', 'memory')
+    monkeypatch.setattr(database, '_db', db)
+    monkeypatch.setattr(database, '_async_db', async_db)
+    return db
@@ -0,0 +1,39 @@
+# tests/test_app_factories.py - Clients Telegram créés à la demande par app.py
+import os
+import subprocess
+import sys
+
+from telegram import Bot
+from telethon import TelegramClient
+
+import app as service
+
+
+def test_telegram_client_returns_client(tmp_path, monkeypatch):
+    # La session userbot est créée dans le répertoire courant
+    monkeypatch.chdir(tmp_path)
+    client = service.telegram_client()
+    assert isinstance(client, TelegramClient)
+    assert client.api_id == service.api_id
+
+
+def test_telegram_bot_returns_bot():
+    bot = service.telegram_bot()
+    assert isinstance(bot, Bot)
+    assert bot.token == service.bot_token
+
+
+def test_import_defers_heavy_sdks():
+    # Nouveau processus: les autres tests ont déjà importé ces modules
+    code = ("import sys, app; "
+            "print(sorted(m for m in ('firebase_admin', 'redis', 'google.cloud.firestore', "
+            "'services.FirebaseService') if m in sys.modules))")
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=os.environ.copy(),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_lazy_service_resolves_singleton():
+    from services.StatsService import stats_service
+    assert service.stats_service.get_stats.__self__ is stats_service
@@ -0,0 +1,66 @@
+# tests/test_cache_result.py - Décorateur cache_result (L1, Redis, clés)
+import pytest
+
+from redis_cache import CacheKeyBuilder, cache_result, get_cache_result_stats
+
+
+def stats_for(func):
+    return get_cache_result_stats()[f"{func.__module__}.{func.__qualname__}"]
+
+
+def test_second_call_served_from_l1(fake_redis):
+    calls = []
+    
+    @cache_result(ttl=60, key_prefix="test_l1", l1_ttl=30)
+    def compute(x):
+        calls.append(x)
+        return {'x': x}
+    
+    assert compute(1) == {'x': 1}
+    assert compute(1) == {'x': 1}
+    
+    stats = stats_for(compute)
+    assert calls == [1]
+    assert stats['misses'] == 1
+    assert stats['l1_hits'] == 1
+    assert stats['redis_hits'] == 0
+
+
+def make_key_builder(func, version=1):
+    return CacheKeyBuilder(func, 'test', version)
+
+
+def two_args(a, b):
+    pass
+
+
+def one_arg(value):
+    pass
+
+
+@pytest.mark.parametrize('first, second', [
+    (('x:b=y', 'z'), ('x', 'y:b=z')),
+    (('1', 2), (1, 2)),
+    ((['a,b'], None), (['a', 'b'], None)),
+    ((None, 0), ('null', 0)),
+    ((True, 0), (1, 0)),
+    (((1, 2), 0), ([1, 2], 0)),
+    (({'a': 1}, 0), ([['a', 1]], 0)),
+    (({'list': [1]}, 0), ([1], 0)),
+])
+def test_distinct_arguments_give_distinct_keys(first, second):
+    build_key = make_key_builder(two_args)
+    assert build_key(first, {}) != build_key(second, {})
+
+
+def test_key_is_stable_and_bound_to_signature():
+    build_key = make_key_builder(two_args)
+    assert build_key((1,), {'b': {'y': 2, 'x': 1}}) == build_key((), {'a': 1, 'b': {'x': 1, 'y': 2}})
+    assert build_key(({1, 2, 3}, 0), {}) == build_key(({3, 2, 1}, 0), {})
+    assert build_key((1, 2), {}).startswith('test:two_args:v1:')
+    assert make_key_builder(two_args, version=2)((1, 2), {}) != build_key((1, 2), {})
+
+
+def test_long_arguments_keep_key_length_bounded():
+    build_key = make_key_builder(one_arg)
+    assert len(build_key(('x' * 10000,), {})) == len(build_key(('y',), {}))
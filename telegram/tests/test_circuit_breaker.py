@@ -0,0 +1,89 @@
+# tests/test_circuit_breaker.py - Disjoncteur Redis: closed -> open -> half_open -> closed
+import time
+from types import SimpleNamespace
+
+import pytest
+import redis
+
+import redis_cache as cache_module
+from redis_cache import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge monotone contrôlée par le test"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache_module, 'time', SimpleNamespace(
+        monotonic=lambda: now.value, perf_counter=time.perf_counter, sleep=time.sleep
+    ))
+    return now
+
+
+def test_failures_within_window_open_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=3, failure_window=10, half_open_window=5)
+    
+    for _ in range(2):
+        breaker.record_failure(ConnectionError('refused'))
+        clock.value += 6
+    # La première erreur est sortie de la fenêtre
+    breaker.record_failure(ConnectionError('refused'))
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    breaker.record_failure(ConnectionError('refused'))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() is False
+    assert breaker.status()['last_error'] == 'refused'
+
+
+def test_probe_half_opens_then_quiet_period_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, half_open_window=5)
+    breaker.trip(ConnectionError('down'))
+    
+    assert breaker.probe_succeeded() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is True
+    assert breaker.probe_succeeded() is False
+    
+    clock.value += 5
+    assert breaker.allow() is True
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.transitions == {'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1}
+
+
+def test_failure_while_half_open_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5)
+    breaker.trip(ConnectionError('down'))
+    breaker.probe_succeeded()
+    
+    breaker.record_failure(ConnectionError('still down'))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.transitions['half_open->open'] == 1
+
+
+def test_connection_errors_open_the_cache_circuit(fake_redis, monkeypatch):
+    def refused(*args, **kwargs):
+        raise redis.exceptions.ConnectionError('refused')
+    
+    monkeypatch.setattr(fake_redis.client, 'get', refused)
+    for _ in range(fake_redis.breaker.failure_threshold):
+        assert fake_redis.get('landing:p1') is None
+    assert fake_redis.breaker.state == CircuitBreaker.OPEN
+    
+    # Circuit ouvert: servi par le cache local sans appeler Redis
+    fake_redis.set('landing:p1', {'v': 1}, ttl=60)
+    assert fake_redis.get('landing:p1') == {'v': 1}
+    
+    monkeypatch.undo()
+    assert fake_redis.probe() is True
+    assert fake_redis.breaker.state == CircuitBreaker.HALF_OPEN
+    assert fake_redis.client.exists('landing:p1') == 1
+
+
+def test_command_errors_do_not_open_the_circuit(fake_redis, monkeypatch):
+    def failed(*args, **kwargs):
+        raise redis.exceptions.ResponseError('WRONGTYPE')
+    
+    monkeypatch.setattr(fake_redis.client, 'get', failed)
+    for _ in range(fake_redis.breaker.failure_threshold + 1):
+        fake_redis.get('landing:p1')
+    assert fake_redis.breaker.state == CircuitBreaker.CLOSED
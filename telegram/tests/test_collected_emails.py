@@ -0,0 +1,40 @@
+# tests/test_collected_emails.py - Emails collectés: un achat compté une fois par événement Stripe
+import pytest
+
+from services.FirebaseService import FirebaseService, collected_email_id
+
+EMAIL = {'email': 'Buyer@Example.com ', 'creatorId': 'creator_1', 'source': 'Stripe Checkout'}
+
+
+@pytest.fixture
+def service(memory_db):
+    return FirebaseService()
+
+
+def stored(memory_db):
+    doc = memory_db.collection('collected_emails').document(collected_email_id('creator_1', 'buyer@example.com')).get()
+    return doc.to_dict()
+
+
+def test_replayed_webhooks_are_counted_once(service, memory_db):
+    email_id = service.upsert_collected_email(dict(EMAIL), amount=10, event_id='evt_1')
+    assert service.upsert_collected_email(dict(EMAIL), amount=10, event_id='evt_1') == email_id
+    assert (stored(memory_db)['totalPurchases'], stored(memory_db)['totalAmount']) == (1, 10)
+    
+    service.upsert_collected_email(dict(EMAIL), amount=5, event_id='evt_2')
+    service.upsert_collected_email(dict(EMAIL), amount=5, event_id='evt_2')
+    assert (stored(memory_db)['totalPurchases'], stored(memory_db)['totalAmount']) == (2, 15)
+    assert memory_db.collection('collected_email_events').document('evt_2').get().exists
+
+
+def test_success_page_does_not_count_or_mark(service, memory_db):
+    service.upsert_collected_email(dict(EMAIL), count_purchase=False, event_id='evt_1')
+    service.upsert_collected_email(dict(EMAIL), amount=10, event_id='evt_1')
+    assert (stored(memory_db)['totalPurchases'], stored(memory_db)['totalAmount']) == (1, 10)
+
+
+def test_without_event_id_every_call_counts(service, memory_db):
+    service.upsert_collected_email(dict(EMAIL), amount=10)
+    service.upsert_collected_email(dict(EMAIL), amount=10)
+    assert stored(memory_db)['totalPurchases'] == 2
+    assert stored(memory_db)['emailNormalized'] == 'buyer@example.com'
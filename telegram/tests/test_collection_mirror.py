@@ -0,0 +1,77 @@
+# tests/test_collection_mirror.py - Miroir on_snapshot: snapshot initial, changements, resynchronisation
+import time
+
+import pytest
+
+from services.CollectionMirror import CollectionMirror
+from services.FirebaseService import FirebaseService
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def mirror(memory_db):
+    memory_db.collection('landingPages').document('p1').set({'title': 'A'})
+    mirror = CollectionMirror(lambda: memory_db, ['landingPages'], health_interval=0.02)
+    mirror.start()
+    yield mirror
+    mirror.stop()
+
+
+def test_initial_snapshot_and_changes(mirror, memory_db):
+    pages = memory_db.collection('landingPages')
+    assert mirror.is_ready('landingPages')
+    assert mirror.get('landingPages', 'p1') == {'title': 'A'}
+    
+    pages.document('p1').update({'title': 'B'})
+    pages.document('p2').set({'title': 'C'})
+    memory_db.collection('landingPages').document('p2').collection('sub').document('x').set({'ignored': True})
+    assert mirror.get('landingPages', 'p1') == {'title': 'B'}
+    assert mirror.get('landingPages', 'p2') == {'title': 'C'}
+    
+    pages.document('p1').delete()
+    assert mirror.get('landingPages', 'p1') is None
+    assert mirror.status()['collections']['landingPages'] == {'ready': True, 'documents': 1}
+
+
+def test_reads_are_copies(mirror):
+    mirror.get('landingPages', 'p1')['title'] = 'mutated'
+    assert mirror.get('landingPages', 'p1') == {'title': 'A'}
+
+
+def test_dead_listener_is_resynced(mirror, memory_db):
+    mirror._watches['landingPages'].unsubscribe()
+    assert not mirror.is_ready('landingPages')
+    
+    # Écrit pendant que le listener est arrêté: repris par le snapshot initial du réabonnement
+    memory_db.collection('landingPages').document('p3').set({'title': 'D'})
+    assert wait_until(lambda: mirror.is_ready('landingPages'))
+    assert mirror.resyncs >= 1
+    assert mirror.get('landingPages', 'p3') == {'title': 'D'}
+
+
+def test_stop_disables_reads(mirror):
+    mirror.stop()
+    assert not mirror.is_ready('landingPages')
+
+
+def test_firebase_service_serves_mirrored_documents(memory_db, fake_redis):
+    memory_db.collection('landingPages').document('p1').set({'title': 'A'})
+    service = FirebaseService()
+    service.enable_mirror(['landingPages'])
+    try:
+        assert service.get_many(['landingPages/p1', 'landingPages/missing']) == {
+            'landingPages/p1': {'title': 'A', 'id': 'p1'},
+            'landingPages/missing': None,
+        }
+        # Ni cache ni Firestore: le document absent du miroir n'existe pas
+        assert service.cache.stats()['misses'] == 0
+    finally:
+        service.disable_mirror()
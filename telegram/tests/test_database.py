@@ -0,0 +1,49 @@
+# tests/test_database.py - Client Firestore unique et options de son canal gRPC
+import firebase_admin
+import pytest
+from firebase_admin import credentials
+from google.api_core import grpc_helpers
+from google.auth.credentials import AnonymousCredentials
+
+from config import database
+
+
+class AnonymousCredential(credentials.Base):
+    def get_credential(self):
+        return AnonymousCredentials()
+
+
+class ChannelCreated(Exception):
+    pass
+
+
+@pytest.fixture
+def firestore_backend(monkeypatch):
+    """Backend Firestore réel (sans réseau) sur une app Firebase anonyme"""
+    app = firebase_admin.initialize_app(AnonymousCredential(), {'projectId': 'test-project'})
+    monkeypatch.setattr(database, 'FIRESTORE_BACKEND', 'firestore')
+    monkeypatch.setattr(database, '_initialized', True)
+    monkeypatch.setattr(database, '_db', None)
+    yield
+    firebase_admin.delete_app(app)
+
+
+def test_channel_options_are_applied(firestore_backend, monkeypatch):
+    captured = {}
+    
+    def create_channel(target, **kwargs):
+        captured['options'] = dict(kwargs.get('options') or ())
+        raise ChannelCreated()
+    
+    monkeypatch.setattr(grpc_helpers, 'create_channel', create_channel)
+    
+    client = database.get_db()
+    assert database.get_db() is client
+    
+    # Le canal est créé au premier appel
+    with pytest.raises(ChannelCreated):
+        client.collection('c').document('d').get()
+    
+    assert captured['options']['grpc.keepalive_time_ms'] == 30000
+    assert captured['options']['grpc.max_send_message_length'] == -1
+    assert captured['options']['grpc.max_receive_message_length'] == -1
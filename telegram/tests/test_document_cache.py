@@ -0,0 +1,95 @@
+# tests/test_document_cache.py - Cache de documents: chemins sync et async partagent Redis
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from redis_cache_async import async_redis_cache
+from services.DocumentCache import DocumentCache
+
+
+def run_with_async_redis(server, coroutine_factory):
+    """Exécute une coroutine avec async_redis_cache branché sur le même serveur fakeredis"""
+    fakeredis = pytest.importorskip('fakeredis')
+    
+    async def main():
+        await async_redis_cache.connect()
+        async_redis_cache.client = fakeredis.FakeAsyncRedis(server=server)
+        async_redis_cache.breaker.reset()
+        return await coroutine_factory()
+    
+    try:
+        return asyncio.run(main())
+    finally:
+        async_redis_cache.client = async_redis_cache._loop = None
+
+
+def test_async_reads_what_sync_wrote(fake_redis):
+    server = fake_redis.client.connection_pool.connection_kwargs['server']
+    page = {'title': 'Page', 'createdAt': datetime(2024, 1, 1)}
+    DocumentCache().set('landingPages', 'p1', page)
+    
+    # Nouvelle instance: pas de niveau local, lecture Redis async
+    reader = DocumentCache()
+    assert run_with_async_redis(server, lambda: reader.get_async('landingPages', 'p1')) == page
+    assert reader.stats()['redis_hits'] == 1
+
+
+def test_sync_reads_what_async_wrote(fake_redis):
+    server = fake_redis.client.connection_pool.connection_kwargs['server']
+    writer = DocumentCache()
+    
+    async def write():
+        await writer.set_many_async([('users', 'u1', {'name': 'A'}), ('users', 'u2', {'name': 'B'})])
+        return await DocumentCache().get_many_async({'a': ('users', 'u1'), 'z': ('users', 'missing')})
+    
+    assert run_with_async_redis(server, write) == {'a': {'name': 'A'}, 'z': None}
+    assert DocumentCache().get('users', 'u2') == {'name': 'B'}
+    
+    run_with_async_redis(server, lambda: writer.invalidate_async('users', 'u2'))
+    assert DocumentCache().get('users', 'u2') is None
+
+
+def test_sync_get_many_batches_redis_round_trips(fake_redis, memory_db, monkeypatch):
+    from services.FirebaseService import FirebaseService
+    
+    memory_db.collection('users').document('u1').set({'name': 'A'})
+    memory_db.collection('users').document('u2').set({'name': 'B'})
+    calls = []
+    client = fake_redis.client
+    for command in ('get', 'mget', 'set', 'setex'):
+        original = getattr(client, command)
+        monkeypatch.setattr(client, command,
+                            lambda *args, _command=command, _original=original, **kwargs:
+                            calls.append(_command) or _original(*args, **kwargs))
+    
+    refs = ['users/u1', ('users', 'u2'), 'users/missing']
+    expected = {'users/u1': {'name': 'A', 'id': 'u1'}, 'users/u2': {'name': 'B', 'id': 'u2'},
+                'users/missing': None}
+    assert FirebaseService().get_many(refs) == expected
+    # Un MGET pour les trois références, les deux documents lus écrits par pipeline
+    assert calls == ['mget']
+    
+    reader = FirebaseService()
+    assert reader.get_many(refs) == expected
+    assert reader.cache.stats()['redis_hits'] == 2
+
+
+def test_references_and_geopoints_round_trip(fake_redis, memory_db):
+    from google.cloud.firestore_v1 import GeoPoint
+    
+    page = {
+        'owner': memory_db.document('users/u1'),
+        'location': GeoPoint(48.85, 2.35),
+        'links': [memory_db.document('links/l1')],
+        'createdAt': datetime(2024, 1, 1),
+    }
+    DocumentCache().set('landingPages', 'p1', page)
+    
+    # Lecture Redis (nouvelle instance), puis L1
+    reader = DocumentCache()
+    for _ in range(2):
+        cached = reader.get('landingPages', 'p1')
+        assert cached == page
+        assert cached['owner'].get().id == 'u1'
+    assert reader.stats()['redis_hits'] == 1
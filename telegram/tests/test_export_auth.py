@@ -0,0 +1,36 @@
+# tests/test_export_auth.py - /api/export réservé au créateur authentifié
+import pytest
+from firebase_admin import auth
+
+import app as service
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def verify_id_token(token):
+        if token != 'valid-token':
+            raise ValueError('invalid token')
+        return {'uid': 'creator_1'}
+    
+    monkeypatch.setattr(auth, 'verify_id_token', verify_id_token)
+    monkeypatch.setattr(service.export_service, 'stream', lambda *args: iter(['email\n']))
+    return service.app.test_client()
+
+
+def test_export_requires_token(client):
+    assert client.get('/api/export/emails?creator_id=creator_1').status_code == 401
+    response = client.get('/api/export/emails?creator_id=creator_1', headers={'Authorization': 'Bearer forged'})
+    assert response.status_code == 401
+
+
+def test_export_refuses_other_creator(client):
+    response = client.get('/api/export/emails?creator_id=creator_2',
+                          headers={'Authorization': 'Bearer valid-token'})
+    assert response.status_code == 403
+
+
+def test_export_streams_own_data(client):
+    response = client.get('/api/export/emails?creator_id=creator_1',
+                          headers={'Authorization': 'Bearer valid-token'})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == 'email\n'
@@ -0,0 +1,97 @@
+# tests/test_export_service.py - Export en flux: schémas de ventes, reprise, lignes de fin
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services import ExportService as export_module
+from services.ExportService import ExportService
+
+START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def sales(memory_db):
+    collection = memory_db.collection('sales')
+    for i in range(3):
+        collection.document(f'camel_{i}').set({
+            'creatorId': 'creator_1', 'email': f'camel{i}@example.com', 'amount': 10,
+            'pageId': 'page_1', 'createdAt': START + timedelta(days=i)
+        })
+    for i in range(2):
+        collection.document(f'snake_{i}').set({
+            'creator_id': 'creator_1', 'email': f'snake{i}@example.com', 'amount': 5,
+            'stripe_session_id': f'cs_{i}', 'created_at': START + timedelta(days=i)
+        })
+    collection.document('other').set({'creatorId': 'creator_2', 'createdAt': START})
+    return collection
+
+
+def ndjson(service, page_token=None):
+    lines = ''.join(service.stream('sales', 'creator_1', 'ndjson', page_token)).splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_exports_both_sale_schemas_with_completion_marker(sales):
+    *rows, trailer = ndjson(ExportService(page_size=2))
+    
+    assert [row['id'] for row in rows] == ['camel_2', 'camel_1', 'camel_0', 'snake_1', 'snake_0']
+    assert rows[3]['stripeSessionId'] == 'cs_1'
+    assert rows[3]['createdAt'].startswith('2026-10-02')
+    assert trailer == {'complete': True, 'rows': 5}
+
+
+def test_csv_export_ends_with_comment_line(sales):
+    text = ''.join(ExportService(page_size=2).stream('sales', 'creator_1', 'csv'))
+    *body, trailer = text.splitlines()
+    
+    records = list(csv.DictReader(io.StringIO('\n'.join(body))))
+    assert [record['email'] for record in records][-1] == 'snake0@example.com'
+    assert trailer == '# complete; rows: 5'
+
+
+@pytest.mark.parametrize('resume_after', [1, 2, 3])
+def test_resume_token_continues_after_row(sales, resume_after):
+    service = ExportService(page_size=2)
+    *rows, _ = ndjson(service)
+    
+    *resumed, trailer = ndjson(service, rows[resume_after]['cursor'])
+    assert [row['id'] for row in resumed] == [row['id'] for row in rows[resume_after + 1:]]
+    assert trailer['rows'] == len(rows) - resume_after - 1
+    
+    csv_text = ''.join(service.stream('sales', 'creator_1', 'csv', rows[resume_after]['cursor']))
+    assert not csv_text.startswith('id,')
+
+
+def test_error_row_carries_resume_cursor(sales, monkeypatch):
+    iter_pages = export_module.iter_pages
+    
+    def failing_iter_pages(*args, **kwargs):
+        for page_number, page in enumerate(iter_pages(*args, **kwargs)):
+            if page_number == 1:
+                raise RuntimeError('deadline exceeded')
+            yield page
+    
+    service = ExportService(page_size=2)
+    monkeypatch.setattr(export_module, 'iter_pages', failing_iter_pages)
+    *partial, error = ndjson(service)
+    assert [row['id'] for row in partial] == ['camel_2', 'camel_1']
+    assert error == {'error': 'export interrupted', 'cursor': partial[-1]['cursor'], 'rows': 2}
+    
+    csv_trailer = ''.join(service.stream('sales', 'creator_1', 'csv')).splitlines()[-1]
+    assert csv_trailer == f"# error: export interrupted; rows: 2; cursor: {partial[-1]['cursor']}"
+    
+    monkeypatch.setattr(export_module, 'iter_pages', iter_pages)
+    *rest, trailer = ndjson(service, error['cursor'])
+    assert [row['id'] for row in partial + rest] == ['camel_2', 'camel_1', 'camel_0', 'snake_1', 'snake_0']
+    assert trailer['complete'] is True
+
+
+def test_validate_rejects_foreign_token(sales):
+    service = ExportService()
+    token = export_module.encode_page_token('updatedAt', START, 'camel_0')
+    with pytest.raises(ValueError):
+        service.validate('sales', 'ndjson', token)
+    service.validate('sales', 'ndjson', export_module.encode_page_token('created_at', START, 'snake_0'))
@@ -0,0 +1,18 @@
+# tests/test_member_index.py - Index des membres Telegram par identifiants Stripe
+from services.MemberIndexService import member_index_service, MEMBER_INDEX_CACHE_TTL
+
+
+def test_index_entries_are_cached_with_ttl_and_invalidated(fake_redis):
+    member_ref = member_index_service.create_member({'stripeSubscriptionId': 'sub_1', 'email': 'a@b.c'})
+    
+    found = member_index_service.find_by_subscription('sub_1')
+    assert [doc.reference.path for doc in found] == [member_ref.path]
+    
+    key = member_index_service._redis_key('subscription', 'sub_1')
+    assert 0 < fake_redis.client.ttl(key) <= MEMBER_INDEX_CACHE_TTL
+    
+    # Un second membre réécrit l'entrée: le cache est invalidé
+    other_ref = member_index_service.create_member({'stripeSubscriptionId': 'sub_1'})
+    assert fake_redis.get(key) is None
+    found = member_index_service.find_by_subscription('sub_1')
+    assert sorted(doc.reference.path for doc in found) == sorted([member_ref.path, other_ref.path])
@@ -0,0 +1,41 @@
+# tests/test_memory_firestore.py - Backend Firestore en mémoire: listeners on_snapshot
+from config.memory_firestore import create_memory_clients
+
+
+def test_document_listener_receives_changes():
+    db, _ = create_memory_clients()
+    doc_ref = db.collection('pages').document('p1')
+    events = []
+    
+    watch = doc_ref.on_snapshot(
+        lambda docs, changes, read_time: events.append(
+            ([doc.to_dict() for doc in docs], [change.type.name for change in changes])
+        )
+    )
+    doc_ref.set({'title': 'A'})
+    db.collection('pages').document('other').set({'title': 'ignored'})
+    doc_ref.update({'title': 'B'})
+    doc_ref.delete()
+    watch.unsubscribe()
+    doc_ref.set({'title': 'after unsubscribe'})
+    
+    assert events == [
+        ([], []),
+        ([{'title': 'A'}], ['ADDED']),
+        ([{'title': 'B'}], ['MODIFIED']),
+        ([], ['REMOVED']),
+    ]
+
+
+def test_collection_listener_ignores_subcollections():
+    db, _ = create_memory_clients()
+    events = []
+    
+    watch = db.collection('pages').on_snapshot(
+        lambda docs, changes, read_time: events.append(sorted(doc.id for doc in docs))
+    )
+    db.collection('pages').document('p1').set({'title': 'A'})
+    db.collection('pages').document('p1').collection('views').document('v1').set({'n': 1})
+    watch.unsubscribe()
+    
+    assert events == [[], ['p1']]
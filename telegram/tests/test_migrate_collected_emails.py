@@ -0,0 +1,60 @@
+# tests/test_migrate_collected_emails.py - Migration de collected_emails vers les IDs déterministes
+import pytest
+
+from scripts.migrate_collected_email_ids import migrate
+from services.FirebaseService import collected_email_id
+
+TARGET = collected_email_id('creator_1', 'buyer@example.com')
+
+
+@pytest.fixture
+def legacy(memory_db):
+    emails = memory_db.collection('collected_emails')
+    # Document du webhook et copie de la page de succès pour le même achat
+    emails.document('legacy_webhook').set({
+        'email': 'Buyer@Example.com', 'creatorId': 'creator_1', 'customerName': 'Buyer',
+        'amount': 10, 'stripeSessionId': 'cs_1', 'opens': 2
+    })
+    emails.document('legacy_success').set({
+        'email': 'buyer@example.com', 'creatorId': 'creator_1', 'stripeSessionId': 'cs_1'
+    })
+    # Second achat, déjà compté une fois dans totalPurchases
+    emails.document('legacy_second').set({
+        'email': ' buyer@example.com', 'creatorId': 'creator_1', 'customerName': 'Buyer',
+        'amount': 5, 'totalPurchases': 1, 'totalAmount': 7, 'stripeSessionId': 'cs_2', 'clicks': 1
+    })
+    emails.document('legacy_other_creator').set({
+        'email': 'buyer@example.com', 'creatorId': 'creator_2', 'customerName': 'Buyer', 'amount': 3
+    })
+    emails.document('no_email').set({'creatorId': 'creator_1'})
+    return emails
+
+
+def test_merges_duplicates_into_deterministic_ids(legacy):
+    stats = migrate(batch_size=2)
+    
+    assert stats == {'scanned': 5, 'moved': 2, 'merged': 2, 'skipped': 1}
+    target = legacy.document(TARGET).get().to_dict()
+    assert target['emailNormalized'] == 'buyer@example.com'
+    assert (target['totalPurchases'], target['totalAmount']) == (3, 22)
+    assert (target['opens'], target['clicks']) == (2, 1)
+    other = legacy.document(collected_email_id('creator_2', 'buyer@example.com')).get().to_dict()
+    assert (other['totalPurchases'], other['totalAmount']) == (1, 3)
+    assert sorted(doc.id for doc in legacy.stream()) == sorted(
+        [TARGET, collected_email_id('creator_2', 'buyer@example.com'), 'no_email']
+    )
+
+
+def test_rerun_is_a_no_op(legacy):
+    migrate()
+    before = {doc.id: doc.to_dict() for doc in legacy.stream()}
+    
+    assert migrate() == {'scanned': 3, 'moved': 0, 'merged': 0, 'skipped': 1}
+    assert {doc.id: doc.to_dict() for doc in legacy.stream()} == before
+
+
+def test_dry_run_writes_nothing(legacy):
+    before = {doc.id: doc.to_dict() for doc in legacy.stream()}
+    stats = migrate(dry_run=True)
+    assert stats['moved'] + stats['merged'] == 4
+    assert {doc.id: doc.to_dict() for doc in legacy.stream()} == before
@@ -0,0 +1,84 @@
+# tests/test_pagination.py - Pagination par curseur (champ date, id) et jetons opaques
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+from services.FirebaseService import FirebaseService
+from services.Pagination import (fetch_page, iter_pages, encode_page_token, decode_page_token,
+                                 clamp_page_size, InvalidPageToken, MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE)
+
+START = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def emails(memory_db):
+    collection = memory_db.collection('collected_emails')
+    for i in range(7):
+        # Trois documents partagent la même date: départagés par l'id
+        created_at = START + timedelta(hours=min(i, 4))
+        collection.document(f'e{i}').set({'creatorId': 'creator_1', 'createdAt': created_at, 'n': i})
+    collection.document('other').set({'creatorId': 'creator_2', 'createdAt': START})
+    return collection.where('creatorId', '==', 'creator_1')
+
+
+def all_ids(query, page_size, **kwargs):
+    return [[item['id'] for item in page['items']] for page in iter_pages(query, 'createdAt', page_size, **kwargs)]
+
+
+def test_pages_cover_every_document_once_despite_equal_dates(emails):
+    pages = all_ids(emails, 2)
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    flat = [doc_id for page in pages for doc_id in page]
+    assert flat == ['e6', 'e5', 'e4', 'e3', 'e2', 'e1', 'e0']
+
+
+def test_last_page_has_no_token(emails):
+    page = fetch_page(emails, 'createdAt', 7)
+    assert len(page['items']) == 7
+    assert page['next_page_token'] is None
+    assert page['items'][0]['createdAt'] == (START + timedelta(hours=4)).isoformat()
+
+
+def test_resume_from_token(emails):
+    first = fetch_page(emails, 'createdAt', 3)
+    second = fetch_page(emails, 'createdAt', 3, first['next_page_token'])
+    assert [item['id'] for item in second['items']] == ['e3', 'e2', 'e1']
+
+
+def test_ascending_direction(emails):
+    from firebase_admin import firestore
+    pages = all_ids(emails, 4, direction=firestore.Query.ASCENDING)
+    assert pages == [['e0', 'e1', 'e2', 'e3'], ['e4', 'e5', 'e6']]
+
+
+@pytest.mark.parametrize('value', [
+    START,
+    DatetimeWithNanoseconds(2026, 10, 1, 12, 0, 0, nanosecond=123456789, tzinfo=timezone.utc),
+])
+def test_token_round_trip(value):
+    token = encode_page_token('createdAt', value, 'doc_1')
+    assert '=' not in token
+    decoded, doc_id = decode_page_token(token, 'createdAt')
+    assert (decoded, doc_id) == (value, 'doc_1')
+
+
+@pytest.mark.parametrize('token', ['not-base64!', 'e30', encode_page_token('created_at', START, 'd')])
+def test_invalid_or_foreign_tokens_are_rejected(token):
+    with pytest.raises(InvalidPageToken):
+        decode_page_token(token, 'createdAt')
+
+
+def test_page_size_is_clamped():
+    assert clamp_page_size('20') == 20
+    assert clamp_page_size(0) == 1
+    assert clamp_page_size(10 ** 6) == MAX_PAGE_SIZE
+    assert clamp_page_size('abc') == DEFAULT_PAGE_SIZE
+
+
+def test_emails_page_api(emails):
+    service = FirebaseService()
+    first = service.get_emails_page('creator_1', page_size=4)
+    second = service.get_emails_page('creator_1', page_size=4, page_token=first['next_page_token'])
+    assert len(first['items']) + len(second['items']) == 7
+    assert second['next_page_token'] is None
@@ -0,0 +1,52 @@
+# tests/test_rate_limit.py - Limiteur GCRA (script Lua atomique) et middleware Flask
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from redis_cache import check_rate_limit, rate_limit_middleware
+
+
+@pytest.fixture
+def limiter(fake_redis):
+    pytest.importorskip('lupa')
+    return fake_redis
+
+
+def test_burst_then_refusal(limiter):
+    results = [check_rate_limit('10.0.0.1', limit=5, window=60) for _ in range(6)]
+    
+    assert [allowed for allowed, _, _ in results] == [True] * 5 + [False]
+    assert [remaining for _, remaining, _ in results] == [4, 3, 2, 1, 0, 0]
+    # Refusée: prochaine requête autorisée après window/limit = 12 s
+    retry_in = results[-1][2] - datetime.now()
+    assert timedelta(seconds=10) < retry_in <= timedelta(seconds=12)
+    
+    # Une seule clé par identifiant, expirée quand la rafale est de nouveau complète
+    assert 0 < limiter.client.pttl('ratelimit:python:10.0.0.1') <= 60000
+    assert check_rate_limit('10.0.0.2', limit=5, window=60)[0] is True
+
+
+def test_falls_back_to_local_limiter_when_redis_is_down(limiter):
+    limiter.breaker.trip(ConnectionError('down'))
+    results = [check_rate_limit('local-test-ip', limit=2, window=60)[0] for _ in range(3)]
+    assert results == [True, True, False]
+    assert limiter.client.exists('ratelimit:python:local-test-ip') == 0
+
+
+def test_middleware_sets_headers_and_rejects(limiter):
+    app = Flask(__name__)
+    rate_limit_middleware(app, limit=2, window=60)
+    app.add_url_rule('/ping', 'ping', lambda: 'pong')
+    client = app.test_client()
+    
+    first = client.get('/ping', environ_base={'REMOTE_ADDR': '10.0.0.9'})
+    assert first.status_code == 200
+    assert first.headers['X-RateLimit-Limit'] == '2'
+    assert first.headers['X-RateLimit-Remaining'] == '1'
+    
+    client.get('/ping', environ_base={'REMOTE_ADDR': '10.0.0.9'})
+    refused = client.get('/ping', environ_base={'REMOTE_ADDR': '10.0.0.9'})
+    assert refused.status_code == 429
+    assert 1 <= int(refused.headers['Retry-After']) <= 30
+    assert refused.headers['X-RateLimit-Remaining'] == '0'
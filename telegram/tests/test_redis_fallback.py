@@ -0,0 +1,98 @@
+# tests/test_redis_fallback.py - Mode dégradé: cache local et réconciliation
+import asyncio
+
+import pytest
+import redis
+
+import redis_cache_async
+from redis_cache_async import AsyncRedisCache, async_redis_cache
+
+
+def fail(*args, **kwargs):
+    raise redis.exceptions.ResponseError('command failed')
+
+
+def test_failed_delete_is_applied_locally_and_replayed(fake_redis, monkeypatch):
+    fake_redis.set('landing:p1', {'v': 1}, ttl=300)
+    
+    # Erreur de commande (le circuit reste fermé)
+    monkeypatch.setattr(fake_redis, '_unlink_iter', fail)
+    monkeypatch.setattr(fake_redis.client, 'delete', fail)
+    assert fake_redis.delete('landing:p1') is True
+    assert fake_redis.delete_many(['landing:p2']) == 0
+    assert fake_redis.fallback.pending()['deletes'] == 2
+    monkeypatch.undo()
+    
+    # La sonde suivante rejoue la suppression
+    assert fake_redis.probe() is True
+    assert fake_redis.get('landing:p1') is None
+    assert fake_redis.fallback.pending()['deletes'] == 0
+
+
+def test_delete_while_down_hides_local_value(fake_redis):
+    fake_redis.breaker.trip(Exception('down'))
+    fake_redis.set('landing:p1', {'v': 1}, ttl=300)
+    assert fake_redis.get('landing:p1') == {'v': 1}
+    
+    assert fake_redis.delete('landing:p1') is True
+    assert fake_redis.get('landing:p1') is None
+
+
+async def async_fail(*args, **kwargs):
+    fail()
+
+
+def test_failed_async_invalidations_are_queued_and_replayed(fake_redis, monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fake_redis.client.connection_pool.connection_kwargs['server']
+    fake_redis.set('landing:p1', {'v': 1}, ttl=300)
+    fake_redis.set('landing:p2', {'v': 2}, ttl=300, tags=['page:p2'])
+    
+    async def main():
+        await async_redis_cache.connect()
+        async_redis_cache.client = fakeredis.FakeAsyncRedis(server=server)
+        async_redis_cache.breaker.reset()
+        
+        monkeypatch.setattr(async_redis_cache.client, 'delete', async_fail)
+        monkeypatch.setattr(async_redis_cache, '_unlink_iter', async_fail)
+        assert await async_redis_cache.delete('landing:p1') is False
+        await async_redis_cache.invalidate_tags('page:p2')
+        assert fake_redis.fallback.pending()['deletes'] == 1
+        assert fake_redis.fallback.pending()['tags'] == 1
+        monkeypatch.undo()
+        
+        # La sonde async rejoue la file partagée avec le cache sync
+        assert await async_redis_cache.probe() is True
+    
+    try:
+        asyncio.run(main())
+    finally:
+        async_redis_cache.client = async_redis_cache._loop = None
+    
+    assert fake_redis.get('landing:p1') is None
+    assert fake_redis.get('landing:p2') is None
+    assert not any(fake_redis.fallback.pending().values())
+
+
+def test_loop_change_cancels_previous_health_probe(monkeypatch):
+    monkeypatch.setattr(redis_cache_async, 'REDIS_HEALTH_INTERVAL', 60)
+    cache = AsyncRedisCache()
+    
+    async def probe():
+        return True
+    
+    monkeypatch.setattr(cache, 'probe', probe)
+    first, second = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        first.run_until_complete(cache.connect())
+        task = cache._health_task
+        second.run_until_complete(cache.connect())
+        assert cache._health_task is not task
+        
+        # L'annulation est exécutée par l'ancienne boucle
+        first.run_until_complete(asyncio.sleep(0.01))
+        assert task.cancelled()
+        second.run_until_complete(cache.close())
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,89 @@
+# tests/test_stats_service.py - Agrégats de ventes: déduplication, reconstruction, accès
+from datetime import datetime, timezone
+
+import pytest
+from firebase_admin import auth
+
+import app as service
+from services.StatsService import stats_service
+
+OCT_3 = datetime(2026, 10, 3, 12, tzinfo=timezone.utc).timestamp()
+NOV_2 = datetime(2026, 11, 2, 12, tzinfo=timezone.utc).timestamp()
+
+
+def test_replayed_event_is_counted_once(memory_db):
+    assert stats_service.record_sale('evt_1', 'creator_1', 'page_1', 1500, 'EUR', OCT_3) is True
+    assert stats_service.record_sale('evt_1', 'creator_1', 'page_1', 1500, 'EUR', OCT_3) is False
+    
+    stats = stats_service.get_stats('creator', 'creator_1')
+    assert stats['revenue'] == {'eur': 1500}
+    assert stats['salesCount'] == 1
+    assert stats['activeSubscriptions'] == 1
+    assert 'revenueByDay' not in stats
+    assert stats_service.get_stats('page', 'page_1')['creatorId'] == 'creator_1'
+
+
+def test_daily_counters_are_sharded_by_month(memory_db):
+    stats_service.record_sale('evt_1', 'creator_1', None, 1000, 'eur', OCT_3)
+    stats_service.record_renewal('evt_2', 'creator_1', None, 1000, 'eur', NOV_2)
+    stats_service.record_churn('evt_3', 'creator_1', None, NOV_2)
+    
+    october = stats_service.get_stats('creator', 'creator_1', '2026-10')
+    november = stats_service.get_stats('creator', 'creator_1', '2026-11')
+    assert october['revenueByDay'] == {'2026-10-03': {'eur': 1000}}
+    assert october['churnByDay'] == {}
+    assert november['revenueByDay'] == {'2026-11-02': {'eur': 1000}}
+    assert november['churnByDay'] == {'2026-11-02': 1}
+    assert november['revenue'] == {'eur': 2000}
+    assert november['activeSubscriptions'] == 0
+
+
+def test_rebuild_reads_both_sale_schemas_and_replaces_aggregates(memory_db):
+    sales = memory_db.collection('sales')
+    sales.add({'creatorId': 'creator_1', 'pageId': 'page_1', 'amount': 10,
+               'currency': 'eur', 'createdAt': datetime(2026, 10, 3, tzinfo=timezone.utc)})
+    sales.add({'creator_id': 'creator_1', 'amount': 5.5, 'currency': 'eur', 'status': 'cancelled',
+               'created_at': datetime(2026, 11, 2, tzinfo=timezone.utc)})
+    sales.add({'creatorId': 'creator_2', 'amount': 99, 'currency': 'eur',
+               'createdAt': datetime(2026, 10, 3, tzinfo=timezone.utc)})
+    # Agrégats faussés (doublon d'un ancien bug) et page sans vente
+    stats_service.record_sale('evt_old', 'creator_1', 'page_1', 100000, 'eur', OCT_3)
+    stats_service.record_sale('evt_gone', 'creator_1', 'page_gone', 700, 'eur', NOV_2)
+    stats_service.record_sale('evt_sep', 'creator_1', None, 300, 'eur',
+                              datetime(2026, 9, 1, tzinfo=timezone.utc).timestamp())
+    
+    assert stats_service.rebuild(creator_id='creator_1') == 2
+    
+    creator = stats_service.get_stats('creator', 'creator_1', '2026-11')
+    assert creator['revenue'] == {'eur': 1550}
+    assert creator['salesCount'] == 2
+    assert creator['churnCount'] == 1
+    assert creator['activeSubscriptions'] == 1
+    assert creator['revenueByDay'] == {'2026-11-02': {'eur': 550}}
+    assert creator['churnByDay'] == {'2026-11-02': 1}
+    assert stats_service.get_stats('page', 'page_1')['revenue'] == {'eur': 1000}
+    assert stats_service.get_stats('page', 'page_gone') is None
+    assert stats_service.get_stats('creator', 'creator_1', '2026-09')['revenueByDay'] == {}
+    # Les autres créateurs ne sont pas touchés
+    assert stats_service.get_stats('creator', 'creator_2') is None
+
+
+@pytest.fixture
+def client(monkeypatch, memory_db, fake_redis):
+    monkeypatch.setattr(auth, 'verify_id_token', lambda token: {'uid': token})
+    memory_db.collection('landingPages').document('stats_page_1').set({'creatorId': 'creator_1'})
+    stats_service.record_sale('evt_1', 'creator_1', 'stats_page_1', 1500, 'eur', OCT_3)
+    return service.app.test_client()
+
+
+def test_stats_require_owner(client):
+    assert client.get('/api/stats/creator/creator_1').status_code == 401
+    
+    for path in ('/api/stats/creator/creator_1', '/api/stats/page/stats_page_1'):
+        assert client.get(path, headers={'Authorization': 'Bearer creator_2'}).status_code == 403
+        response = client.get(path, headers={'Authorization': 'Bearer creator_1'})
+        assert response.status_code == 200
+        assert response.get_json()['stats']['revenue'] == {'eur': 1500}
+    
+    response = client.get('/api/stats/page/unknown_page', headers={'Authorization': 'Bearer creator_1'})
+    assert response.status_code == 403
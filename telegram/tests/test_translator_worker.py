@@ -0,0 +1,57 @@
+# tests/test_translator_worker.py - Fan-out des traductions et rythme par canal cible
+import asyncio
+import types
+from datetime import datetime
+
+from bots import telegram_bot_worker as worker
+from services.FirebaseService import firebase_service
+
+
+def make_event():
+    message = types.SimpleNamespace(text='hello', media=None, id=1, date=datetime.now(), chat_id=1)
+    return types.SimpleNamespace(message=message)
+
+
+def language(code, channel):
+    return {'code': code, 'targetChannel': channel}
+
+
+def test_pacers_reused_and_pruned_on_reload(monkeypatch):
+    bot = worker.TelegramTranslatorBot()
+    sent = []
+    
+    async def send(message_data, target_lang, settings):
+        sent.append((target_lang['code'], asyncio.get_running_loop().time()))
+    
+    monkeypatch.setattr(bot, 'send_translated_message', send)
+    config_data = {
+        'settings': {'delayBetweenMessages': 200},
+        'target_languages': [language('en', 'https://t.me/a'), language('es', 'https://t.me/b'),
+                             language('de', 'https://t.me/b')],
+    }
+    
+    async def fan_out():
+        started = asyncio.get_running_loop().time()
+        await bot.translate_and_forward_message(make_event(), config_data)
+        return {code: at - started for code, at in sent}
+    
+    delays = asyncio.run(fan_out())
+    assert delays['en'] < 0.1 and delays['es'] < 0.1
+    assert delays['de'] >= 0.19  # même canal que es
+    pacer = bot.target_pacers['https://t.me/b']
+    
+    asyncio.run(fan_out())
+    assert bot.target_pacers['https://t.me/b'] is pacer
+    
+    # Rechargement: seul le canal a reste configuré
+    async def configs(status='active', **kwargs):
+        return [{'id': 'c1', 'sourceChannelUsername': 'src', 'userId': 'u1',
+                 'targetLanguages': [language('en', 'https://t.me/a')]}]
+    
+    async def no_channel(username):
+        return None
+    
+    monkeypatch.setattr(firebase_service, 'get_translation_configs_async', configs)
+    monkeypatch.setattr(bot, 'resolve_channel_id', no_channel)
+    asyncio.run(bot.load_active_configurations())
+    assert set(bot.target_pacers) == {'https://t.me/a'}
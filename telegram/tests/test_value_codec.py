@@ -0,0 +1,78 @@
+# tests/test_value_codec.py - Format binaire des valeurs du cache: types, compression, valeurs legacy
+import json
+import os
+import pickle
+from datetime import datetime
+
+import pytest
+
+from redis_cache import ValueCodec, CODEC_JSON, CODEC_PICKLE, CODEC_STR, CODEC_ZLIB, CODEC_ZSTD
+
+VALUES = [
+    'texte accentué',
+    b'\x00\x01binary',
+    {'a': 1, 'nested': {'list': [1, 2.5, None, True]}},
+    [1, 'two', {'three': 3}],
+    42,
+    None,
+    {'createdAt': datetime(2024, 1, 1, 12, 30)},
+]
+
+
+def codecs():
+    yield ValueCodec(serializer='json', compression='zlib', threshold=64)
+    yield ValueCodec(serializer='json', compression='none')
+    try:
+        import msgpack  # noqa: F401
+        yield ValueCodec(serializer='msgpack', compression='zlib', threshold=64)
+    except ImportError:
+        pass
+    try:
+        import zstandard  # noqa: F401
+        yield ValueCodec(serializer='json', compression='zstd', threshold=64)
+    except ImportError:
+        pass
+
+
+@pytest.mark.parametrize('codec', list(codecs()), ids=lambda c: f'{c.serializer}-{c.compression}')
+@pytest.mark.parametrize('value', VALUES + [{'big': 'x' * 5000}, 'y' * 5000])
+def test_round_trip(codec, value):
+    assert codec.decode(codec.encode(value)) == value
+
+
+def test_header_records_type_and_compression():
+    codec = ValueCodec(serializer='json', compression='zlib', threshold=64)
+    
+    assert codec.encode('short')[0] == CODEC_STR
+    assert codec.encode({'a': 1})[0] == CODEC_JSON
+    assert codec.encode({'d': datetime(2024, 1, 1)})[0] == CODEC_PICKLE
+    
+    large = codec.encode({'big': 'x' * 5000})
+    assert large[0] == CODEC_JSON | CODEC_ZLIB
+    assert len(large) < 200
+
+
+def test_incompressible_body_is_stored_raw():
+    codec = ValueCodec(compression='zlib', threshold=64)
+    value = os.urandom(4096)
+    encoded = codec.encode(value)
+    assert not encoded[0] & (CODEC_ZLIB | CODEC_ZSTD)
+    assert codec.decode(encoded) == value
+
+
+@pytest.mark.parametrize('legacy, expected', [
+    (json.dumps({'a': [1, 2]}).encode(), {'a': [1, 2]}),
+    (pickle.dumps({'when': datetime(2024, 1, 1)}), {'when': datetime(2024, 1, 1)}),
+    # Premier octet 'B' (0x42) = en-tête bytes + zstd: retombe sur le texte brut
+    (b'Bonjour', 'Bonjour'),
+    (b'plain text', 'plain text'),
+])
+def test_reads_values_written_before_the_header(legacy, expected):
+    assert ValueCodec().decode(legacy) == expected
+
+
+def test_non_bytes_and_empty_values_pass_through():
+    codec = ValueCodec()
+    assert codec.decode(None) is None
+    assert codec.decode(b'') == b''
+    assert codec.decode('already decoded') == 'already decoded'